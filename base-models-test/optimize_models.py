@@ -9,6 +9,12 @@ import sys
 import os
 from pathlib import Path
 
+# Content-hash build cache shared with scripts/blender
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts' / 'blender'))
+from build_cache import run_cached
+from textures import optimize_textures
+from mesh_stats import scene_triangles
+
 def optimize_model(input_path, output_path, target_triangles=150000, texture_size=1024):
     """
     Optimize a GLB model for mobile/web use
@@ -39,7 +45,7 @@ def optimize_model(input_path, output_path, target_triangles=150000, texture_siz
         return False
     
     # Calculate current triangle count
-    total_tris = sum(len(obj.data.polygons) for obj in mesh_objects)
+    total_tris = scene_triangles(mesh_objects)
     print(f"📊 Current triangles: {total_tris:,}")
     
     # Apply Decimate modifier if needed
@@ -61,17 +67,14 @@ def optimize_model(input_path, output_path, target_triangles=150000, texture_siz
             bpy.ops.object.modifier_apply(modifier="Decimate")
             obj.select_set(False)
         
-        new_tris = sum(len(obj.data.polygons) for obj in mesh_objects)
+        new_tris = scene_triangles(mesh_objects)
         print(f"✅ New triangles: {new_tris:,} ({(new_tris/total_tris)*100:.1f}% of original)")
     else:
         print(f"✅ Triangle count already optimal ({total_tris:,})")
     
     # Compress textures
-    print(f"🖼️  Compressing textures to {texture_size}x{texture_size}...")
-    for img in bpy.data.images:
-        if img.size[0] > texture_size or img.size[1] > texture_size:
-            img.scale(texture_size, texture_size)
-            print(f"   Resized: {img.name}")
+    print(f"🖼️  Compressing textures to {texture_size}px (by role, aspect kept)...")
+    optimize_textures(texture_size)
     
     # Export optimized GLB
     print(f"💾 Exporting to: {output_path}")
@@ -131,14 +134,14 @@ def main():
             print(f"⚠️  Skipping {model_name} (file not found)")
             continue
         
+        params = {
+            'target_triangles': 120000,  # 120K triangles
+            'texture_size': 1024  # 1024x1024 textures
+        }
         try:
-            optimize_model(
-                input_path=input_path,
-                output_path=output_path,
-                target_triangles=120000,  # 120K triangles
-                texture_size=1024  # 1024x1024 textures
-            )
-            print(f"✅ Success: {output_name}")
+            cached = run_cached(__file__, input_path, [output_path], params,
+                                lambda: optimize_model(input_path=input_path, output_path=output_path, **params))
+            print(f"✅ Success: {output_name}{' (cached)' if cached else ''}")
         except Exception as e:
             print(f"❌ Error optimizing {model_name}: {e}")
     
@@ -15,8 +15,8 @@ export { submitPartCandidate } from './parts/submitPartCandidate';
 
 // --- NEW 10-ANGLE PIPELINE ---
 
-type JobType = "SEGMENT_CAR" | "MAKE_PART_ASSET" | "BUILD_FRAMES";
-type JobStatus = "queued" | "running" | "done" | "error";
+type JobType = "SEGMENT_CAR" | "SEGMENT_CARS" | "MAKE_PART_ASSET" | "BUILD_FRAMES";
+type JobStatus = "queued" | "running" | "done" | "error" | "cancelled";
 
 function requireAuth(req: any) {
     if (!req.auth?.uid) throw new HttpsError("unauthenticated", "Sign in required");
@@ -56,6 +56,19 @@ export const queueSegmentCar = onCall(async (req) => {
     return { jobId };
 });
 
+/**
+ * Client: call this to queue segmentation for many cars at once (bulk import)
+ */
+export const queueSegmentCars = onCall(async (req) => {
+    const ownerId = requireAuth(req);
+    const { carIds } = req.data || {};
+    if (!Array.isArray(carIds) || carIds.length === 0) {
+        throw new HttpsError("invalid-argument", "carIds required");
+    }
+    const jobId = await createJob(ownerId, "SEGMENT_CARS", { carIds });
+    return { jobId };
+});
+
 /**
  * Client: call this to queue asset generation for a part
  */
@@ -111,6 +124,14 @@ export const onJobCreated = onDocumentCreated("jobs/{jobId}", async (event) => {
             body: JSON.stringify({ jobId, ...input }),
         });
 
+        if (res.status === 409) {
+            // Cancelled via jobs/{jobId}.cancelRequested; the worker already wrote the final state
+            await ref.update({
+                status: "cancelled" as JobStatus,
+                updatedAt: admin.firestore.FieldValue.serverTimestamp(),
+            });
+            return;
+        }
         if (!res.ok) {
             const text = await res.text();
             throw new Error(`Worker error ${res.status}: ${text}`);
@@ -0,0 +1,188 @@
+"""
+Speed/size report for the image codec backends and PNG profiles
+
+Usage:
+  python bench_codecs.py photos_dir [--codecs pillow,turbo] [--sides 0,2048,1024,512]
+                         [--quality 85] [--repeat 3] [--out report.json]
+
+For every JPEG in photos_dir, each codec backend (main.PillowCodec,
+main.TurboJpegCodec when simplejpeg is installed) is timed on:
+  decode   full size and DCT-scaled to each --sides long side (0 = full)
+  encode   JPEG at --quality, with JPEG_OPTIMIZE off and on (both codecs
+           encode through Pillow's libjpeg-turbo)
+PNG encodes are timed per PNG_PROFILES asset type on what the worker
+uploads for a photo: the mask (L), the full RGBA cutout and its trimmed
+premultiplied sprite, with a centred ellipse standing in for the car.
+Reports ms per image and output KB, next to level 6/default (Pillow's own
+setting).
+
+Runs the same helpers as the worker (image_from_buffer, jpg_buffer,
+png_buffer). No Firebase access is needed.
+"""
+from __future__ import annotations
+
+import os
+os.environ.setdefault("WORKER_STARTUP", "lazy")  # don't build Firebase clients on import
+
+import argparse
+import json
+import sys
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+import main
+
+PHOTO_EXTS = (".jpg", ".jpeg")
+
+
+def load_photos(photos_dir: str) -> Dict[str, bytes]:
+    photos = {}
+    for name in sorted(os.listdir(photos_dir)):
+        if name.lower().endswith(PHOTO_EXTS):
+            with open(os.path.join(photos_dir, name), "rb") as f:
+                photos[os.path.splitext(name)[0]] = f.read()
+    return photos
+
+
+def available_codecs() -> Dict[str, main.PillowCodec]:
+    codecs = {"pillow": main.PillowCodec()}
+    try:
+        codecs["turbo"] = main.make_codec("turbo")
+    except RuntimeError:
+        pass
+    return codecs
+
+
+def timed(fn: Callable[[], object], repeat: int) -> float:
+    """Best-of-repeat milliseconds (the first run also warms the pool)."""
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best * 1000
+
+
+def encoded_kb(buf: main.PooledBuffer) -> float:
+    with buf:
+        return buf.size / 1024
+
+
+def stand_in_mask(size) -> Image.Image:
+    w, h = size
+    mask = Image.new("L", size, 0)
+    ImageDraw.Draw(mask).ellipse((w * 0.1, h * 0.3, w * 0.9, h * 0.85), fill=255)
+    return mask
+
+
+def bench_codec(codec: main.PillowCodec, photos: Dict[str, bytes], sides: List[int],
+                quality: int, repeat: int) -> Dict:
+    decode = {side: [] for side in sides}
+    encode = {"plain": [], "optimize": []}
+    sizes = {"plain": [], "optimize": []}
+    for data in photos.values():
+        buf = main.PooledBuffer(None, data, len(data))
+        for side in sides:
+            decode[side].append(timed(lambda: main.image_from_buffer(buf, max_side=side, codec=codec), repeat))
+        img = main.image_from_buffer(buf, codec=codec)
+        for variant, optimize in (("plain", False), ("optimize", True)):
+            main.JPEG_OPTIMIZE = optimize
+            encode[variant].append(timed(lambda: main.jpg_buffer(img, quality, codec=codec).release(), repeat))
+            sizes[variant].append(encoded_kb(main.jpg_buffer(img, quality, codec=codec)))
+    main.JPEG_OPTIMIZE = False
+
+    report = {
+        "decodeMs": {str(side or "full"): round(float(np.mean(ms)), 1) for side, ms in decode.items()},
+        "encodeMs": {v: round(float(np.mean(ms)), 1) for v, ms in encode.items()},
+        "encodeKb": {v: round(float(np.mean(kb)), 1) for v, kb in sizes.items()},
+    }
+    return report
+
+
+def bench_png(photos: Dict[str, bytes], repeat: int) -> List[Dict]:
+    rows: Dict[tuple, Dict] = {}
+    for data in photos.values():
+        img = main.image_from_buffer(main.PooledBuffer(None, data, len(data)), codec=main.PillowCodec())
+        mask = stand_in_mask(img.size)
+        cutout = img.convert("RGBA")
+        cutout.putalpha(mask)
+        targets = {"mask": mask, "cutout": cutout, "sprite": main.trim_premultiplied(cutout)[0]}
+        for asset, target in targets.items():
+            level, strategy = main.PNG_PROFILES.get(asset, (6, "default"))
+            encoders = {
+                f"{level}:{strategy}": lambda: main.png_buffer(target, asset),
+                "6:default": lambda: main.encode_image(target, "PNG"),  # Pillow's own setting
+            }
+            for profile, encode in encoders.items():
+                row = rows.setdefault((asset, profile), {"asset": asset, "profile": profile, "ms": [], "kb": []})
+                row["ms"].append(timed(lambda: encode().release(), repeat))
+                row["kb"].append(encoded_kb(encode()))
+
+    return [
+        {**row, "ms": round(float(np.mean(row["ms"])), 1), "kb": round(float(np.mean(row["kb"])), 1)}
+        for row in rows.values()
+    ]
+
+
+def benchmark(photos_dir: str, codecs: List[str], sides: List[int], quality: int = 85, repeat: int = 3) -> Dict:
+    photos = load_photos(photos_dir)
+    if not photos:
+        raise SystemExit(f"No JPEG photos in {photos_dir}")
+
+    available = available_codecs()
+    report = {"photos": len(photos), "repeat": repeat, "quality": quality,
+              "jpegFastDct": main.JPEG_FAST_DCT, "codecs": {}}
+    for name in codecs:
+        if name not in available:
+            print(f"Skipping {name}: not installed")
+            continue
+        print(f"Running {name} on {len(photos)} photo(s)...")
+        report["codecs"][name] = bench_codec(available[name], photos, sides, quality, repeat)
+    print("Running PNG profiles...")
+    report["png"] = bench_png(photos, repeat)
+    return report
+
+
+def print_table(report: Dict):
+    print(f"\nphotos: {report['photos']}  quality: {report['quality']}  fast DCT: {report['jpegFastDct']}")
+    sides = list(next(iter(report["codecs"].values()))["decodeMs"]) if report["codecs"] else []
+    print(f"{'codec':<8} " + " ".join(f"{'dec ' + s:>10}" for s in sides)
+          + f" {'enc ms':>8} {'enc KB':>8} {'opt ms':>8} {'opt KB':>8}")
+    for name, r in report["codecs"].items():
+        print(f"{name:<8} " + " ".join(f"{r['decodeMs'][s]:>10.1f}" for s in sides)
+              + f" {r['encodeMs']['plain']:>8.1f} {r['encodeKb']['plain']:>8.1f}"
+              + f" {r['encodeMs']['optimize']:>8.1f} {r['encodeKb']['optimize']:>8.1f}")
+    print(f"\n{'PNG asset':<10} {'profile':>12} {'ms':>8} {'KB':>8}")
+    for r in report["png"]:
+        print(f"{r['asset']:<10} {r['profile']:>12} {r['ms']:>8.1f} {r['kb']:>8.1f}")
+
+
+def cli():
+    parser = argparse.ArgumentParser(description="Compare image codec backends and PNG profiles on sample photos")
+    parser.add_argument("photos_dir")
+    parser.add_argument("--codecs", default="pillow,turbo")
+    parser.add_argument("--sides", default="0,2048,1024,512", help="Decode long sides (0 = full size)")
+    parser.add_argument("--quality", type=int, default=85)
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per photo (best is kept)")
+    parser.add_argument("--out", default=None, help="Write the JSON report here")
+    args = parser.parse_args()
+
+    codecs = [c.strip().lower() for c in args.codecs.split(",") if c.strip()]
+    unknown = [c for c in codecs if c not in ("pillow", "turbo")]
+    if unknown:
+        parser.error(f"unknown codec(s) {unknown}; expected ['pillow', 'turbo']")
+    sides = [int(s) for s in args.sides.split(",") if s.strip()]
+
+    report = benchmark(args.photos_dir, codecs, sides, args.quality, max(1, args.repeat))
+    print_table(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.out}")
+
+
+if __name__ == "__main__":
+    sys.exit(cli())
@@ -0,0 +1,166 @@
+"""
+Accuracy/speed report for the segmentation model variants (SEGMENT_MODELS)
+
+Usage:
+  python eval_segmentation.py photos_dir [--masks masks_dir] [--variants u2net,u2net_int8,u2netp,silueta]
+                              [--reference u2net] [--repeat 1] [--out report.json]
+
+For every photo (jpg/jpeg/png/webp) in photos_dir, each variant's mask is
+compared with a reference mask: masks_dir/<photo stem>.png when given
+(white = car), otherwise the --reference variant's own output. Reports per
+variant: mean/min mask IoU, mean absolute alpha error, ms per image and
+images per second, and the session load time (first run also quantizes and
+writes the graph-optimized model to SEGMENT_MODEL_CACHE; rerun to see the
+cached load time).
+
+Runs the same code path as the worker (rgba_cutout), so SEGMENT_MODE and
+SEGMENT_MODEL_SLOTS apply. No Firebase access is needed.
+"""
+from __future__ import annotations
+
+import os
+os.environ.setdefault("WORKER_STARTUP", "lazy")  # don't build Firebase clients on import
+
+import argparse
+import json
+import sys
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from PIL import Image
+
+import main
+
+PHOTO_EXTS = (".jpg", ".jpeg", ".png", ".webp")
+
+
+def load_photos(photos_dir: str) -> Dict[str, Image.Image]:
+    photos = {}
+    for name in sorted(os.listdir(photos_dir)):
+        if name.lower().endswith(PHOTO_EXTS):
+            with open(os.path.join(photos_dir, name), "rb") as f:
+                data = f.read()
+            photos[os.path.splitext(name)[0]] = main.image_from_buffer(main.PooledBuffer(None, data, len(data)))
+    return photos
+
+
+def load_reference_masks(masks_dir: str, photos: Dict[str, Image.Image]) -> Dict[str, np.ndarray]:
+    masks = {}
+    for stem, img in photos.items():
+        path = os.path.join(masks_dir, f"{stem}.png")
+        if not os.path.exists(path):
+            continue
+        m = Image.open(path).convert("L")
+        if m.size != img.size:
+            m = m.resize(img.size, Image.NEAREST)
+        masks[stem] = np.asarray(m)
+    return masks
+
+
+def iou(a: np.ndarray, b: np.ndarray) -> float:
+    a = a > 127
+    b = b > 127
+    union = np.logical_or(a, b).sum()
+    return float(np.logical_and(a, b).sum() / union) if union else 1.0
+
+
+def run_variant(model: str, photos: Dict[str, Image.Image], repeat: int) -> Dict:
+    t = time.perf_counter()
+    main.rembg_session(model)
+    load_ms = (time.perf_counter() - t) * 1000
+
+    alphas = {}
+    times: List[float] = []
+    for stem, img in photos.items():
+        for _ in range(repeat):
+            t = time.perf_counter()
+            out = main.rgba_cutout(img, model=model)
+            times.append(time.perf_counter() - t)
+        alphas[stem] = np.asarray(out)[:, :, 3]
+
+    total = sum(times)
+    return {
+        "alphas": alphas,
+        "loadMs": round(load_ms, 1),
+        "msPerImage": round(total / len(times) * 1000, 1),
+        "imagesPerSec": round(len(times) / total, 2) if total else None,
+    }
+
+
+def evaluate(photos_dir: str, variants: List[str], masks_dir: Optional[str] = None,
+             reference: str = "u2net", repeat: int = 1) -> Dict:
+    photos = load_photos(photos_dir)
+    if not photos:
+        raise SystemExit(f"No photos in {photos_dir}")
+
+    refs = load_reference_masks(masks_dir, photos) if masks_dir else {}
+    if masks_dir and not refs:
+        raise SystemExit(f"No <photo>.png masks in {masks_dir}")
+    ref_source = "masks" if refs else f"model:{reference}"
+
+    order = variants if refs or reference in variants else [reference] + variants
+    runs = {}
+    for model in order:
+        print(f"Running {model} on {len(photos)} photo(s)...")
+        runs[model] = run_variant(model, photos, repeat)
+    if not refs:
+        refs = runs[reference]["alphas"]
+
+    report = {
+        "photos": len(photos),
+        "repeat": repeat,
+        "reference": ref_source,
+        "segmentMode": main.SEGMENT_MODE,
+        "variants": {},
+    }
+    for model in variants:
+        run = runs[model]
+        scores = [iou(run["alphas"][stem], refs[stem]) for stem in refs]
+        errors = [float(np.abs(run["alphas"][stem].astype(np.int16) - refs[stem]).mean()) / 255
+                  for stem in refs]
+        report["variants"][model] = {
+            "iouMean": round(float(np.mean(scores)), 4),
+            "iouMin": round(float(np.min(scores)), 4),
+            "alphaMae": round(float(np.mean(errors)), 4),
+            "msPerImage": run["msPerImage"],
+            "imagesPerSec": run["imagesPerSec"],
+            "loadMs": run["loadMs"],
+            "perPhotoIou": {stem: round(s, 4) for stem, s in zip(refs, scores)},
+        }
+    return report
+
+
+def print_table(report: Dict):
+    print(f"\nReference: {report['reference']}  photos: {report['photos']}  mode: {report['segmentMode']}")
+    print(f"{'variant':<12} {'IoU mean':>9} {'IoU min':>8} {'alpha MAE':>10} {'ms/img':>8} {'img/s':>7} {'load ms':>9}")
+    for model, r in report["variants"].items():
+        print(f"{model:<12} {r['iouMean']:>9.4f} {r['iouMin']:>8.4f} {r['alphaMae']:>10.4f} "
+              f"{r['msPerImage']:>8.1f} {r['imagesPerSec'] or 0:>7.2f} {r['loadMs']:>9.1f}")
+
+
+def cli():
+    parser = argparse.ArgumentParser(description="Compare segmentation model variants on sample photos")
+    parser.add_argument("photos_dir")
+    parser.add_argument("--masks", default=None, help="Reference masks dir (<photo stem>.png)")
+    parser.add_argument("--variants", default=",".join(main.SEGMENT_MODELS))
+    parser.add_argument("--reference", default="u2net", help="Variant used as reference without --masks")
+    parser.add_argument("--repeat", type=int, default=1, help="Timed runs per photo")
+    parser.add_argument("--out", default=None, help="Write the JSON report here")
+    args = parser.parse_args()
+
+    variants = [v.strip().lower() for v in args.variants.split(",") if v.strip()]
+    unknown = [v for v in variants + [args.reference] if v not in main.SEGMENT_MODELS]
+    if unknown:
+        parser.error(f"unknown variant(s) {unknown}; expected {sorted(main.SEGMENT_MODELS)}")
+
+    report = evaluate(args.photos_dir, variants, args.masks, args.reference, max(1, args.repeat))
+    print_table(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.out}")
+
+
+if __name__ == "__main__":
+    sys.exit(cli())
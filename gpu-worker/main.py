@@ -1,24 +1,83 @@
 from __future__ import annotations
 
+import time
+_T0 = time.perf_counter()
+
 import io
 import os
 import json
 import uuid
-from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import importlib
+import importlib.util
+import threading
+import zlib
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import CancelledError, ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import numpy as np
-import cv2
 from PIL import Image
 
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 
 import requests
-import firebase_admin
-from firebase_admin import credentials, firestore
-from google.cloud import storage
 
-from rembg import remove as rembg_remove
+# ---------------------------
+# Startup / lazy imports
+# ---------------------------
+# WORKER_STARTUP:
+#   eager - import cv2/rembg/firebase and build clients at module load (default)
+#   lazy  - defer all of that until the first request that needs it
+#   warm  - like lazy, but a background thread loads everything right after
+#           startup so /health answers immediately on a cold container
+STARTUP_MODE = os.getenv("WORKER_STARTUP", "eager").lower()
+
+# name -> milliseconds spent importing/constructing it
+IMPORT_TIMINGS: Dict[str, float] = {"core": round((time.perf_counter() - _T0) * 1000, 1)}
+WARMUP_DONE = threading.Event()
+WARMUP_ERROR: Optional[str] = None
+
+class Lazy:
+    """
+    Proxy for a module or client that is created on first attribute access.
+    Creation time is recorded in IMPORT_TIMINGS.
+    """
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        self._name = name
+        self._factory = factory
+        self._obj = None
+        self._lock = threading.Lock()
+
+    def load(self) -> Any:
+        if self._obj is None:
+            with self._lock:
+                if self._obj is None:
+                    t = time.perf_counter()
+                    obj = self._factory()
+                    IMPORT_TIMINGS[self._name] = round((time.perf_counter() - t) * 1000, 1)
+                    self._obj = obj
+        return self._obj
+
+    @property
+    def loaded(self) -> bool:
+        return self._obj is not None
+
+    def __getattr__(self, attr: str):
+        return getattr(self.load(), attr)
+
+def lazy_import(name: str) -> Lazy:
+    return Lazy(name, lambda: importlib.import_module(name))
+
+cv2 = lazy_import("cv2")
+rembg = lazy_import("rembg")
+ort = lazy_import("onnxruntime")
+firebase_admin = lazy_import("firebase_admin")
+credentials = lazy_import("firebase_admin.credentials")
+firestore = lazy_import("firebase_admin.firestore")
+storage = lazy_import("google.cloud.storage")
 
 app = FastAPI(title="GPU Worker", version="1.0")
 
@@ -35,8 +94,11 @@ def init_firebase():
         # Works if running in GCP with default credentials
         firebase_admin.initialize_app()
 
-init_firebase()
-DB = firestore.client()
+def _firestore_client():
+    init_firebase()
+    return firestore.client()
+
+DB = Lazy("firestore_client", _firestore_client)
 
 PROJECT_ID = os.getenv("FIREBASE_PROJECT_ID", "")
 BUCKET = os.getenv("STORAGE_BUCKET", "")
@@ -44,76 +106,615 @@ if not BUCKET:
     # Best effort default
     BUCKET = f"{PROJECT_ID}.appspot.com" if PROJECT_ID else ""
 
-ST = storage.Client()
-BU = ST.bucket(BUCKET) if BUCKET else None
+ST = Lazy("storage_client", lambda: storage.Client())
+BU = Lazy("storage_bucket", lambda: ST.bucket(BUCKET)) if BUCKET else None
+
+# Batch segmentation: I/O threads per batch job, and how many model runs may
+# execute at once across all jobs (onnxruntime already uses every core per run).
+SEGMENT_IO_WORKERS = int(os.getenv("SEGMENT_IO_WORKERS", "8"))
+SEGMENT_MODEL_SLOTS = int(os.getenv("SEGMENT_MODEL_SLOTS", "2"))
+
+# SEGMENT_MODE:
+#   full   - run rembg on the full-resolution photo (default)
+#   coarse - run it on a copy whose long side is SEGMENT_COARSE_SIDE, upsample
+#            the mask and refine only a band of SEGMENT_BAND_PX around the
+#            object edge at full resolution with a guided filter
+SEGMENT_MODE = os.getenv("SEGMENT_MODE", "full").lower()
+SEGMENT_COARSE_SIDE = int(os.getenv("SEGMENT_COARSE_SIDE", "1024"))
+SEGMENT_BAND_PX = int(os.getenv("SEGMENT_BAND_PX", "12"))
+SEGMENT_GUIDE_EPS = float(os.getenv("SEGMENT_GUIDE_EPS", "1e-3"))
+
+# SEGMENT_MODEL picks the segmentation network (see SEGMENT_MODELS); quantized
+# and graph-optimized model files are cached in SEGMENT_MODEL_CACHE.
+SEGMENT_MODEL = os.getenv("SEGMENT_MODEL", "u2net").lower()
+SEGMENT_MODEL_CACHE = os.getenv("SEGMENT_MODEL_CACHE", os.path.expanduser("~/.u2net/optimized"))
+
+# build_frames renders angles concurrently; Pillow/numpy/cv2 release the GIL.
+FRAME_WORKERS = int(os.getenv("FRAME_WORKERS", str(os.cpu_count() or 4)))
+
+# Memory admission: each job reserves its estimated peak (full-resolution
+# copies per concurrently processed image) before it starts and waits while
+# the budget is taken. MEMORY_BUDGET_MB defaults to MEMORY_BUDGET_FRACTION of
+# the container limit (cgroup) or physical memory; the rest is left for the
+# model session, Python and the web server.
+MEMORY_BUDGET_MB = float(os.getenv("MEMORY_BUDGET_MB", "0"))
+MEMORY_BUDGET_FRACTION = float(os.getenv("MEMORY_BUDGET_FRACTION", "0.6"))
+MEMORY_ADMIT_TIMEOUT_S = float(os.getenv("MEMORY_ADMIT_TIMEOUT_S", "600"))
+
+# Priority lanes: interactive (build_frames, a user is waiting) and bulk
+# (segmentation/onboarding). Compute steps take one of WORK_SLOTS turns;
+# waiting lanes are served in proportion to LANE_WEIGHTS.
+LANE_INTERACTIVE = "interactive"
+LANE_BULK = "bulk"
+LANE_WEIGHTS: Dict[str, int] = {LANE_INTERACTIVE: 4, LANE_BULK: 1}
+for _item in os.getenv("LANE_WEIGHTS", "").split(","):
+    if "=" in _item:
+        _lane, _, _weight = _item.partition("=")
+        LANE_WEIGHTS[_lane.strip().lower()] = max(1, int(_weight))
+WORK_SLOTS = int(os.getenv("WORK_SLOTS", str(os.cpu_count() or 1)))
+
+# Speculative pre-segmentation: WORKER_INGEST=1 listens to every cars/*/angles
+# doc and segments new/changed angles in the bulk lane as they are uploaded,
+# so segment_car mostly finds finished masks. POST /ingest/angle does the
+# same for one angle (storage notification / Cloud Function push).
+INGEST_LISTENER = os.getenv("WORKER_INGEST", "").lower() in ("1", "true", "yes")
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+
+# Downloads/encodes go through pooled bytearrays; up to BUFFER_POOL_MB of
+# idle buffers are kept for reuse.
+BUFFER_POOL_MB = float(os.getenv("BUFFER_POOL_MB", "256"))
+
+# Image codecs:
+#   IMAGE_CODEC   auto   - libjpeg-turbo (simplejpeg) for JPEG when installed,
+#                          Pillow otherwise (default)
+#                 turbo  - require simplejpeg; pillow - Pillow only
+#   JPEG_OPTIMIZE extra Huffman pass on encode (a few % smaller, slower)
+#   JPEG_FAST_DCT fast integer DCT/upsampling when the turbo codec decodes
+#   PNG_PROFILES  asset=level:strategy (zlib level 0-9; strategy default,
+#                 filtered, rle, huffman or fixed) per uploaded asset type.
+#                 Masks default to 1:rle (flat regions, small either way);
+#                 photo content keeps 6:default, since 1:rle encodes a
+#                 cutout faster but ~65% larger (e.g. cutout=1:rle to opt in)
+#   FRAME_MAX_SIDE > 0 caps the long side of rendered build frames; JPEG
+#                 angles are then decoded DCT-scaled instead of at full size
+IMAGE_CODEC = os.getenv("IMAGE_CODEC", "auto").lower()
+JPEG_OPTIMIZE = os.getenv("JPEG_OPTIMIZE", "").lower() in ("1", "true", "yes")
+JPEG_FAST_DCT = os.getenv("JPEG_FAST_DCT", "").lower() in ("1", "true", "yes")
+PNG_PROFILES: Dict[str, Tuple[int, str]] = {"mask": (1, "rle"), "cutout": (6, "default"), "sprite": (6, "default")}
+for _item in os.getenv("PNG_PROFILES", "").split(","):
+    if "=" in _item:
+        _asset, _, _profile = _item.partition("=")
+        _level, _, _strategy = _profile.partition(":")
+        PNG_PROFILES[_asset.strip().lower()] = (int(_level), _strategy.strip().lower() or "default")
+FRAME_MAX_SIDE = int(os.getenv("FRAME_MAX_SIDE", "0"))
+
+# Extra pre-scaled levels stored next to each trimmed part sprite.
+PART_MIP_SCALES = [float(x) for x in os.getenv("PART_MIP_SCALES", "0.5,0.25").split(",") if x.strip()]
 
 
 # ---------------------------
 # Models
 # ---------------------------
+# priority: a LANE_WEIGHTS lane ("interactive" / "bulk"); None = endpoint default
 class SegmentCarIn(BaseModel):
     jobId: str
     carId: str
+    priority: Optional[str] = None
 
 class MakePartAssetIn(BaseModel):
     jobId: str
     partId: str
+    priority: Optional[str] = None
 
 class BuildFramesIn(BaseModel):
     jobId: str
     buildId: str
+    priority: Optional[str] = None
+
+class SegmentCarsIn(BaseModel):
+    jobId: str
+    carIds: List[str]
+    priority: Optional[str] = None
+
+class IngestAngleIn(BaseModel):
+    carId: str
+    angleId: str
+
+# ---------------------------
+# Buffer pool (zero-copy I/O)
+# ---------------------------
+class PooledBuffer:
+    """
+    size valid bytes at the start of a pooled bytearray; release() returns it.
+    pool=None wraps bytes produced elsewhere (release() just drops them).
+    """
+    def __init__(self, pool: "BufferPool", data: bytearray, size: int = 0):
+        self.pool = pool
+        self.data = data
+        self.size = size
+
+    @property
+    def view(self) -> memoryview:
+        return memoryview(self.data)[:self.size]
+
+    def release(self):
+        if self.data is not None:
+            if self.pool is not None:
+                self.pool._give_back(self.data)
+            self.data = None
+
+    def __enter__(self) -> "PooledBuffer":
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+class BufferPool:
+    """
+    Power-of-two bytearrays reused across downloads and encodes, so a busy
+    worker stops allocating (and the allocator stops fragmenting) a fresh
+    multi-MB bytes object per image. Idle buffers are capped at limit bytes.
+    """
+    MIN_CAPACITY = 64 * 1024
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.idle = 0
+        self._free: Dict[int, List[bytearray]] = {}
+        self._recent_sizes: deque = deque(maxlen=32)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def acquire(self, size: int) -> PooledBuffer:
+        capacity = self.MIN_CAPACITY
+        while capacity < size:
+            capacity *= 2
+        with self._lock:
+            free = self._free.get(capacity)
+            if free:
+                self.idle -= capacity
+                self.stats["hits"] += 1
+                return PooledBuffer(self, free.pop())
+            self.stats["misses"] += 1
+        return PooledBuffer(self, bytearray(capacity))
+
+    def _give_back(self, data: bytearray):
+        with self._lock:
+            if self.idle + len(data) <= self.limit:
+                self._free.setdefault(len(data), []).append(data)
+                self.idle += len(data)
+
+    def size_hint(self) -> int:
+        """Initial capacity for a download of unknown length: the largest recent one."""
+        with self._lock:
+            return max(self._recent_sizes, default=0)
+
+    def note_size(self, size: int):
+        with self._lock:
+            self._recent_sizes.append(size)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"idleMb": round(self.idle / (1024 * 1024), 1), **self.stats}
+
+POOL = BufferPool(int(BUFFER_POOL_MB * 1024 * 1024))
+
+class BufferWriter(io.RawIOBase):
+    """
+    Writable, seekable file object backed by a PooledBuffer (grows by taking
+    a bigger pooled buffer). Used as the target of blob.download_to_file and
+    Image.save; buffer() hands the result over without a getvalue() copy.
+    """
+    def __init__(self, pool: BufferPool = None, size_hint: int = 0):
+        super().__init__()
+        self.pool = pool or POOL
+        self.buf = self.pool.acquire(size_hint or self.pool.size_hint())
+        self.pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        b = memoryview(b).cast("B")
+        end = self.pos + len(b)
+        if end > len(self.buf.data):
+            bigger = self.pool.acquire(end)
+            bigger.data[:self.buf.size] = memoryview(self.buf.data)[:self.buf.size]
+            bigger.size = self.buf.size
+            self.buf.release()
+            self.buf = bigger
+        self.buf.data[self.pos:end] = b
+        self.pos = end
+        self.buf.size = max(self.buf.size, end)
+        return len(b)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self.pos, io.SEEK_END: self.buf.size}[whence]
+        self.pos = max(0, base + offset)
+        return self.pos
+
+    def tell(self) -> int:
+        return self.pos
+
+    def truncate(self, size: Optional[int] = None) -> int:
+        self.buf.size = self.pos if size is None else min(size, self.buf.size)
+        return self.buf.size
+
+    def buffer(self) -> PooledBuffer:
+        self.pool.note_size(self.buf.size)
+        return self.buf
+
+class MemoryReader(io.RawIOBase):
+    """Read-only seekable file object over a memoryview (io.BytesIO would copy it)."""
+    def __init__(self, view: memoryview):
+        super().__init__()
+        self._view = view
+        self.pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        n = min(len(b), len(self._view) - self.pos)
+        if n <= 0:
+            return 0
+        memoryview(b).cast("B")[:n] = self._view[self.pos:self.pos + n]
+        self.pos += n
+        return n
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self.pos, io.SEEK_END: len(self._view)}[whence]
+        self.pos = max(0, base + offset)
+        return self.pos
+
+    def tell(self) -> int:
+        return self.pos
+
+    def close(self):
+        self._view = memoryview(b"")
+        super().close()
 
 # ---------------------------
 # Storage helpers
 # ---------------------------
-def gcs_download(path: str) -> bytes:
+def gcs_download_into(path: str) -> PooledBuffer:
+    """Streams an object into a pooled buffer; release() it (or use with) when decoded."""
     if not BU:
         raise RuntimeError("Storage bucket not configured")
-    blob = BU.blob(path)
-    return blob.download_as_bytes()
-
-def gcs_upload(path: str, data: bytes, content_type: str):
+    writer = BufferWriter()
+    try:
+        BU.blob(path).download_to_file(writer)
+    except BaseException:
+        writer.buf.release()
+        raise
+    return writer.buffer()
+
+def http_download_into(url: str) -> PooledBuffer:
+    with requests.get(url, stream=True) as resp:
+        resp.raise_for_status()
+        writer = BufferWriter(size_hint=int(resp.headers.get("Content-Length") or 0))
+        try:
+            for chunk in resp.iter_content(256 * 1024):
+                writer.write(chunk)
+        except BaseException:
+            writer.buf.release()
+            raise
+    return writer.buffer()
+
+def gcs_upload_buffer(path: str, buf: PooledBuffer, content_type: str) -> str:
+    """Uploads straight from a pooled buffer, then releases it."""
     if not BU:
         raise RuntimeError("Storage bucket not configured")
-    blob = BU.blob(path)
-    blob.upload_from_string(data, content_type=content_type)
+    with buf:
+        BU.blob(path).upload_from_file(MemoryReader(buf.view), size=buf.size, content_type=content_type)
     return f"gs://{BUCKET}/{path}"
 
-def image_from_bytes(b: bytes) -> Image.Image:
-    return Image.open(io.BytesIO(b)).convert("RGB")
+def gcs_exists(url: str) -> bool:
+    """True if a gs:// url in our bucket points at an existing object."""
+    if not BU or not str(url).startswith(f"gs://{BUCKET}/"):
+        return False
+    return BU.blob(str(url)[len(f"gs://{BUCKET}/"):]).exists()
 
-def png_bytes_from_pil(img: Image.Image) -> bytes:
-    buf = io.BytesIO()
-    img.save(buf, format="PNG")
-    return buf.getvalue()
+def encode_image(img: Image.Image, format: str, **params) -> PooledBuffer:
+    """Image.save into a pooled buffer (pass to gcs_upload_buffer)."""
+    writer = BufferWriter()
+    img.save(writer, format=format, **params)
+    return writer.buffer()
 
-def jpg_bytes_from_pil(img: Image.Image, quality: int = 85) -> bytes:
-    buf = io.BytesIO()
-    img.save(buf, format="JPEG", quality=quality, optimize=True)
-    return buf.getvalue()
+# ---------------------------
+# Image codecs
+# ---------------------------
+PNG_STRATEGIES = {
+    "default": zlib.Z_DEFAULT_STRATEGY,
+    "filtered": zlib.Z_FILTERED,
+    "rle": zlib.Z_RLE,
+    "huffman": zlib.Z_HUFFMAN_ONLY,
+    "fixed": zlib.Z_FIXED,
+}
+
+simplejpeg = lazy_import("simplejpeg")
+
+def fit_size(size: Tuple[int, int], max_side: int) -> Tuple[int, int]:
+    """size scaled down so its long side is max_side (unchanged if already smaller)."""
+    w, h = size
+    if not max_side or max(w, h) <= max_side:
+        return w, h
+    f = max_side / float(max(w, h))
+    return max(1, round(w * f)), max(1, round(h * f))
+
+class PillowCodec:
+    """
+    Generic Pillow decode/encode. JPEGs decoded with max_side use draft(), so
+    libjpeg's DCT scaling (1/2, 1/4, 1/8) skips most of the work.
+    """
+    name = "pillow"
+
+    def decode(self, view: memoryview, mode: str, max_side: int = 0) -> Image.Image:
+        reader = MemoryReader(view)
+        img = Image.open(reader)
+        if max_side and img.format == "JPEG" and max(img.size) > max_side:
+            img.draft(mode if mode in ("RGB", "L") else None, fit_size(img.size, max_side))
+        img.load()
+        reader.close()
+        return img
+
+    def encode_jpeg(self, img: Image.Image, quality: int) -> PooledBuffer:
+        return encode_image(img, "JPEG", quality=quality, optimize=JPEG_OPTIMIZE)
+
+class TurboJpegCodec(PillowCodec):
+    """
+    Decodes RGB/grayscale JPEGs with libjpeg-turbo through simplejpeg (its
+    wheel bundles the library) straight into a numpy array, skipping Pillow's
+    tile/decoder overhead. Anything else (PNG, CMYK, EXIF-rotated photos,
+    which rembg transposes from the Pillow metadata) goes to Pillow. Encoding
+    stays on Pillow: its wheels link the same libjpeg-turbo, and simplejpeg
+    would need an extra numpy copy of the frame.
+    """
+    name = "turbo"
+
+    def decode(self, view: memoryview, mode: str, max_side: int = 0) -> Image.Image:
+        reader = MemoryReader(view)
+        img = Image.open(reader)  # header only
+        if (img.format != "JPEG" or img.mode not in ("RGB", "L") or mode not in ("RGB", "L")
+                or img.getexif().get(0x0112, 1) != 1):
+            reader.close()
+            return super().decode(view, mode, max_side)
+        w, h = fit_size(img.size, max_side)
+        reader.close()
+        pixels = simplejpeg.decode_jpeg(
+            view, colorspace="GRAY" if mode == "L" else "RGB",
+            fastdct=JPEG_FAST_DCT, fastupsample=JPEG_FAST_DCT,
+            min_width=w if max_side else 0, min_height=h if max_side else 0,
+        )
+        return Image.fromarray(pixels[:, :, 0] if mode == "L" else pixels)
+
+def make_codec(name: str) -> PillowCodec:
+    if name in ("turbo", "auto") and importlib.util.find_spec("simplejpeg"):
+        return TurboJpegCodec()
+    if name == "turbo":
+        raise RuntimeError("IMAGE_CODEC=turbo needs the simplejpeg package")
+    return PillowCodec()
+
+CODEC = make_codec(IMAGE_CODEC)
+
+def image_from_buffer(buf: PooledBuffer, mode: str = "RGB", max_side: int = 0,
+                      codec: Optional[PillowCodec] = None) -> Image.Image:
+    """
+    Decodes straight from the pooled bytes (no BytesIO copy) and only
+    converts when the file isn't already in mode. max_side caps the long side
+    (JPEGs are DCT-scaled first). The buffer can be released as soon as this returns.
+    """
+    img = (codec or CODEC).decode(buf.view, mode, max_side)
+    if img.mode != mode:
+        img = img.convert(mode)
+    size = fit_size(img.size, max_side)
+    if img.size == size:
+        return img
+    # after DCT scaling less than 2x is left, which linear interpolation handles
+    interp = cv2.INTER_LINEAR if img.size[0] < 2 * size[0] else cv2.INTER_AREA
+    return Image.fromarray(cv2.resize(np.asarray(img), size, interpolation=interp))
+
+def png_buffer(img: Image.Image, asset: str = "cutout") -> PooledBuffer:
+    """PNG with the PNG_PROFILES compression level/zlib strategy of asset."""
+    level, strategy = PNG_PROFILES.get(asset, (6, "default"))
+    return encode_image(img, "PNG", compress_level=level, compress_type=PNG_STRATEGIES[strategy])
+
+def jpg_buffer(img: Image.Image, quality: int = 85, codec: Optional[PillowCodec] = None) -> PooledBuffer:
+    return (codec or CODEC).encode_jpeg(img, quality)
 
 # ---------------------------
 # Vision helpers (v1)
 # ---------------------------
-def rgba_cutout(img_rgb: Image.Image) -> Image.Image:
+# variant -> (rembg model it is built from, int8 dynamic quantization)
+SEGMENT_MODELS: Dict[str, Tuple[str, bool]] = {
+    "u2net": ("u2net", False),       # 176 MB fp32, the original default
+    "u2net_int8": ("u2net", True),   # ~44 MB, int8 weights
+    "u2netp": ("u2netp", False),     # 4.7 MB small network
+    "silueta": ("silueta", False),   # 43 MB pruned u2net
+}
+
+_SESSIONS: Dict[str, Any] = {}
+_SESSION_LOCK = threading.Lock()
+_MODEL_SLOTS = threading.BoundedSemaphore(SEGMENT_MODEL_SLOTS)
+
+def _atomic_write(path: str, write: Callable[[str], None]):
+    """write(tmp_path) then rename, so a crashed worker never leaves half a model"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def optimized_model_path(model: str) -> str:
+    return os.path.join(SEGMENT_MODEL_CACHE, f"{model}.ort{ort.__version__}.onnx")
+
+def segment_model_path(model: str) -> Tuple[str, bool]:
+    """
+    (onnx path, already graph-optimized) for a SEGMENT_MODELS variant.
+    Downloads the base model through rembg and quantizes it on first use;
+    the graph-optimized copy is keyed by onnxruntime version because saved
+    optimizations are not portable across releases.
+    """
+    if model not in SEGMENT_MODELS:
+        raise ValueError(f"Unknown SEGMENT_MODEL {model!r}; expected one of {sorted(SEGMENT_MODELS)}")
+    base_name, quantize = SEGMENT_MODELS[model]
+
+    optimized = optimized_model_path(model)
+    if os.path.exists(optimized):
+        return optimized, True
+
+    session_class = next(sc for sc in rembg.sessions.sessions_class if sc.name() == base_name)
+    path = str(session_class.download_models())
+    if quantize:
+        quantized = os.path.join(SEGMENT_MODEL_CACHE, f"{model}.onnx")
+        if not os.path.exists(quantized):
+            q = importlib.import_module("onnxruntime.quantization")
+            _atomic_write(quantized, lambda tmp: q.quantize_dynamic(path, tmp, weight_type=q.QuantType.QUInt8))
+        path = quantized
+    return path, False
+
+def _session_options(save_optimized_to: Optional[str] = None):
+    """
+    Options for a session on an already optimized model, or, with
+    save_optimized_to, one that runs the graph passes and writes the result there.
+    """
+    opts = ort.SessionOptions()
+    if "OMP_NUM_THREADS" in os.environ:
+        opts.inter_op_num_threads = int(os.environ["OMP_NUM_THREADS"])
+        opts.intra_op_num_threads = int(os.environ["OMP_NUM_THREADS"])
+    if save_optimized_to is None:
+        # Already optimized on disk: skip the graph passes at load
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+    else:
+        # EXTENDED, not ALL: layout-specific rewrites don't belong in a saved model
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+        opts.optimized_model_filepath = save_optimized_to
+    return opts
+
+def rembg_session(model: Optional[str] = None):
+    """
+    rembg builds a fresh onnxruntime session (model load) on every call
+    unless one is passed in, so keep one shared session per model variant
+    per process. The first load of a variant writes its graph-optimized
+    model to SEGMENT_MODEL_CACHE; later processes load that directly.
+    """
+    model = (model or SEGMENT_MODEL).lower()
+    with _SESSION_LOCK:
+        if model not in _SESSIONS:
+            t = time.perf_counter()
+            path, optimized = segment_model_path(model)
+            custom = next(sc for sc in rembg.sessions.sessions_class if sc.name() == "u2net_custom")
+            # u2net, u2netp and silueta share u2net's pre/post-processing
+            build = lambda save_to=None: custom("u2net_custom", _session_options(save_to), None, model_path=path)
+            if optimized:
+                _SESSIONS[model] = build()
+            else:
+                # onnxruntime writes the optimized graph while it builds the
+                # session: point it at a temp file that is renamed into place
+                _atomic_write(optimized_model_path(model),
+                              lambda tmp: _SESSIONS.__setitem__(model, build(tmp)))
+            key = "rembg_session" if model == SEGMENT_MODEL else f"rembg_session:{model}"
+            IMPORT_TIMINGS[key] = round((time.perf_counter() - t) * 1000, 1)
+        return _SESSIONS[model]
+
+def rgba_cutout(img_rgb: Image.Image, model: Optional[str] = None) -> Image.Image:
     """
     Returns RGBA image with background removed.
-    Uses rembg as default (works now).
+    Uses rembg as default (works now); SEGMENT_MODE=coarse runs it at low
+    resolution and refines the edge band (see coarse_alpha).
+    model overrides SEGMENT_MODEL (eval_segmentation.py compares variants).
     """
-    arr = np.array(img_rgb)
+    if SEGMENT_MODE == "coarse" and max(img_rgb.size) > SEGMENT_COARSE_SIDE:
+        alpha = Image.fromarray(coarse_alpha(img_rgb, model), mode="L")
+        # Same composite as rembg's naive cutout: color fades to 0 with alpha
+        empty = Image.new("RGBA", img_rgb.size, 0)
+        return Image.composite(img_rgb.convert("RGBA"), empty, alpha)
+
+    session = rembg_session(model)
     # rembg expects bytes or PIL; we give PIL for simplicity
-    out = rembg_remove(img_rgb)  # returns PIL Image with alpha
+    with _MODEL_SLOTS:
+        out = rembg.remove(img_rgb, session=session)  # returns PIL Image with alpha
     if out.mode != "RGBA":
         out = out.convert("RGBA")
     return out
 
+def coarse_alpha(img_rgb: Image.Image, model: Optional[str] = None) -> np.ndarray:
+    """
+    Full-resolution uint8 alpha from a low-resolution model pass:
+    - rembg on a copy with long side SEGMENT_COARSE_SIDE (mask only)
+    - bilinear upsample to the photo size
+    - pixels further than the band from the thresholded edge snap to 0/255;
+      the band is guided-filtered against the full-res photo so the edge
+      follows the real image detail instead of the upsampled blur
+    """
+    w, h = img_rgb.size
+    scale = SEGMENT_COARSE_SIDE / float(max(w, h))
+    small = img_rgb.resize((max(1, round(w * scale)), max(1, round(h * scale))),
+                           Image.BILINEAR, reducing_gap=2.0)
+    session = rembg_session(model)
+    with _MODEL_SLOTS:
+        mask = rembg.remove(small, session=session, only_mask=True)
+    alpha = cv2.resize(np.asarray(mask.convert("L")), (w, h), interpolation=cv2.INTER_LINEAR)
+
+    # The band must cover the upsampling blur (about one coarse pixel each side)
+    band_px = max(SEGMENT_BAND_PX, int(np.ceil(2.0 / scale)))
+    hard = (alpha > 127).astype(np.uint8)
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (2 * band_px + 1, 2 * band_px + 1))
+    inside = cv2.erode(hard, kernel)
+    near = cv2.dilate(hard, kernel)
+    band = near != inside
+
+    out = inside * np.uint8(255)
+    if not band.any():
+        return out
+
+    # Filter only the band's bounding box (plus the filter radius)
+    x, y, bw, bh = cv2.boundingRect(band.astype(np.uint8))
+    x0, y0 = max(0, x - band_px), max(0, y - band_px)
+    x1, y1 = min(w, x + bw + band_px), min(h, y + bh + band_px)
+    guide = np.asarray(img_rgb.crop((x0, y0, x1, y1)).convert("L"), dtype=np.float32) / 255.0
+    src = alpha[y0:y1, x0:x1].astype(np.float32) / 255.0
+    refined = guided_filter(guide, src, band_px, SEGMENT_GUIDE_EPS)
+    refined = np.clip(refined * 255.0 + 0.5, 0, 255).astype(np.uint8)
+
+    crop_band = band[y0:y1, x0:x1]
+    out[y0:y1, x0:x1][crop_band] = refined[crop_band]
+    return out
+
+def guided_filter(guide: np.ndarray, src: np.ndarray, radius: int, eps: float) -> np.ndarray:
+    """
+    Gray-guide guided filter (He et al.) on float32 arrays in [0, 1], built
+    from box filters so it costs O(pixels) regardless of radius.
+    """
+    ksize = (2 * radius + 1, 2 * radius + 1)
+
+    def box(a: np.ndarray) -> np.ndarray:
+        return cv2.boxFilter(a, cv2.CV_32F, ksize)
+
+    mean_i = box(guide)
+    mean_p = box(src)
+    cov_ip = box(guide * src) - mean_i * mean_p
+    var_i = box(guide * guide) - mean_i * mean_i
+    a = cov_ip / (var_i + eps)
+    b = mean_p - a * mean_i
+    return box(a) * guide + box(b)
+
 def alpha_to_mask(alpha: Image.Image) -> Image.Image:
     """
     alpha: RGBA image; returns L mask where car/part = 255
     """
     if alpha.mode != "RGBA":
         alpha = alpha.convert("RGBA")
-    a = np.array(alpha)[:, :, 3]
+    a = np.asarray(alpha.getchannel("A"))  # one plane, not a full RGBA copy
     mask = Image.fromarray((a > 0).astype(np.uint8) * 255, mode="L")
     return mask
 
@@ -157,18 +758,18 @@ def apply_paint(img_rgb: Image.Image, body_mask: Image.Image, color_hex: str) ->
     g = int(color_hex[2:4], 16)
     b = int(color_hex[4:6], 16)
 
-    img = np.array(img_rgb).astype(np.float32)
-    mask = (np.array(body_mask) > 127).astype(np.float32)[..., None]
-
-    solid = np.zeros_like(img)
-    solid[..., 0] = r
-    solid[..., 1] = g
-    solid[..., 2] = b
-
+    img = np.asarray(img_rgb, dtype=np.float32)
     # Blend amount tuned for realism v1; adjust as needed
-    out = img * (1.0 - mask * 0.35) + solid * (mask * 0.35)
-    out = np.clip(out, 0, 255).astype(np.uint8)
-    return Image.fromarray(out)
+    weight = (np.asarray(body_mask) > 127)[..., None] * np.float32(0.35)
+
+    # img * (1 - w) + solid * w, as img += (solid - img) * w without full-frame
+    # solid/out temporaries
+    delta = np.array([r, g, b], dtype=np.float32) - img
+    delta *= weight
+    img += delta
+    del delta
+    np.clip(img, 0, 255, out=img)
+    return Image.fromarray(img.astype(np.uint8))
 
 def paste_rgba(base_rgb: Image.Image, overlay_rgba: Image.Image, xy: Tuple[int, int]) -> Image.Image:
     base = base_rgb.convert("RGBA")
@@ -181,6 +782,48 @@ def scale_rgba(img_rgba: Image.Image, scale: float) -> Image.Image:
     nw, nh = max(1, int(w * scale)), max(1, int(h * scale))
     return img_rgba.resize((nw, nh), Image.LANCZOS)
 
+def resize_premultiplied(sprite: Image.Image, size: Tuple[int, int]) -> Image.Image:
+    """
+    Resizes a premultiplied sprite (stored as mode "RGBA") on the raw array.
+    Pillow's RGBA resize would premultiply it a second time; area/linear
+    weights also keep every colour channel <= alpha, so pastes can't overflow.
+    """
+    if sprite.size == size:
+        return sprite
+    interp = cv2.INTER_AREA if size[0] < sprite.size[0] else cv2.INTER_LINEAR
+    return Image.fromarray(cv2.resize(np.asarray(sprite), size, interpolation=interp), mode="RGBA")
+
+def trim_premultiplied(cutout_rgba: Image.Image) -> Optional[Tuple[Image.Image, Tuple[int, int, int, int]]]:
+    """
+    Crops an RGBA cutout to its alpha bbox and premultiplies RGB by alpha.
+    Returns (sprite, (x0, y0, x1, y1)) in cutout pixel coords, or None if fully transparent.
+    """
+    bbox = cutout_rgba.getchannel("A").getbbox()
+    if not bbox:
+        return None
+    arr = np.asarray(cutout_rgba.crop(bbox)).astype(np.uint16)
+    a = arr[..., 3:4]
+    arr[..., :3] = (arr[..., :3] * a + 127) // 255
+    return Image.fromarray(arr.astype(np.uint8), mode="RGBA"), bbox
+
+def paste_premultiplied(base_rgb: Image.Image, sprite: np.ndarray, xy: Tuple[int, int]) -> Image.Image:
+    """
+    Composites a premultiplied RGBA array onto base_rgb in place, touching only
+    the pixels under the sprite (no full-frame RGBA round trip).
+    """
+    x, y = xy
+    bw, bh = base_rgb.size
+    sh, sw = sprite.shape[:2]
+    x0, y0 = max(0, x), max(0, y)
+    x1, y1 = min(bw, x + sw), min(bh, y + sh)
+    if x0 >= x1 or y0 >= y1:
+        return base_rgb
+    src = sprite[y0 - y:y1 - y, x0 - x:x1 - x].astype(np.uint16)
+    dst = np.asarray(base_rgb.crop((x0, y0, x1, y1))).astype(np.uint16)
+    out = src[..., :3] + (dst * (255 - src[..., 3:4]) + 127) // 255
+    base_rgb.paste(Image.fromarray(out.astype(np.uint8)), (x0, y0))
+    return base_rgb
+
 # ---------------------------
 # Firestore helpers
 # ---------------------------
@@ -200,12 +843,547 @@ def get_car_angles(car_id: str) -> List[Dict[str, Any]]:
     items.sort(key=lambda x: x.get("angleIndex", 0))
     return items
 
+# ---------------------------
+# Priority lanes
+# ---------------------------
+def request_lane(priority: Optional[str], default: str) -> str:
+    if not priority:
+        return default
+    lane = priority.lower()
+    if lane not in LANE_WEIGHTS:
+        raise HTTPException(status_code=400, detail=f"Unknown priority {priority!r}; expected one of {sorted(LANE_WEIGHTS)}")
+    return lane
+
+class LaneQueue:
+    """
+    Waiters FIFO within each lane; across lanes that have waiters, head()
+    follows smooth weighted round-robin over LANE_WEIGHTS, so with 4:1 an
+    interactive waiter goes first four times out of five and bulk never starves.
+    Not thread-safe: callers hold their own lock.
+    """
+    def __init__(self, weights: Dict[str, int]):
+        self.weights = weights
+        self.queues: Dict[str, deque] = {lane: deque() for lane in weights}
+        self.credit: Dict[str, int] = {lane: 0 for lane in weights}
+
+    def __len__(self) -> int:
+        return sum(len(q) for q in self.queues.values())
+
+    def push(self, lane: str, item: object):
+        self.queues[lane].append(item)
+
+    def _next_lane(self) -> Optional[str]:
+        lanes = [lane for lane, q in self.queues.items() if q]
+        if not lanes:
+            return None
+        return max(lanes, key=lambda lane: (self.credit[lane] + self.weights[lane], self.weights[lane]))
+
+    def head(self) -> Optional[object]:
+        lane = self._next_lane()
+        return self.queues[lane][0] if lane else None
+
+    def pop(self, item: object):
+        """Remove the head item, charging its lane for the turn."""
+        lanes = [lane for lane, q in self.queues.items() if q]
+        chosen = self._next_lane()
+        for lane in lanes:
+            self.credit[lane] += self.weights[lane]
+        self.credit[chosen] -= sum(self.weights[lane] for lane in lanes)
+        self.queues[chosen].remove(item)
+
+    def remove(self, item: object):
+        """Drop a waiter that gave up (no credit change)."""
+        for q in self.queues.values():
+            if item in q:
+                q.remove(item)
+                return
+
+    def waiting(self) -> Dict[str, int]:
+        return {lane: len(q) for lane, q in self.queues.items()}
+
+class WaitStats:
+    """Queue wait per lane: count, mean, p95 (over the last 1000) and max, in ms."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._recent: Dict[str, deque] = {}
+        self._count: Dict[str, int] = {}
+        self._max: Dict[str, float] = {}
+
+    def record(self, lane: str, ms: float):
+        with self._lock:
+            self._recent.setdefault(lane, deque(maxlen=1000)).append(ms)
+            self._count[lane] = self._count.get(lane, 0) + 1
+            self._max[lane] = max(self._max.get(lane, 0.0), ms)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            out = {}
+            for lane, recent in self._recent.items():
+                waits = np.fromiter(recent, dtype=np.float64)
+                out[lane] = {
+                    "count": self._count[lane],
+                    "meanMs": round(float(waits.mean()), 1),
+                    "p95Ms": round(float(np.percentile(waits, 95)), 1),
+                    "maxMs": round(self._max[lane], 1),
+                }
+            return out
+
+class LaneScheduler:
+    """
+    WORK_SLOTS compute turns shared by all jobs. Jobs take one turn per image
+    (angle, frame, part), so a long bulk segmentation gives way between
+    angles whenever interactive work is queued.
+    """
+    def __init__(self, slots: int, weights: Dict[str, int]):
+        self.slots = max(1, slots)
+        self.running: Dict[str, int] = {lane: 0 for lane in weights}
+        self.waits = WaitStats()
+        self._queue = LaneQueue(weights)
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def turn(self, lane: str):
+        ticket = object()
+        t = time.perf_counter()
+        with self._cond:
+            self._queue.push(lane, ticket)
+            self._cond.wait_for(lambda: self._queue.head() is ticket
+                                and sum(self.running.values()) < self.slots)
+            self._queue.pop(ticket)
+            self.running[lane] += 1
+            self._cond.notify_all()
+        self.waits.record(lane, (time.perf_counter() - t) * 1000)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.running[lane] -= 1
+                self._cond.notify_all()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "slots": self.slots,
+                "weights": dict(self._queue.weights),
+                "running": dict(self.running),
+                "waiting": self._queue.waiting(),
+                "queueWait": self.waits.snapshot(),
+            }
+
+SCHEDULER = LaneScheduler(WORK_SLOTS, LANE_WEIGHTS)
+
+# ---------------------------
+# In-flight coalescing + cancellation
+# ---------------------------
+class JobCancelled(Exception):
+    pass
+
+class InFlight:
+    """
+    One execution shared by every job that asked for the same work.
+    job_ids[0] is the job that actually runs; the rest wait for its result.
+    lane is the highest-priority lane of any attached job.
+    """
+    def __init__(self, job_id: str, lane: str = LANE_BULK):
+        self.job_ids: List[str] = [job_id]
+        self.lane = lane
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+    def update(self, data: Dict[str, Any]):
+        for jid in list(self.job_ids):
+            update_job(jid, data)
+
+    def check_cancelled(self):
+        """
+        Raise JobCancelled once every attached job has cancelRequested (or
+        status "cancelled") on its jobs doc. Called between angles.
+        """
+        for jid in list(self.job_ids):
+            d = job_ref(jid).get().to_dict() or {}
+            if not (d.get("cancelRequested") or d.get("status") == "cancelled"):
+                return
+        raise JobCancelled()
+
+_INFLIGHT: Dict[Tuple[str, str, str], InFlight] = {}
+_INFLIGHT_LOCK = threading.Lock()
+
+def fingerprint(*parts: Any) -> str:
+    raw = json.dumps(parts, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()[:16]
+
+def run_coalesced(endpoint: str, target_id: str, fp: str, job_id: str, fn, lane: str = LANE_BULK):
+    """
+    Runs fn(entry) once per (endpoint, target, input fingerprint). Jobs that
+    arrive while an identical one is running attach to it and share its result.
+    An interactive job attaching to a bulk run raises the run's lane from its
+    next image on.
+    """
+    key = (endpoint, target_id, fp)
+    with _INFLIGHT_LOCK:
+        entry = _INFLIGHT.get(key)
+        leader = entry is None
+        if leader:
+            entry = _INFLIGHT[key] = InFlight(job_id, lane)
+        else:
+            entry.job_ids.append(job_id)
+            if LANE_WEIGHTS[lane] > LANE_WEIGHTS[entry.lane]:
+                entry.lane = lane
+
+    if not leader:
+        update_job(job_id, {"coalescedWith": entry.job_ids[0]})
+        entry.done.wait()
+        if entry.error is not None:
+            raise entry.error
+        update_job(job_id, {"status": "done", "progress": 100})
+        return entry.result
+
+    try:
+        entry.result = fn(entry)
+        return entry.result
+    except JobCancelled:
+        entry.update({"status": "cancelled"})
+        entry.error = HTTPException(status_code=409, detail="Job cancelled")
+        raise entry.error
+    except BaseException as e:
+        entry.error = e
+        raise
+    finally:
+        with _INFLIGHT_LOCK:
+            _INFLIGHT.pop(key, None)
+        entry.done.set()
+
+# ---------------------------
+# Per-angle checkpoints
+# ---------------------------
+class Checkpoint:
+    """
+    Completed per-angle results of a job, stored as one doc per group (the
+    car for segment_cars, "angles" otherwise) in jobs/{jobId}/checkpoints/{group}
+    as {fp, done: {key: result}}, so bulk jobs stay under the document size
+    limit. A retried job (same jobId, e.g. after the node was preempted) with
+    the same input fingerprint reuses every result whose output object still
+    exists and only redoes the rest.
+    """
+    GROUP = "angles"
+
+    def __init__(self, entry: InFlight, fp: str):
+        self.entry = entry
+        self.fp = fp
+        self.done: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for snap in self._docs(entry.job_ids[0]).stream():
+            saved = snap.to_dict() or {}
+            if saved.get("fp") == fp:
+                self.done[snap.id] = dict(saved.get("done") or {})
+            else:
+                # Inputs changed since the last attempt: none of it applies
+                self._docs(entry.job_ids[0]).document(snap.id).delete()
+        self.restored = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _docs(job_id: str):
+        return job_ref(job_id).collection("checkpoints")
+
+    def restore(self, key: str, url_field: str, group: str = GROUP) -> Optional[Dict[str, Any]]:
+        """The saved result for key if its output (result[url_field]) is still in storage."""
+        result = self.done.get(group, {}).get(key)
+        if not result:
+            return None
+        if not result.get(url_field) or not gcs_exists(result[url_field]):
+            with self._lock:
+                self.done[group].pop(key, None)  # redo it and record it again
+            return None
+        with self._lock:
+            self.restored += 1
+        return result
+
+    def recorded(self, key: str, group: str = GROUP) -> bool:
+        return key in self.done.get(group, {})
+
+    def record(self, key: str, result: Dict[str, Any], group: str = GROUP):
+        """Saves a finished angle for every attached job."""
+        with self._lock:
+            self.done.setdefault(group, {})[key] = result
+        for jid in list(self.entry.job_ids):
+            self._docs(jid).document(group).set({"fp": self.fp, "done": {key: result}}, merge=True)
+
+# ---------------------------
+# Memory admission control
+# ---------------------------
+# Peak bytes per source pixel while one image is in flight (all copies that
+# are alive together, measured on the code paths above):
+#   segment: RGB decode 3, rembg's RGBA input/cutout/composite 12, mask 1,
+#            alpha_to_mask arrays 6; coarse mode adds the upsampled alpha,
+#            morphology masks and guided-filter float32 planes
+#   sprite:  trim_premultiplied uint16 RGBA 8 + uint8 4 + PNG encode 4
+#   frame:   RGB decode 3 + car mask 1 + JPEG encode 3; apply_paint adds its
+#            float32 img/delta planes + weight, paste_rgba an RGBA round trip
+SEGMENT_BYTES_PER_PX = 24
+SEGMENT_COARSE_EXTRA_PER_PX = 40
+SPRITE_BYTES_PER_PX = 16
+FRAME_BYTES_PER_PX = 7
+PAINT_BYTES_PER_PX = 32
+PASTE_BYTES_PER_PX = 8
+DEFAULT_IMAGE_PIXELS = 4000 * 3000  # when the header can't be read
+PROBE_BYTES = 64 * 1024
+
+def memory_limit_bytes() -> int:
+    """Container memory limit (cgroup v2, then v1), else physical memory."""
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(path) as f:
+                raw = f.read().strip()
+        except OSError:
+            continue
+        if raw.isdigit() and int(raw) < (1 << 60):
+            return int(raw)
+    return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+
+class Reservation:
+    """
+    Bytes held in a MemoryBudget by one job: fixed (shared, e.g. part overlays)
+    plus slots * per_slot (one per image processed concurrently). Slots are
+    released one by one as the job winds down.
+    """
+    def __init__(self, budget: "MemoryBudget", label: str, fixed: int, per_slot: int, slots: int):
+        self.budget = budget
+        self.label = label
+        self.fixed = fixed
+        self.per_slot = per_slot
+        self.slots = slots
+        self.wait_ms = 0.0
+
+    @property
+    def nbytes(self) -> int:
+        return self.fixed + self.slots * self.per_slot
+
+    def release_slot(self):
+        if self.slots > 0:
+            self.slots -= 1
+            self.budget._release(self, self.per_slot)
+
+    def release(self):
+        nbytes = self.nbytes
+        self.fixed = 0
+        self.slots = 0
+        if nbytes:
+            self.budget._release(self, nbytes)
+
+    def __enter__(self) -> "Reservation":
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+class MemoryBudget:
+    """
+    Admits jobs while their estimated peak fits, in arrival order within a
+    lane and by LANE_WEIGHTS across lanes. A job gets
+    between 1 and max_slots concurrent images, as many as currently fit, so a
+    busy worker degrades to lower per-job parallelism instead of OOMing. A job
+    larger than the whole budget runs alone once everything else has drained.
+    Each job holds a single reservation taken at once, so waiting can't deadlock.
+    """
+    def __init__(self, total: int):
+        self.total = total
+        self.reserved = 0
+        self.peak = 0
+        self.active: Dict[int, Reservation] = {}
+        self.timeouts = 0
+        self.waits = WaitStats()
+        self._queue = LaneQueue(LANE_WEIGHTS)
+        self._cond = threading.Condition()
+
+    def admit(self, label: str, per_slot: int, max_slots: int = 1, fixed: int = 0,
+              timeout: Optional[float] = None, lane: str = LANE_BULK) -> Reservation:
+        ticket = object()
+        t = time.perf_counter()
+        with self._cond:
+            self._queue.push(lane, ticket)
+
+            def fits() -> bool:
+                if self._queue.head() is not ticket:
+                    return False
+                return not self.active or self.reserved + fixed + per_slot <= self.total
+
+            if not self._cond.wait_for(fits, timeout=timeout):
+                self._queue.remove(ticket)
+                self.timeouts += 1
+                self._cond.notify_all()
+                raise HTTPException(status_code=503, detail="Worker memory budget exhausted; retry later")
+            self._queue.pop(ticket)
+            free = self.total - self.reserved - fixed
+            slots = max(1, min(max_slots, free // per_slot if per_slot else max_slots))
+            res = Reservation(self, label, fixed, per_slot, slots)
+            self.reserved += res.nbytes
+            self.peak = max(self.peak, self.reserved)
+            self.active[id(res)] = res
+            self._cond.notify_all()
+
+        res.wait_ms = (time.perf_counter() - t) * 1000
+        self.waits.record(lane, res.wait_ms)
+        return res
+
+    def _release(self, res: Reservation, nbytes: int):
+        with self._cond:
+            self.reserved -= nbytes
+            if res.nbytes == 0:
+                self.active.pop(id(res), None)
+            self._cond.notify_all()
+
+    def snapshot(self) -> Dict[str, Any]:
+        mb = 1024 * 1024
+        with self._cond:
+            return {
+                "budgetMb": round(self.total / mb, 1),
+                "reservedMb": round(self.reserved / mb, 1),
+                "peakMb": round(self.peak / mb, 1),
+                "waiting": self._queue.waiting(),
+                "jobs": [{"label": r.label, "mb": round(r.nbytes / mb, 1), "slots": r.slots}
+                         for r in self.active.values()],
+            }
+
+MEMORY = MemoryBudget(int(MEMORY_BUDGET_MB * 1024 * 1024) if MEMORY_BUDGET_MB > 0
+                      else int(memory_limit_bytes() * MEMORY_BUDGET_FRACTION))
+
+def admit_job(entry: InFlight, label: str, per_slot: int, max_slots: int = 1, fixed: int = 0) -> Reservation:
+    """MEMORY.admit for a coalesced job; the reservation is recorded on its job docs."""
+    res = MEMORY.admit(label, per_slot, max_slots, fixed, timeout=MEMORY_ADMIT_TIMEOUT_S, lane=entry.lane)
+    entry.update({"memory": {
+        "reservedMb": round(res.nbytes / (1024 * 1024), 1),
+        "slots": res.slots,
+        "waitMs": round(res.wait_ms, 1),
+    }})
+    return res
+
+def probe_image_size(url: Optional[str]) -> Optional[Tuple[int, int]]:
+    """(w, h) from the first PROBE_BYTES of an image, without downloading or decoding it all."""
+    try:
+        if str(url).startswith("gs://"):
+            _, _, bucket_and_path = str(url).partition("gs://")
+            _, _, path = bucket_and_path.partition("/")
+            head = BU.blob(path).download_as_bytes(start=0, end=PROBE_BYTES - 1)
+        elif str(url).startswith("http"):
+            head = b""
+            with requests.get(url, headers={"Range": f"bytes=0-{PROBE_BYTES - 1}"}, stream=True, timeout=10) as resp:
+                resp.raise_for_status()
+                for chunk in resp.iter_content(16384):
+                    head += chunk
+                    if len(head) >= PROBE_BYTES:
+                        break
+        else:
+            return None
+        return Image.open(io.BytesIO(head)).size
+    except Exception:
+        return None
+
+def max_image_pixels(urls: List[Optional[str]]) -> int:
+    sizes = [probe_image_size(u) for u in urls if u]
+    return max([w * h for w, h in sizes if w and h] or [DEFAULT_IMAGE_PIXELS])
+
+def segment_bytes(pixels: int) -> int:
+    bpp = SEGMENT_BYTES_PER_PX + (SEGMENT_COARSE_EXTRA_PER_PX if SEGMENT_MODE == "coarse" else 0)
+    return pixels * bpp
+
+def frame_bytes(pixels: int, applied: List[Dict[str, Any]]) -> int:
+    cats = {(ap.get("category") or "").lower() for ap in applied}
+    bpp = FRAME_BYTES_PER_PX
+    if cats & {"paint", "wrap"}:
+        bpp += PAINT_BYTES_PER_PX
+    if cats - {"paint", "wrap", "wheels"}:
+        bpp += PASTE_BYTES_PER_PX
+    return pixels * bpp
+
+def overlay_bytes(applied: List[Dict[str, Any]], part_cache: Dict[str, Dict[str, Any]]) -> int:
+    """Decoded mip + scaled overlay per applied part (load_part_overlays keeps both for the build)."""
+    total = 0
+    for ap in applied:
+        cat = (ap.get("category") or "").lower()
+        pid = ap.get("partId")
+        if cat in ("paint", "wrap") or pid not in part_cache:
+            continue
+        assets = part_cache[pid].get("assets") or {}
+        scale = float((ap.get("params") or {}).get("scale", 0.35 if cat in ("spoiler",) else 0.30))
+        mips = (assets.get("sprite") or {}).get("mips") or []
+        if mips:
+            mip = next((m for m in sorted(mips, key=lambda m: m["scale"]) if m["scale"] >= scale), mips[0])
+            w, h = mip.get("size") or (0, 0)
+            decoded = w * h
+        else:
+            size = probe_image_size(assets.get("pngCutoutUrl"))
+            decoded = size[0] * size[1] if size else DEFAULT_IMAGE_PIXELS
+        total += 4 * decoded + 4 * int(decoded * scale * scale)
+    return total
+
 # ---------------------------
 # Endpoints
 # ---------------------------
+def load_deferred():
+    for lz in (cv2, rembg, ort, firebase_admin, firestore, storage, DB, ST, BU):
+        if lz is not None:
+            lz.load()
+
+def warm_up():
+    """
+    Background warm-up for WORKER_STARTUP=warm: deferred imports, clients and
+    the segmentation model. A failure is only logged; the first request that
+    needs the failed piece raises it again.
+    """
+    global WARMUP_ERROR
+    try:
+        load_deferred()
+        rembg_session()
+    except Exception as e:
+        WARMUP_ERROR = str(e)
+        print(f"Warm-up failed: {e}")
+    finally:
+        WARMUP_DONE.set()
+
+if STARTUP_MODE == "eager":
+    load_deferred()
+    WARMUP_DONE.set()
+elif STARTUP_MODE == "lazy":
+    WARMUP_DONE.set()  # nothing to warm: every piece loads on the first request that needs it
+
+@app.on_event("startup")
+def start_warm_up():
+    if STARTUP_MODE == "warm":
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    if INGEST_LISTENER:
+        start_ingest_listener()
+
+@app.on_event("shutdown")
+def stop_ingest_listener():
+    if _INGEST_WATCH is not None:
+        _INGEST_WATCH.unsubscribe()
+
+# health/metrics run on the event loop, not the sync-endpoint threadpool that
+# jobs waiting for memory or a scheduler turn can fill; they only take short locks.
 @app.get("/health")
-def health():
-    return {"ok": True, "bucket": BUCKET}
+async def health():
+    return {
+        "ok": True,
+        "bucket": BUCKET,
+        "startup": STARTUP_MODE,
+        "segmentMode": SEGMENT_MODE,
+        "segmentModel": SEGMENT_MODEL,
+        "imageCodec": CODEC.name,
+        "ready": WARMUP_DONE.is_set() and WARMUP_ERROR is None,
+        "warmupError": WARMUP_ERROR,
+        "importMs": dict(IMPORT_TIMINGS),
+        "memory": MEMORY.snapshot(),
+    }
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "memory": {**MEMORY.snapshot(), "timeouts": MEMORY.timeouts, "queueWait": MEMORY.waits.snapshot()},
+        "scheduler": SCHEDULER.snapshot(),
+        "bufferPool": POOL.snapshot(),
+        "ingest": ingest_snapshot(),
+    }
 
 @app.post("/jobs/segment_car")
 def segment_car(inp: SegmentCarIn):
@@ -218,59 +1396,358 @@ def segment_car(inp: SegmentCarIn):
     - store mask in Storage
     - write urls + anchors into Firestore
     """
-    update_job(inp.jobId, {"status": "running", "progress": 10})
+    lane = request_lane(inp.priority, LANE_BULK)
+    update_job(inp.jobId, {"status": "running", "progress": 10, "lane": lane})
 
     angles = get_car_angles(inp.carId)
     if len(angles) < 10:
         raise HTTPException(status_code=400, detail=f"Expected 10 angles, found {len(angles)}")
 
+    fp = fingerprint([(a.get("angleIndex"), a.get("imageUrl") or a.get("httpUrl")) for a in angles])
+    return run_coalesced("segment_car", inp.carId, fp, inp.jobId,
+                         lambda entry: _segment_car(entry, inp.carId, angles, fp), lane)
+
+def _segment_car(entry: InFlight, car_id: str, angles: List[Dict[str, Any]], fp: str):
+    checkpoint = Checkpoint(entry, fp)
+    pixels = max_image_pixels([angles[0].get("imageUrl") or angles[0].get("httpUrl")])
     out_angles = []
-    for idx, ang in enumerate(angles):
-        raw_url = ang.get("imageUrl") or ang.get("httpUrl")
-        if not raw_url:
-            raise HTTPException(status_code=400, detail=f"Angle {ang.get('angleIndex')} missing imageUrl/httpUrl")
-
-        if str(raw_url).startswith("gs://"):
-            # gs://bucket/path
-            _, _, bucket_and_path = raw_url.partition("gs://")
-            bucket, _, path = bucket_and_path.partition("/")
-            raw_bytes = gcs_download(path)
-        elif str(raw_url).startswith("http"):
-            # Download from public URL (demo mode)
-            print(f"Downloading demo image: {raw_url}")
-            resp = requests.get(raw_url)
-            resp.raise_for_status()
-            raw_bytes = resp.content
-        else:
-             raise HTTPException(status_code=400, detail=f"Invalid URL schema: {raw_url}")
+    with admit_job(entry, f"segment_car:{car_id}", segment_bytes(pixels)):
+        for idx, ang in enumerate(angles):
+            key = str(ang.get("angleIndex", idx))
+            result = checkpoint.restore(key, "carMaskUrl")
+            update: Dict[str, Any] = {"progress": int(10 + (idx + 1) * 70 / len(angles))}
+            if result is None:
+                entry.check_cancelled()
+                result = segment_angle_cached(car_id, ang, entry.lane)
+                count_ingest("jobHits" if result["cached"] else "jobMisses")
+                checkpoint.record(key, result)
+            out_angles.append(result)
+            entry.update(update)
+
+    entry.update({"status": "done", "progress": 100, "resumedAngles": checkpoint.restored})
+    return {"carId": car_id, "angles": out_angles}
+
+def source_fingerprint(ang: Dict[str, Any]) -> str:
+    """
+    Identifies what a stored mask was computed from: the image (url plus GCS
+    generation, so a re-upload to the same path counts as new) and the
+    segmentation settings. Stored on the angle doc as segmentedFrom.
+    """
+    raw_url = ang.get("imageUrl") or ang.get("httpUrl")
+    generation = None
+    if BU and str(raw_url).startswith(f"gs://{BUCKET}/"):
+        blob = BU.get_blob(str(raw_url)[len(f"gs://{BUCKET}/"):])
+        generation = blob.generation if blob else None
+    return fingerprint(raw_url, generation, SEGMENT_MODE, SEGMENT_MODEL)
+
+_ANGLE_LOCKS: Dict[Tuple[str, str], List[Any]] = {}  # (carId, angleId) -> [lock, holders + waiters]
+_ANGLE_LOCKS_LOCK = threading.Lock()
+
+@contextmanager
+def angle_lock(car_id: str, angle_id: str):
+    """Per-angle lock; its entry is dropped once nobody holds or waits on it."""
+    key = (car_id, angle_id)
+    with _ANGLE_LOCKS_LOCK:
+        entry = _ANGLE_LOCKS.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _ANGLE_LOCKS_LOCK:
+            entry[1] -= 1
+            if not entry[1]:
+                del _ANGLE_LOCKS[key]
+
+def _angle_cache_lookup(car_id: str, ang: Dict[str, Any]) -> Tuple[Dict[str, Any], str, Optional[Dict[str, Any]]]:
+    """(current angle doc, source fingerprint, cached result or None)"""
+    current = DB.collection("cars").document(car_id).collection("angles").document(ang["id"]).get().to_dict() or {}
+    ang = {**ang, **current}
+    src = source_fingerprint(ang)
+    if ang.get("segmentedFrom") == src and ang.get("carMaskUrl") and gcs_exists(ang["carMaskUrl"]):
+        return ang, src, {
+            "angleIndex": ang.get("angleIndex"),
+            "carMaskUrl": ang["carMaskUrl"],
+            "wheels": (ang.get("keypoints") or {}).get("wheels") or [],
+            "cached": True,
+        }
+    return ang, src, None
+
+def segment_angle_cached(car_id: str, ang: Dict[str, Any], lane: str = LANE_BULK,
+                         admit: Optional[Callable[[], Any]] = None) -> Dict[str, Any]:
+    """
+    segment_angle unless the angle doc already holds a mask for the same
+    source fingerprint (e.g. from ingest). One run per angle at a time: a
+    job that arrives while ingest is segmenting the angle waits for it and
+    then reuses its mask. The result's "cached" says which happened.
+    admit() (a memory reservation context) is only entered on a miss, and
+    before the angle lock: jobs hold their reservation when they get here,
+    so taking it under the lock could deadlock against them.
+    """
+    if admit is not None:
+        with angle_lock(car_id, ang["id"]):
+            _, _, cached = _angle_cache_lookup(car_id, ang)
+        if cached is not None:
+            return cached
+    with admit() if admit else nullcontext(), angle_lock(car_id, ang["id"]):
+        ang, src, cached = _angle_cache_lookup(car_id, ang)  # re-check: a job may have just run it
+        if cached is not None:
+            return cached
+        return {**segment_angle(car_id, ang, lane, src), "cached": False}
+
+def segment_angle(car_id: str, ang: Dict[str, Any], lane: str = LANE_BULK,
+                  source_fp: Optional[str] = None) -> Dict[str, Any]:
+    """
+    download -> cutout -> mask -> wheel anchors -> upload mask -> write angle doc
+    The compute steps run in one SCHEDULER turn of lane; I/O runs outside it.
+    """
+    raw_url = ang.get("imageUrl") or ang.get("httpUrl")
+    if not raw_url:
+        raise HTTPException(status_code=400, detail=f"Angle {ang.get('angleIndex')} missing imageUrl/httpUrl")
+
+    if str(raw_url).startswith("gs://"):
+        # gs://bucket/path
+        _, _, bucket_and_path = raw_url.partition("gs://")
+        bucket, _, path = bucket_and_path.partition("/")
+        raw = gcs_download_into(path)
+    elif str(raw_url).startswith("http"):
+        # Download from public URL (demo mode)
+        print(f"Downloading demo image: {raw_url}")
+        raw = http_download_into(raw_url)
+    else:
+         raise HTTPException(status_code=400, detail=f"Invalid URL schema: {raw_url}")
 
-        img = image_from_bytes(raw_bytes)
+    with SCHEDULER.turn(lane):
+        with raw:
+            img = image_from_buffer(raw)
 
         cutout = rgba_cutout(img)
         mask = alpha_to_mask(cutout)
 
         wheels = estimate_wheel_centers(mask)
-        mask_path = f"users/{ang.get('ownerId','demo')}/cars/{inp.carId}/angles/{ang.get('angleIndex')}/mask.png"
-        mask_gs = gcs_upload(mask_path, png_bytes_from_pil(mask), "image/png")
-
-        # Write back to carAngles doc
-        angle_doc = DB.collection("cars").document(inp.carId).collection("angles").document(ang["id"])
-        angle_doc.set({
-            "carMaskUrl": mask_gs,
-            "keypoints": {"wheels": wheels},
-            "updatedAt": firestore.SERVER_TIMESTAMP,
-        }, merge=True)
-
-        out_angles.append({
-            "angleIndex": ang.get("angleIndex"),
-            "carMaskUrl": mask_gs,
-            "wheels": wheels
-        })
+        mask_png = png_buffer(mask, "mask")
+    mask_path = f"users/{ang.get('ownerId','demo')}/cars/{car_id}/angles/{ang.get('angleIndex')}/mask.png"
+    mask_gs = gcs_upload_buffer(mask_path, mask_png, "image/png")
+
+    # Write back to carAngles doc
+    angle_doc = DB.collection("cars").document(car_id).collection("angles").document(ang["id"])
+    angle_doc.set({
+        "carMaskUrl": mask_gs,
+        "keypoints": {"wheels": wheels},
+        "segmentedFrom": source_fp or source_fingerprint(ang),
+        "updatedAt": firestore.SERVER_TIMESTAMP,
+    }, merge=True)
+
+    return {
+        "angleIndex": ang.get("angleIndex"),
+        "carMaskUrl": mask_gs,
+        "wheels": wheels
+    }
+
+@app.post("/jobs/segment_cars")
+def segment_cars(inp: SegmentCarsIn):
+    """
+    Batch version of segment_car for bulk imports.
+    Every angle of every car goes through one shared download -> segment -> upload
+    pool; model runs are bounded by SEGMENT_MODEL_SLOTS so I/O for later angles
+    overlaps with inference for earlier ones. Per-car angle writes are the same
+    as segment_car. Progress per car is written to jobs/{jobId}.cars.{carId}.
+    A car with missing angles or a failing angle is marked "error" without
+    stopping the rest of the batch. Returns a status summary per car; the
+    masks themselves are on the angle docs.
+    """
+    lane = request_lane(inp.priority, LANE_BULK)
+    update_job(inp.jobId, {"status": "running", "progress": 5, "lane": lane})
+
+    car_ids = list(dict.fromkeys(inp.carIds))
+    angles_by_car: Dict[str, List[Dict[str, Any]]] = {}
+    cars: Dict[str, Dict[str, Any]] = {}
+    for car_id in car_ids:
+        angles = get_car_angles(car_id)
+        if len(angles) < 10:
+            cars[car_id] = {"status": "error", "done": 0, "total": len(angles),
+                            "error": f"Expected 10 angles, found {len(angles)}"}
+            continue
+        angles_by_car[car_id] = angles
+        cars[car_id] = {"status": "queued", "done": 0, "total": len(angles)}
+    update_job(inp.jobId, {"cars": cars})
+
+    fp = fingerprint({cid: [a.get("imageUrl") or a.get("httpUrl") for a in angs]
+                      for cid, angs in angles_by_car.items()})
+    return run_coalesced("segment_cars", ",".join(sorted(car_ids)), fp, inp.jobId,
+                         lambda entry: _segment_cars(entry, angles_by_car, cars, fp), lane)
+
+def _segment_cars(entry: InFlight, angles_by_car: Dict[str, List[Dict[str, Any]]],
+                  cars: Dict[str, Dict[str, Any]], fp: str):
+    checkpoint = Checkpoint(entry, fp)
+    total = sum(len(angs) for angs in angles_by_car.values())
+    finished = 0
+    cancelled = threading.Event()
+
+    # One probe per car (cameras differ between cars, not between angles)
+    pixels = max_image_pixels([angs[0].get("imageUrl") or angs[0].get("httpUrl")
+                               for angs in angles_by_car.values()])
+    res = admit_job(entry, f"segment_cars:{len(angles_by_car)}", segment_bytes(pixels),
+                    max_slots=SEGMENT_IO_WORKERS)
+
+    def work(car_id: str, i: int, ang: Dict[str, Any]):
+        if cancelled.is_set() or cars[car_id]["status"] == "error":
+            return None
+        done = checkpoint.restore(str(ang.get("angleIndex", i)), "carMaskUrl", group=car_id)
+        if done is not None:
+            return done
+        result = segment_angle_cached(car_id, ang, entry.lane)
+        count_ingest("jobHits" if result["cached"] else "jobMisses")
+        return result
+
+    with res, ThreadPoolExecutor(max_workers=max(1, res.slots)) as pool:
+        futures = {}
+        for car_id, angs in angles_by_car.items():
+            for i, ang in enumerate(angs):
+                futures[pool.submit(work, car_id, i, ang)] = (car_id, i)
+
+        for fut in as_completed(futures):
+            car_id, i = futures[fut]
+            car = cars[car_id]
+            finished += 1
+            if total - finished < res.slots:
+                res.release_slot()  # no more angles for this worker thread
+            try:
+                res_angle = fut.result()
+            except CancelledError:
+                # never started: the job was cancelled while it was queued
+                if car["status"] not in ("error", "done"):
+                    car["status"] = "cancelled"
+                res_angle = None
+            except Exception as e:
+                detail = e.detail if isinstance(e, HTTPException) else str(e)
+                car.update({"status": "error", "error": str(detail)})
+                res_angle = None
+            update: Dict[str, Any] = {
+                "cars": {car_id: car},
+                "progress": int(5 + finished * 90 / max(1, total)),
+            }
+            if res_angle is not None:
+                if car["status"] not in ("error", "cancelled"):
+                    car["done"] += 1
+                    car["status"] = "done" if car["done"] == car["total"] else "running"
+                key = str(angles_by_car[car_id][i].get("angleIndex", i))
+                if not checkpoint.recorded(key, group=car_id):
+                    checkpoint.record(key, res_angle, group=car_id)
+            entry.update(update)
+            if not cancelled.is_set():
+                try:
+                    entry.check_cancelled()
+                except JobCancelled:
+                    cancelled.set()
+                    for f in futures:
+                        f.cancel()
+
+    if cancelled.is_set():
+        # cars whose remaining angles were skipped (cancelled futures or work() bailing out)
+        for car in cars.values():
+            if car["status"] not in ("done", "error"):
+                car["status"] = "cancelled"
+        entry.update({"cars": cars})
+        raise JobCancelled()
+
+    for car in cars.values():
+        if car["status"] not in ("done", "error"):
+            car.update({"status": "error", "error": f"Segmented {car['done']} of {car['total']} angles"})
+    entry.update({"status": "done", "progress": 100, "cars": cars, "resumedAngles": checkpoint.restored})
+    # Summaries only: the response lands in jobs/{jobId}.output, and every
+    # angle's result is already on its angle doc
+    return {
+        "cars": {
+            cid: {"carId": cid, "status": car["status"], "done": car["done"],
+                  "total": car["total"], "error": car.get("error")}
+            for cid, car in cars.items()
+        }
+    }
+
+# ---------------------------
+# Speculative ingest
+# ---------------------------
+# segmented/upToDate: ingest runs; jobHits/jobMisses: segment_car(s) angles found ready or not
+INGEST_STATS = {"queued": 0, "segmented": 0, "upToDate": 0, "errors": 0, "jobHits": 0, "jobMisses": 0}
+_INGEST_POOL = ThreadPoolExecutor(max_workers=max(1, INGEST_WORKERS), thread_name_prefix="ingest")
+_INGEST_PENDING: set = set()
+_INGEST_LOCK = threading.Lock()
+_INGEST_WATCH = None
+_INGEST_PRIMED = threading.Event()
+
+def count_ingest(stat: str):
+    with _INGEST_LOCK:
+        INGEST_STATS[stat] += 1
+
+def ingest_snapshot() -> Dict[str, Any]:
+    with _INGEST_LOCK:
+        return {**INGEST_STATS, "listener": _INGEST_WATCH is not None, "pending": len(_INGEST_PENDING)}
+
+def queue_ingest(car_id: str, angle_id: str) -> bool:
+    """Segment one angle in the background (bulk lane); False if it is already queued."""
+    key = (car_id, angle_id)
+    with _INGEST_LOCK:
+        if key in _INGEST_PENDING:
+            return False
+        _INGEST_PENDING.add(key)
+        INGEST_STATS["queued"] += 1
+    _INGEST_POOL.submit(_ingest_angle, car_id, angle_id)
+    return True
+
+def _ingest_angle(car_id: str, angle_id: str):
+    try:
+        snap = DB.collection("cars").document(car_id).collection("angles").document(angle_id).get()
+        ang = snap.to_dict() or {}
+        raw_url = ang.get("imageUrl") or ang.get("httpUrl")
+        if not raw_url:
+            return  # doc created before its image finished uploading; the next change re-queues it
+        ang["id"] = angle_id
+        # Probe and reserve only when the mask is stale: the listener also
+        # fires on the worker's own mask writes
+        admit = lambda: MEMORY.admit(f"ingest:{car_id}/{angle_id}", segment_bytes(max_image_pixels([raw_url])),
+                                     timeout=MEMORY_ADMIT_TIMEOUT_S, lane=LANE_BULK)
+        result = segment_angle_cached(car_id, ang, LANE_BULK, admit)
+        count_ingest("upToDate" if result["cached"] else "segmented")
+    except Exception as e:
+        count_ingest("errors")
+        print(f"Ingest failed for cars/{car_id}/angles/{angle_id}: {e}")
+    finally:
+        with _INGEST_LOCK:
+            _INGEST_PENDING.discard((car_id, angle_id))
+
+def _on_angles_snapshot(docs, changes, read_time):
+    """
+    Firestore listener callback. The first snapshot lists every existing
+    angle; only those without a mask are queued, so a restart doesn't
+    re-segment the whole catalog. Later ADDED/MODIFIED changes are queued
+    and _ingest_angle skips them when segmentedFrom is already current
+    (which includes the worker's own mask writes).
+    """
+    initial = not _INGEST_PRIMED.is_set()
+    for change in changes:
+        if change.type.name == "REMOVED":
+            continue
+        d = change.document.to_dict() or {}
+        if not (d.get("imageUrl") or d.get("httpUrl")):
+            continue
+        if initial and d.get("carMaskUrl"):
+            continue
+        queue_ingest(change.document.reference.parent.parent.id, change.document.id)
+    _INGEST_PRIMED.set()
 
-        update_job(inp.jobId, {"progress": int(10 + (idx + 1) * 70 / len(angles))})
+def start_ingest_listener():
+    global _INGEST_WATCH
+    _INGEST_WATCH = DB.collection_group("angles").on_snapshot(_on_angles_snapshot)
+    print("Ingest listener started on collection group 'angles'")
 
-    update_job(inp.jobId, {"status": "done", "progress": 100})
-    return {"carId": inp.carId, "angles": out_angles}
+@app.post("/ingest/angle")
+def ingest_angle(inp: IngestAngleIn):
+    """
+    Storage-notification stand-in: call when an angle image lands. Returns
+    immediately; the mask is written to the angle doc in the background.
+    """
+    return {"carId": inp.carId, "angleId": inp.angleId, "queued": queue_ingest(inp.carId, inp.angleId)}
 
 @app.post("/jobs/make_part_asset")
 def make_part_asset(inp: MakePartAssetIn):
@@ -281,7 +1758,8 @@ def make_part_asset(inp: MakePartAssetIn):
       parts/{partId}/assets/part.png
       parts/{partId}/assets/mask.png
     """
-    update_job(inp.jobId, {"status": "running", "progress": 10})
+    lane = request_lane(inp.priority, LANE_BULK)
+    update_job(inp.jobId, {"status": "running", "progress": 10, "lane": lane})
 
     part_ref = DB.collection("parts").document(inp.partId)
     part = part_ref.get().to_dict() or {}
@@ -289,30 +1767,83 @@ def make_part_asset(inp: MakePartAssetIn):
     if not img_url or not str(img_url).startswith("gs://"):
         raise HTTPException(status_code=400, detail="parts/{partId}.inputImageUrl (gs://) required")
 
-    _, _, bucket_and_path = str(img_url).partition("gs://")
-    _, _, path = bucket_and_path.partition("/")
-    raw_bytes = gcs_download(path)
-    img = image_from_bytes(raw_bytes)
-
-    cutout = rgba_cutout(img)  # RGBA
-    mask = alpha_to_mask(cutout)
+    return run_coalesced("make_part_asset", inp.partId, fingerprint(img_url), inp.jobId,
+                         lambda entry: _make_part_asset(entry, inp.partId, part_ref, part, str(img_url)), lane)
 
-    out_png_path = f"parts/{inp.partId}/assets/part.png"
-    out_mask_path = f"parts/{inp.partId}/assets/mask.png"
-    png_gs = gcs_upload(out_png_path, png_bytes_from_pil(cutout), "image/png")
-    mask_gs = gcs_upload(out_mask_path, png_bytes_from_pil(mask), "image/png")
+def _make_part_asset(entry: InFlight, part_id: str, part_ref, part: Dict[str, Any], img_url: str):
+    _, _, bucket_and_path = img_url.partition("gs://")
+    _, _, path = bucket_and_path.partition("/")
+    raw = gcs_download_into(path)
+    try:
+        w, h = Image.open(MemoryReader(raw.view)).size  # header only
+        res = admit_job(entry, f"make_part_asset:{part_id}", segment_bytes(w * h) + SPRITE_BYTES_PER_PX * w * h)
+    except Exception:
+        raw.release()  # unreadable header or no memory (503): don't leak the pooled buffer
+        raise
+
+    with res:
+        with SCHEDULER.turn(entry.lane):
+            with raw:
+                img = image_from_buffer(raw)
+
+            cutout = rgba_cutout(img)  # RGBA
+            mask = alpha_to_mask(cutout)
+            del img
+            cutout_png = png_buffer(cutout, "cutout")
+            mask_png = png_buffer(mask, "mask")
+
+        out_png_path = f"parts/{part_id}/assets/part.png"
+        out_mask_path = f"parts/{part_id}/assets/mask.png"
+        png_gs = gcs_upload_buffer(out_png_path, cutout_png, "image/png")
+        mask_gs = gcs_upload_buffer(out_mask_path, mask_png, "image/png")
+        assets = {"pngCutoutUrl": png_gs, "maskUrl": mask_gs}
+
+        sprite = make_part_sprite(part_id, cutout)
+        if sprite:
+            assets["sprite"] = sprite
 
     part_ref.set({
         "assets": {
             **(part.get("assets") or {}),
-            "pngCutoutUrl": png_gs,
-            "maskUrl": mask_gs
+            **assets,
         },
         "updatedAt": firestore.SERVER_TIMESTAMP
     }, merge=True)
 
-    update_job(inp.jobId, {"status": "done", "progress": 100})
-    return {"partId": inp.partId, "assets": {"pngCutoutUrl": png_gs, "maskUrl": mask_gs}}
+    entry.update({"status": "done", "progress": 100})
+    return {"partId": part_id, "assets": assets}
+
+def make_part_sprite(part_id: str, cutout: Image.Image) -> Optional[Dict[str, Any]]:
+    """
+    Trimmed, premultiplied sprite of the cutout plus pre-scaled mip levels.
+      parts/{partId}/assets/sprite.png, sprite_{scale}.png
+    Metadata (stored as assets.sprite):
+      bbox:   [x0, y0, x1, y1] of the sprite inside the full cutout canvas
+      canvas: [w, h] of the full cutout
+      anchor: {x, y} attachment point in sprite pixels (bottom-centre of the part)
+      mips:   [{scale, url, size}] with scale 1.0 first
+    """
+    trimmed = trim_premultiplied(cutout)
+    if trimmed is None:
+        return None
+    sprite, bbox = trimmed
+
+    mips = []
+    for scale in [1.0] + sorted((s for s in PART_MIP_SCALES if 0 < s < 1), reverse=True):
+        level = sprite if scale == 1.0 else resize_premultiplied(
+            sprite, (max(1, int(sprite.size[0] * scale)), max(1, int(sprite.size[1] * scale))))
+        name = "sprite.png" if scale == 1.0 else f"sprite_{scale:g}.png"
+        url = gcs_upload_buffer(f"parts/{part_id}/assets/{name}", png_buffer(level, "sprite"), "image/png")
+        mips.append({"scale": scale, "url": url, "size": list(level.size)})
+
+    return {
+        "url": mips[0]["url"],
+        "premultiplied": True,
+        "bbox": list(bbox),
+        "canvas": list(cutout.size),
+        "anchor": {"x": sprite.size[0] / 2.0, "y": float(sprite.size[1])},
+        "mips": mips,
+    }
 
 @app.post("/jobs/build_frames")
 def build_frames(inp: BuildFramesIn):
@@ -330,8 +1861,11 @@ def build_frames(inp: BuildFramesIn):
     Output:
       builds/{buildId}/frames/{i}.jpg (gs://)
       builds/{buildId}.resultFrames.frameUrls = [gs://...]
+    Identical in-flight builds share one render; jobs/{jobId}.cancelRequested
+    is checked between angles. Runs in the interactive lane unless priority says otherwise.
     """
-    update_job(inp.jobId, {"status": "running", "progress": 5})
+    lane = request_lane(inp.priority, LANE_INTERACTIVE)
+    update_job(inp.jobId, {"status": "running", "progress": 5, "lane": lane})
 
     build_ref = DB.collection("builds").document(inp.buildId)
     build = build_ref.get().to_dict() or {}
@@ -353,88 +1887,232 @@ def build_frames(inp: BuildFramesIn):
         p = DB.collection("parts").document(pid).get().to_dict() or {}
         part_cache[pid] = p
 
-    frame_urls: List[str] = []
-    owner_id = build.get("ownerId", "demo")
+    fp = fingerprint(
+        car_id,
+        applied,
+        [(a.get("angleIndex"), a.get("imageUrl") or a.get("httpUrl"), a.get("carMaskUrl")) for a in angles],
+        {pid: p.get("assets") for pid, p in part_cache.items()},
+        FRAME_MAX_SIDE,
+    )
+    return run_coalesced("build_frames", inp.buildId, fp, inp.jobId,
+                         lambda entry: _build_frames(entry, inp.buildId, build_ref, applied, angles, part_cache, fp), lane)
+
+def _build_frames(entry: InFlight, build_id: str, build_ref, applied: List[Dict[str, Any]],
+                  angles: List[Dict[str, Any]], part_cache: Dict[str, Dict[str, Any]], fp: str):
+    checkpoint = Checkpoint(entry, fp)
+    size = probe_image_size(angles[0].get("imageUrl") or angles[0].get("httpUrl"))
+    pixels = size[0] * size[1] if size else DEFAULT_IMAGE_PIXELS
+    frame_scale = 1.0
+    if FRAME_MAX_SIDE and size and max(size) > FRAME_MAX_SIDE:
+        # overlays are placed against the capped frame; the DCT-scaled decode
+        # is at most twice the capped size per side before the final resize
+        frame_scale = FRAME_MAX_SIDE / float(max(size))
+        pixels = int(pixels * min(1.0, 4 * frame_scale * frame_scale))
+    res = admit_job(entry, f"build_frames:{build_id}", frame_bytes(pixels, applied),
+                    max_slots=min(FRAME_WORKERS, len(angles)), fixed=overlay_bytes(applied, part_cache))
+
+    with res:
+        overlays = load_part_overlays(applied, part_cache, frame_scale)
+        frame_urls: List[Optional[str]] = [None] * len(angles)
+        finished = 0
+        cancelled = threading.Event()
+
+        def work(idx: int, ang: Dict[str, Any]):
+            if cancelled.is_set():
+                return None
+            done = checkpoint.restore(str(ang.get("angleIndex", idx)), "url")
+            if done is not None:
+                return done["url"]
+            return render_frame(build_id, idx, ang, applied, overlays, entry.lane, FRAME_MAX_SIDE)
+
+        with ThreadPoolExecutor(max_workers=max(1, res.slots)) as pool:
+            futures = {pool.submit(work, idx, ang): idx for idx, ang in enumerate(angles)}
+            try:
+                for fut in as_completed(futures):
+                    idx = futures[fut]
+                    frame_urls[idx] = fut.result()
+                    finished += 1
+                    if len(angles) - finished < res.slots:
+                        res.release_slot()  # no more frames for this worker thread
+                    update: Dict[str, Any] = {"progress": int(5 + finished * 90 / len(angles))}
+                    key = str(angles[idx].get("angleIndex", idx))
+                    if not checkpoint.recorded(key):
+                        checkpoint.record(key, {"url": frame_urls[idx]})
+                    entry.update(update)
+                    entry.check_cancelled()
+            except BaseException:
+                cancelled.set()
+                for f in futures:
+                    f.cancel()
+                raise
+        del overlays
 
-    for idx, ang in enumerate(angles):
-        raw_url = ang.get("imageUrl") or ang.get("httpUrl") # patch for demo logic
-        if not raw_url:
-            raise HTTPException(status_code=400, detail="angle.imageUrl missing")
-            
-        if str(raw_url).startswith("gs://"):
-            _, _, bucket_and_path = str(raw_url).partition("gs://")
-            _, _, raw_path = bucket_and_path.partition("/")
-            base = image_from_bytes(gcs_download(raw_path))
-        elif str(raw_url).startswith("http"):
-             resp = requests.get(raw_url)
-             base = image_from_bytes(resp.content)
-        else:
-             raise HTTPException(status_code=400, detail=f"Invalid URL: {raw_url}")
+    # Write result back
+    build_ref.set({
+        "resultFrames": {"frameUrls": frame_urls},
+        "status": "ready",
+        "updatedAt": firestore.SERVER_TIMESTAMP
+    }, merge=True)
 
-        # Load car mask if available for paint/wrap
-        mask = None
-        if ang.get("carMaskUrl"):
-            _, _, bp = str(ang["carMaskUrl"]).partition("gs://")
-            _, _, mask_path = bp.partition("/")
-            mask = Image.open(io.BytesIO(gcs_download(mask_path))).convert("L")
-
-        out_img = base
-
-        # Apply parts in order
-        for ap in applied:
-            cat = (ap.get("category") or "").lower()
-            pid = ap.get("partId")
-            params = ap.get("params") or {}
-
-            # Paint/Wrap
-            if cat in ("paint", "wrap"):
-                if mask is None:
-                    continue
-                color = params.get("color", "#2f6fed")
-                out_img = apply_paint(out_img, mask, str(color))
-                continue
+    entry.update({"status": "done", "progress": 100, "resumedAngles": checkpoint.restored})
+    return {"buildId": build_id, "resultFrames": {"frameUrls": frame_urls}}
 
-            # PNG overlay categories
-            if pid and pid in part_cache:
-                assets = (part_cache[pid].get("assets") or {})
-                png_url = assets.get("pngCutoutUrl")
-                if png_url and str(png_url).startswith("gs://"):
+class Overlay:
+    """
+    A part image scaled for one build. canvas is the scaled size of the full
+    (untrimmed) cutout used for placement; the pixels sit at offset inside it.
+    """
+    def __init__(self, canvas: Tuple[int, int], image: Image.Image,
+                 offset: Tuple[int, int] = (0, 0), premultiplied: bool = False):
+        self.canvas = canvas
+        self.image = image
+        self.offset = offset
+        self.premultiplied = premultiplied
+        self.pixels = np.asarray(image) if premultiplied else None
+
+def load_part_overlays(applied: List[Dict[str, Any]], part_cache: Dict[str, Dict[str, Any]],
+                       frame_scale: float = 1.0) -> List[Optional[Overlay]]:
+    """
+    Downloads and scales each PNG overlay once per build (index-aligned with
+    applied); frame_scale is the FRAME_MAX_SIDE reduction of the frames.
+    The images are only read afterwards, so every frame thread shares them.
+    Trimmed sprites are preferred; parts processed before sprites existed fall
+    back to the full-canvas cutout.
+    """
+    decoded: Dict[str, Image.Image] = {}
+    overlays: List[Optional[Overlay]] = []
+    for ap in applied:
+        cat = (ap.get("category") or "").lower()
+        pid = ap.get("partId")
+        params = ap.get("params") or {}
+        overlay = None
+        if cat not in ("paint", "wrap") and pid and pid in part_cache:
+            assets = (part_cache[pid].get("assets") or {})
+            scale = float(params.get("scale", 0.35 if cat in ("spoiler",) else 0.30)) * frame_scale
+            sprite = assets.get("sprite") or {}
+            png_url = assets.get("pngCutoutUrl")
+            if sprite.get("mips"):
+                overlay = sprite_overlay(sprite, scale, decoded)
+            elif png_url and str(png_url).startswith("gs://"):
+                if png_url not in decoded:
                     _, _, bp = str(png_url).partition("gs://")
                     _, _, png_path = bp.partition("/")
-                    part_rgba = Image.open(io.BytesIO(gcs_download(png_path))).convert("RGBA")
-
-                    # Placeholder anchor: center-ish. Upgrade later using keypoints per category.
-                    bw, bh = out_img.size
-                    scale = float(params.get("scale", 0.35 if cat in ("spoiler",) else 0.30))
-                    part_scaled = scale_rgba(part_rgba, scale)
-                    pw, ph = part_scaled.size
-                    x = int((bw - pw) * 0.5)
-                    y = int((bh - ph) * (0.62 if cat in ("spoiler",) else 0.70))
-
-                    out_img = paste_rgba(out_img, part_scaled, (x, y))
-                    continue
-
-            # Wheels placeholder (upgrade with wheel centers + rendering later)
-            if cat == "wheels":
-                # v1 minimal: do nothing unless you add a wheel overlay asset.
-                pass
+                    with gcs_download_into(png_path) as buf:
+                        decoded[png_url] = image_from_buffer(buf, "RGBA")
+                scaled = scale_rgba(decoded[png_url], scale)
+                overlay = Overlay(scaled.size, scaled)
+        overlays.append(overlay)
+    return overlays
+
+def sprite_overlay(sprite: Dict[str, Any], scale: float, decoded: Dict[str, Image.Image]) -> Overlay:
+    """
+    Picks the smallest stored mip that is still >= the requested scale and
+    resizes from it, so large parts never get decoded at full size.
+    """
+    x0, y0, x1, y1 = sprite["bbox"]
+    cw, ch = sprite["canvas"]
+    mips = sorted(sprite["mips"], key=lambda m: m["scale"])
+    mip = next((m for m in mips if m["scale"] >= scale), mips[-1])
+    if mip["url"] not in decoded:
+        _, _, bp = str(mip["url"]).partition("gs://")
+        _, _, path = bp.partition("/")
+        with gcs_download_into(path) as buf:
+            decoded[mip["url"]] = image_from_buffer(buf, "RGBA")
+    level = decoded[mip["url"]]
+    size = (max(1, round((x1 - x0) * scale)), max(1, round((y1 - y0) * scale)))
+    image = resize_premultiplied(level, size)
+    return Overlay(
+        canvas=(max(1, int(cw * scale)), max(1, int(ch * scale))),
+        image=image,
+        offset=(int(x0 * scale), int(y0 * scale)),
+        premultiplied=bool(sprite.get("premultiplied")),
+    )
+
+def render_frame(build_id: str, idx: int, ang: Dict[str, Any], applied: List[Dict[str, Any]],
+                 overlays: List[Optional[Overlay]], lane: str = LANE_INTERACTIVE, max_side: int = 0) -> str:
+    """
+    Renders and uploads one angle of a build; returns its gs:// url.
+    Decode/composite/encode run in one SCHEDULER turn of lane. max_side > 0
+    caps the frame's long side.
+    """
+    raw_url = ang.get("imageUrl") or ang.get("httpUrl") # patch for demo logic
+    if not raw_url:
+        raise HTTPException(status_code=400, detail="angle.imageUrl missing")
+
+    if str(raw_url).startswith("gs://"):
+        _, _, bucket_and_path = str(raw_url).partition("gs://")
+        _, _, raw_path = bucket_and_path.partition("/")
+        raw = gcs_download_into(raw_path)
+    elif str(raw_url).startswith("http"):
+         raw = http_download_into(raw_url)
+    else:
+         raise HTTPException(status_code=400, detail=f"Invalid URL: {raw_url}")
 
-        # Save frame
-        frame_path = f"builds/{inp.buildId}/frames/{ang.get('angleIndex', idx)}.jpg"
-        gs = gcs_upload(frame_path, jpg_bytes_from_pil(out_img, quality=85), "image/jpeg")
-        frame_urls.append(gs)
+    # Load car mask if available for paint/wrap
+    mask_buf = None
+    try:
+        if ang.get("carMaskUrl"):
+            _, _, bp = str(ang["carMaskUrl"]).partition("gs://")
+            _, _, mask_path = bp.partition("/")
+            mask_buf = gcs_download_into(mask_path)
+
+        with SCHEDULER.turn(lane):
+            jpg = compose_frame(raw, mask_buf, applied, overlays, max_side)
+    finally:
+        raw.release()
+        if mask_buf is not None:
+            mask_buf.release()
+
+    # Save frame
+    frame_path = f"builds/{build_id}/frames/{ang.get('angleIndex', idx)}.jpg"
+    return gcs_upload_buffer(frame_path, jpg, "image/jpeg")
+
+def compose_frame(raw: PooledBuffer, mask_buf: Optional[PooledBuffer], applied: List[Dict[str, Any]],
+                  overlays: List[Optional[Overlay]], max_side: int = 0) -> PooledBuffer:
+    base = image_from_buffer(raw, max_side=max_side)
+    raw.release()
+    mask = None
+    if mask_buf is not None:
+        mask = image_from_buffer(mask_buf, "L")
+        mask_buf.release()
+        if mask.size != base.size:
+            mask = mask.resize(base.size, Image.BILINEAR)
+
+    out_img = base
+
+    # Apply parts in order
+    for ap, overlay in zip(applied, overlays):
+        cat = (ap.get("category") or "").lower()
+        params = ap.get("params") or {}
+
+        # Paint/Wrap
+        if cat in ("paint", "wrap"):
+            if mask is None:
+                continue
+            color = params.get("color", "#2f6fed")
+            out_img = apply_paint(out_img, mask, str(color))
+            continue
 
-        update_job(inp.jobId, {"progress": int(5 + (idx + 1) * 90 / len(angles))})
+        # PNG overlay categories
+        if overlay is not None:
+            # Placeholder anchor: center-ish. Upgrade later using keypoints per category.
+            bw, bh = out_img.size
+            pw, ph = overlay.canvas
+            x = int((bw - pw) * 0.5) + overlay.offset[0]
+            y = int((bh - ph) * (0.62 if cat in ("spoiler",) else 0.70)) + overlay.offset[1]
+
+            if overlay.premultiplied:
+                out_img = paste_premultiplied(out_img, overlay.pixels, (x, y))
+            else:
+                out_img = paste_rgba(out_img, overlay.image, (x, y))
+            continue
 
-    # Write result back
-    build_ref.set({
-        "resultFrames": {"frameUrls": frame_urls},
-        "status": "ready",
-        "updatedAt": firestore.SERVER_TIMESTAMP
-    }, merge=True)
+        # Wheels placeholder (upgrade with wheel centers + rendering later)
+        if cat == "wheels":
+            # v1 minimal: do nothing unless you add a wheel overlay asset.
+            pass
 
-    update_job(inp.jobId, {"status": "done", "progress": 100})
-    return {"buildId": inp.buildId, "resultFrames": {"frameUrls": frame_urls}}
+    return jpg_buffer(out_img, quality=85)
 
 
 # ---------------------------
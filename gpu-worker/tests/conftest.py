@@ -0,0 +1,140 @@
+"""
+Shared fixtures for the worker tests: main is imported in lazy startup mode
+and its Firestore client / storage bucket are swapped for in-memory fakes,
+so no Firebase project or credentials are needed.
+
+  pip install -r requirements-dev.txt && python -m pytest -q tests
+"""
+import copy
+import os
+import sys
+import threading
+
+import pytest
+
+os.environ.setdefault("WORKER_STARTUP", "lazy")
+os.environ.setdefault("STORAGE_BUCKET", "test-bucket")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+
+
+class FakeSnapshot:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return copy.deepcopy(self._data)
+
+
+class FakeDocument:
+    def __init__(self, db, path):
+        self.db = db
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    def get(self):
+        with self.db.lock:
+            return FakeSnapshot(self.id, self.db.docs.get(self.path))
+
+    def set(self, data, merge=False):
+        def deep_merge(dst, src):
+            for k, v in src.items():
+                if isinstance(v, dict) and isinstance(dst.get(k), dict):
+                    deep_merge(dst[k], v)
+                else:
+                    dst[k] = copy.deepcopy(v)
+
+        with self.db.lock:
+            current = copy.deepcopy(self.db.docs.get(self.path) or {}) if merge else {}
+            deep_merge(current, data)
+            self.db.docs[self.path] = current
+
+    def update(self, data):
+        self.set(data, merge=True)
+
+    def delete(self):
+        with self.db.lock:
+            self.db.docs.pop(self.path, None)
+
+    def collection(self, name):
+        return FakeCollection(self.db, f"{self.path}/{name}")
+
+
+class FakeCollection:
+    def __init__(self, db, path):
+        self.db = db
+        self.path = path
+
+    def document(self, doc_id):
+        return FakeDocument(self.db, f"{self.path}/{doc_id}")
+
+    def stream(self):
+        depth = self.path.count("/") + 1
+        with self.db.lock:
+            return [FakeSnapshot(p.rsplit("/", 1)[-1], copy.deepcopy(d)) for p, d in self.db.docs.items()
+                    if p.startswith(self.path + "/") and p.count("/") == depth]
+
+
+class FakeFirestore:
+    """Documents by path ("jobs/j1", "cars/c1/angles/a0"); merge=True merges nested maps."""
+    def __init__(self):
+        self.docs = {}
+        self.lock = threading.RLock()
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+    def doc(self, path):
+        return self.docs.get(path) or {}
+
+
+class FakeBlob:
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+        self.generation = 1
+
+    def exists(self):
+        return self.name in self.bucket.objects
+
+    def download_to_file(self, f):
+        f.write(self.bucket.objects[self.name])
+
+    def download_as_bytes(self, start=None, end=None):
+        data = self.bucket.objects[self.name]
+        return data if start is None else data[start:end + 1]
+
+    def upload_from_file(self, f, size=None, content_type=None):
+        self.bucket.objects[self.name] = f.read(size)
+
+
+class FakeBucket:
+    def __init__(self):
+        self.objects = {}
+
+    def blob(self, name):
+        return FakeBlob(self, name)
+
+    def get_blob(self, name):
+        return FakeBlob(self, name) if name in self.objects else None
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    """main with a fresh fake Firestore (worker.DB) and bucket (worker.BU)."""
+    monkeypatch.setattr(main.DB, "_obj", FakeFirestore())
+    monkeypatch.setattr(main.BU, "_obj", FakeBucket())
+    main._INFLIGHT.clear()
+    return main
+
+
+def add_angles(db, car_id, count=10):
+    for i in range(count):
+        db.collection("cars").document(car_id).collection("angles").document(f"a{i}").set(
+            {"angleIndex": i, "imageUrl": f"https://example.com/{car_id}/{i}.jpg"})
@@ -0,0 +1,158 @@
+"""Memory admission, lane weighting and the ingest/job per-angle lock order."""
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from conftest import add_angles
+from main import LaneQueue
+
+MB = 1024 * 1024
+
+
+def test_lane_queue_follows_weights():
+    queue = LaneQueue({"interactive": 4, "bulk": 1})
+    for i in range(10):
+        queue.push("interactive", f"i{i}")
+        queue.push("bulk", f"b{i}")
+
+    order = []
+    while len(order) < 10:
+        item = queue.head()
+        queue.pop(item)
+        order.append(item[0])
+    assert order.count("i") == 8
+    assert order.count("b") == 2
+    assert queue.waiting() == {"interactive": 2, "bulk": 8}
+
+
+def test_lane_queue_is_fifo_within_a_lane():
+    queue = LaneQueue({"interactive": 4, "bulk": 1})
+    for item in ("b0", "b1", "b2"):
+        queue.push("bulk", item)
+    queue.remove("b1")
+    popped = []
+    while len(queue):
+        popped.append(queue.head())
+        queue.pop(popped[-1])
+    assert popped == ["b0", "b2"]
+
+
+def test_memory_budget_grants_slots_that_fit(worker):
+    budget = worker.MemoryBudget(100 * MB)
+    with budget.admit("a", 30 * MB, max_slots=8) as res:
+        assert res.slots == 3
+        assert budget.snapshot()["reservedMb"] == 90
+        res.release_slot()
+        assert budget.snapshot()["reservedMb"] == 60
+    assert budget.reserved == 0
+    assert budget.snapshot()["jobs"] == []
+
+
+def test_memory_budget_waits_then_admits(worker):
+    budget = worker.MemoryBudget(100 * MB)
+    first = budget.admit("first", 80 * MB)
+    admitted = threading.Event()
+
+    def second():
+        with budget.admit("second", 80 * MB, timeout=5):
+            admitted.set()
+
+    t = threading.Thread(target=second)
+    t.start()
+    time.sleep(0.05)
+    assert not admitted.is_set()
+    first.release()
+    t.join(5)
+    assert admitted.is_set()
+
+
+def test_memory_budget_times_out_with_503(worker):
+    budget = worker.MemoryBudget(100 * MB)
+    with budget.admit("first", 80 * MB):
+        with pytest.raises(HTTPException) as exc:
+            budget.admit("second", 80 * MB, timeout=0.05)
+    assert exc.value.status_code == 503
+    assert budget.timeouts == 1
+    assert budget.snapshot()["waiting"] == {"interactive": 0, "bulk": 0}
+
+
+def test_memory_budget_runs_oversized_job_alone(worker):
+    budget = worker.MemoryBudget(100 * MB)
+    with budget.admit("huge", 500 * MB, max_slots=4) as res:
+        assert res.slots == 1
+        with pytest.raises(HTTPException):
+            budget.admit("small", 1 * MB, timeout=0.05)
+
+
+@pytest.fixture
+def angle(worker, monkeypatch):
+    """carA/a0 whose segment_angle writes a current mask; calls lists each run."""
+    add_angles(worker.DB, "carA", count=1)
+    calls = []
+
+    def segment_angle(car_id, ang, lane=None, source_fp=None):
+        calls.append(car_id)
+        time.sleep(0.05)
+        worker.BU.objects[f"masks/{car_id}/{ang['id']}.png"] = b"png"
+        mask = f"gs://test-bucket/masks/{car_id}/{ang['id']}.png"
+        worker.DB.collection("cars").document(car_id).collection("angles").document(ang["id"]).set(
+            {"carMaskUrl": mask, "segmentedFrom": source_fp}, merge=True)
+        return {"angleIndex": ang.get("angleIndex"), "carMaskUrl": mask, "wheels": []}
+
+    monkeypatch.setattr(worker, "segment_angle", segment_angle)
+    monkeypatch.setattr(worker, "max_image_pixels", lambda urls: 1000)
+    return calls
+
+
+def test_second_run_of_an_angle_is_cached(worker, angle):
+    ang = {"id": "a0"}
+    assert worker.segment_angle_cached("carA", ang)["cached"] is False
+    assert worker.segment_angle_cached("carA", ang)["cached"] is True
+    assert angle == ["carA"]
+    assert worker._ANGLE_LOCKS == {}
+
+
+def test_ingest_waiting_for_memory_does_not_block_jobs(worker, angle, monkeypatch):
+    """A job holding its reservation must not wait on ingest, which waits on that reservation."""
+    budget = worker.MemoryBudget(worker.segment_bytes(1000))
+    monkeypatch.setattr(worker, "MEMORY", budget)
+    monkeypatch.setattr(worker, "MEMORY_ADMIT_TIMEOUT_S", 5)
+    stats_before = worker.ingest_snapshot()
+
+    with budget.admit("job", worker.segment_bytes(1000)):
+        ingest = threading.Thread(target=worker._ingest_angle, args=("carA", "a0"))
+        ingest.start()
+        while budget.snapshot()["waiting"]["bulk"] == 0:
+            time.sleep(0.005)
+
+        t = time.perf_counter()
+        result = worker.segment_angle_cached("carA", {"id": "a0"})
+        assert time.perf_counter() - t < 2
+        assert result["cached"] is False
+
+    ingest.join(5)
+    stats = worker.ingest_snapshot()
+    assert stats["upToDate"] == stats_before["upToDate"] + 1
+    assert stats["errors"] == stats_before["errors"]
+    assert angle == ["carA"]
+    assert worker._ANGLE_LOCKS == {}
+
+
+def test_angle_lock_entries_are_dropped(worker):
+    entered = threading.Event()
+
+    def hold():
+        with worker.angle_lock("carA", "a0"):
+            entered.set()
+            time.sleep(0.05)
+
+    threads = [threading.Thread(target=hold) for _ in range(3)]
+    for t in threads:
+        t.start()
+    entered.wait(5)
+    assert worker._ANGLE_LOCKS[("carA", "a0")][1] >= 1
+    for t in threads:
+        t.join(5)
+    assert worker._ANGLE_LOCKS == {}
@@ -0,0 +1,89 @@
+"""Pooled buffers, the file objects over them, and guided_filter."""
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import main
+
+
+def test_pool_reuses_released_buffers():
+    pool = main.BufferPool(limit=1024 * 1024)
+    buf = pool.acquire(100 * 1024)
+    assert len(buf.data) == 128 * 1024  # next power of two
+    data = buf.data
+    buf.release()
+    buf.release()  # second release is a no-op
+    assert pool.acquire(120 * 1024).data is data
+    assert pool.stats == {"hits": 1, "misses": 1}
+
+
+def test_pool_caps_idle_bytes():
+    pool = main.BufferPool(limit=100 * 1024)
+    pool.acquire(128 * 1024).release()
+    assert pool.idle == 0
+    assert pool.acquire(128 * 1024).pool is pool
+    assert pool.stats["hits"] == 0
+
+
+def test_buffer_writer_grows_and_keeps_contents():
+    pool = main.BufferPool(limit=1024 * 1024)
+    writer = main.BufferWriter(pool, size_hint=16)
+    chunks = [bytes([i]) * 50_000 for i in range(4)]
+    for chunk in chunks:
+        writer.write(chunk)
+    buf = writer.buffer()
+    assert buf.size == 200_000
+    assert bytes(buf.view) == b"".join(chunks)
+    assert pool.size_hint() == 200_000
+
+
+def test_buffer_writer_seek_overwrite_and_truncate():
+    writer = main.BufferWriter(main.BufferPool(limit=0))
+    writer.write(b"hello world")
+    writer.seek(0)
+    writer.write(b"J")
+    writer.seek(-5, io.SEEK_END)
+    assert writer.tell() == 6
+    writer.truncate()
+    assert bytes(writer.buffer().view) == b"Jello "
+
+
+def test_memory_reader_reads_and_seeks():
+    reader = main.MemoryReader(memoryview(b"0123456789"))
+    assert reader.read(4) == b"0123"
+    reader.seek(-2, io.SEEK_END)
+    assert reader.read() == b"89"
+    reader.seek(3)
+    assert reader.read(2) == b"34"
+    assert reader.read(0) == b""
+
+
+def test_png_round_trip_through_pooled_buffers():
+    img = Image.new("RGBA", (64, 48), (10, 20, 30, 128))
+    with main.png_buffer(img, "cutout") as buf:
+        out = Image.open(main.MemoryReader(buf.view))
+        out.load()
+    assert out.size == (64, 48)
+    assert out.getpixel((5, 5)) == (10, 20, 30, 128)
+
+
+def test_guided_filter_keeps_edges_of_its_guide():
+    pytest.importorskip("cv2")
+    guide = np.zeros((64, 64), np.float32)
+    guide[:, 32:] = 1.0
+    noisy = (guide + np.random.default_rng(0).normal(0, 0.1, guide.shape)).astype(np.float32)
+
+    out = main.guided_filter(guide, noisy, radius=4, eps=1e-3)
+    assert out.dtype == np.float32
+    assert out[:, :24].std() < noisy[:, :24].std() / 2  # noise is smoothed away
+    assert out[:, 33].mean() - out[:, 30].mean() > 0.9  # the step stays sharp
+
+
+def test_guided_filter_smooths_flat_regions():
+    pytest.importorskip("cv2")
+    guide = np.full((32, 32), 0.5, np.float32)
+    src = np.random.default_rng(1).random((32, 32)).astype(np.float32)
+    out = main.guided_filter(guide, src, radius=8, eps=1e-3)
+    assert out[8:24, 8:24].std() < src.std() / 4
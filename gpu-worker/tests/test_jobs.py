@@ -0,0 +1,184 @@
+"""Coalescing, cancellation and batch segmentation (run_coalesced, segment_cars)."""
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from conftest import add_angles
+
+
+def run_job(worker, job_id, fn, results):
+    """run_coalesced("ep", "t", "fp", job_id, fn) on a thread; results[job_id] = its return value or error."""
+    def run():
+        try:
+            results[job_id] = worker.run_coalesced("ep", "t", "fp", job_id, fn)
+        except BaseException as e:
+            results[job_id] = e
+
+    t = threading.Thread(target=run)
+    t.start()
+    return t
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_follower_shares_leader_result(worker):
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def fn(entry):
+        calls.append(entry)
+        started.set()
+        release.wait(5)
+        return {"ok": True}
+
+    results = {}
+    leader = run_job(worker, "j1", fn, results)
+    started.wait(5)
+    follower = run_job(worker, "j2", lambda entry: pytest.fail("follower ran fn"), results)
+    wait_for(lambda: "coalescedWith" in worker.DB.doc("jobs/j2"))
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert len(calls) == 1
+    assert calls[0].job_ids == ["j1", "j2"]
+    assert results == {"j1": {"ok": True}, "j2": {"ok": True}}
+    assert worker.DB.doc("jobs/j2")["coalescedWith"] == "j1"
+    assert worker.DB.doc("jobs/j2")["status"] == "done"
+    assert worker._INFLIGHT == {}
+
+
+def test_leader_failure_reaches_follower(worker):
+    started, release = threading.Event(), threading.Event()
+
+    def fn(entry):
+        started.set()
+        release.wait(5)
+        raise RuntimeError("boom")
+
+    results = {}
+    leader = run_job(worker, "j1", fn, results)
+    started.wait(5)
+    follower = run_job(worker, "j2", lambda entry: pytest.fail("follower ran fn"), results)
+    wait_for(lambda: "coalescedWith" in worker.DB.doc("jobs/j2"))
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert isinstance(results["j1"], RuntimeError)
+    assert results["j2"] is results["j1"]
+    assert worker._INFLIGHT == {}
+    # the failed run is not reused by the next identical job
+    assert worker.run_coalesced("ep", "t", "fp", "j3", lambda entry: "again") == "again"
+
+
+def test_different_fingerprints_do_not_coalesce(worker):
+    assert worker.run_coalesced("ep", "t", "fp1", "j1", lambda entry: entry.job_ids) == ["j1"]
+    assert worker.run_coalesced("ep", "t", "fp2", "j2", lambda entry: entry.job_ids) == ["j2"]
+
+
+def test_cancel_requested_raises_409(worker):
+    def fn(entry):
+        worker.update_job("j1", {"cancelRequested": True})
+        entry.check_cancelled()
+        return "finished"
+
+    with pytest.raises(HTTPException) as exc:
+        worker.run_coalesced("ep", "t", "fp", "j1", fn)
+    assert exc.value.status_code == 409
+    assert worker.DB.doc("jobs/j1")["status"] == "cancelled"
+
+
+def test_run_continues_while_any_attached_job_wants_it(worker):
+    def fn(entry):
+        entry.job_ids.append("j2")
+        worker.update_job("j1", {"cancelRequested": True})
+        entry.check_cancelled()  # j2 still wants the result
+        return "finished"
+
+    assert worker.run_coalesced("ep", "t", "fp", "j1", fn) == "finished"
+
+
+def fake_segment(failing=()):
+    def segment(car_id, ang, lane=None, admit=None):
+        if (car_id, ang["angleIndex"]) in failing:
+            raise RuntimeError("boom")
+        time.sleep(0.01)
+        return {"angleIndex": ang["angleIndex"], "carMaskUrl": f"gs://test-bucket/{car_id}/{ang['angleIndex']}.png",
+                "wheels": [], "cached": False}
+    return segment
+
+
+@pytest.fixture
+def batch(worker, monkeypatch):
+    add_angles(worker.DB, "carA")
+    add_angles(worker.DB, "carB")
+    add_angles(worker.DB, "carC", count=3)
+    monkeypatch.setattr(worker, "max_image_pixels", lambda urls: 1000)
+    monkeypatch.setattr(worker, "gcs_exists", lambda url: True)
+    return worker
+
+
+def test_segment_cars_failed_car_stays_error(batch, monkeypatch):
+    monkeypatch.setattr(batch, "segment_angle_cached", fake_segment(failing={("carA", 0)}))
+    out = batch.segment_cars(batch.SegmentCarsIn(jobId="j1", carIds=["carA", "carB", "carC"]))
+
+    assert out["cars"]["carA"]["status"] == "error"
+    assert out["cars"]["carA"]["error"] == "boom"
+    assert out["cars"]["carB"] == {"carId": "carB", "status": "done", "done": 10, "total": 10, "error": None}
+    assert out["cars"]["carC"]["status"] == "error"  # only 3 angles
+    job = batch.DB.doc("jobs/j1")
+    assert job["status"] == "done"
+    assert {cid: car["status"] for cid, car in job["cars"].items()} == {
+        "carA": "error", "carB": "done", "carC": "error"}
+
+
+def test_segment_cars_returns_summaries_only(batch, monkeypatch):
+    monkeypatch.setattr(batch, "segment_angle_cached", fake_segment())
+    out = batch.segment_cars(batch.SegmentCarsIn(jobId="j1", carIds=["carA", "carB"]))
+    for car in out["cars"].values():
+        assert set(car) == {"carId", "status", "done", "total", "error"}
+
+
+def test_segment_cars_cancelled_mid_batch(batch, monkeypatch):
+    segment = fake_segment()
+    calls = []
+
+    def cancel_after_two(car_id, ang, lane=None, admit=None):
+        calls.append((car_id, ang["angleIndex"]))
+        if len(calls) == 2:
+            batch.update_job("j1", {"cancelRequested": True})
+        return segment(car_id, ang, lane)
+
+    monkeypatch.setattr(batch, "SEGMENT_IO_WORKERS", 1)
+    monkeypatch.setattr(batch, "segment_angle_cached", cancel_after_two)
+    with pytest.raises(HTTPException) as exc:
+        batch.segment_cars(batch.SegmentCarsIn(jobId="j1", carIds=["carA", "carB"]))
+
+    assert exc.value.status_code == 409
+    assert len(calls) < 20
+    job = batch.DB.doc("jobs/j1")
+    assert job["status"] == "cancelled"
+    assert {car["status"] for car in job["cars"].values()} == {"cancelled"}
+
+
+def test_segment_cars_retry_resumes_from_checkpoints(batch, monkeypatch):
+    monkeypatch.setattr(batch, "segment_angle_cached", fake_segment(failing={("carA", 3)}))
+    batch.segment_cars(batch.SegmentCarsIn(jobId="j1", carIds=["carA", "carB"]))
+
+    calls = []
+    segment = fake_segment()
+    monkeypatch.setattr(batch, "segment_angle_cached", lambda car_id, ang, lane=None, admit=None:
+                        calls.append((car_id, ang["angleIndex"])) or segment(car_id, ang, lane))
+    out = batch.segment_cars(batch.SegmentCarsIn(jobId="j1", carIds=["carA", "carB"]))
+
+    assert ("carA", 3) in calls
+    assert ("carB", 0) not in calls
+    assert {car["status"] for car in out["cars"].values()} == {"done"}
@@ -5,18 +5,15 @@ Usage: blender --background --python add_anchors.py -- input.glb output.glb
 
 import bpy
 import sys
+import os
 import mathutils
 
-def add_anchors_to_car(input_path, output_path):
-    """Add anchor empty objects to car model for part attachment"""
-    
-    # Clear scene
-    bpy.ops.object.select_all(action='SELECT')
-    bpy.ops.object.delete()
-    
-    # Import GLB
-    print(f"Importing {input_path}...")
-    bpy.ops.import_scene.gltf(filepath=input_path)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mesh_stats import world_bounds
+
+def create_anchors():
+    """Create ANCHOR_* empties in the current scene, positioned from the car's bounds"""
     
     # Find bounding box to auto-position anchors
     all_mesh_objects = [obj for obj in bpy.context.scene.objects if obj.type == 'MESH']
@@ -24,13 +21,10 @@ def add_anchors_to_car(input_path, output_path):
         print("Error: No mesh objects found!")
         sys.exit(1)
     
-    # Calculate car dimensions
-    min_x = min(obj.bound_box[0][0] + obj.location.x for obj in all_mesh_objects)
-    max_x = max(obj.bound_box[6][0] + obj.location.x for obj in all_mesh_objects)
-    min_y = min(obj.bound_box[0][1] + obj.location.y for obj in all_mesh_objects)
-    max_y = max(obj.bound_box[6][1] + obj.location.y for obj in all_mesh_objects)
-    min_z = min(obj.bound_box[0][2] + obj.location.z for obj in all_mesh_objects)
-    max_z = max(obj.bound_box[6][2] + obj.location.z for obj in all_mesh_objects)
+    # Calculate car dimensions (exact world-space AABB)
+    bounds = world_bounds(all_mesh_objects)
+    min_x, min_y, min_z = bounds['min']
+    max_x, max_y, max_z = bounds['max']
     
     center_x = (min_x + max_x) / 2
     center_y = (min_y + max_y) / 2
@@ -83,7 +77,23 @@ def add_anchors_to_car(input_path, output_path):
     create_anchor("ANCHOR_EXHAUST_L", (center_x - exhaust_offset_x, exhaust_y, exhaust_z))
     create_anchor("ANCHOR_EXHAUST_R", (center_x + exhaust_offset_x, exhaust_y, exhaust_z))
     
-    print(f"✅ Added {len([obj for obj in bpy.context.scene.objects if obj.type == 'EMPTY'])} anchor empties")
+    anchor_count = len([obj for obj in bpy.context.scene.objects if obj.type == 'EMPTY'])
+    print(f"✅ Added {anchor_count} anchor empties")
+    return anchor_count
+
+
+def add_anchors_to_car(input_path, output_path):
+    """Add anchor empty objects to car model for part attachment"""
+    
+    # Clear scene
+    bpy.ops.object.select_all(action='SELECT')
+    bpy.ops.object.delete()
+    
+    # Import GLB
+    print(f"Importing {input_path}...")
+    bpy.ops.import_scene.gltf(filepath=input_path)
+    
+    create_anchors()
     
     # Export GLB with anchors
     print(f"Exporting to {output_path}...")
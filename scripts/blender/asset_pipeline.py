@@ -0,0 +1,126 @@
+"""
+Blender script that runs the whole car asset pipeline on a single import:
+optimize (decimate + textures) -> add anchors -> extract anchor metadata -> export once
+Usage: blender --background --python asset_pipeline.py -- input.glb output.glb [anchors.json] [--target-triangles N] [--skip-optimize]
+
+Writes:
+  output.glb               optimized model with ANCHOR_* empties (one Draco encode)
+  anchors.json             same format as extract_anchor_metadata.py
+                           (default: output_anchors.json)
+  output_stats.json        same format as optimize_car_model.py, plus anchorCount
+
+Replaces optimize_car_model.py -> add_anchors.py -> extract_anchor_metadata.py,
+which each re-import (Draco decode) and re-export the model.
+"""
+
+import argparse
+import bpy
+import sys
+import os
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from optimize_car_model import scene_stats, decimate_meshes, resize_textures, export_glb
+from textures import VARIANTS, variant_paths, write_variants
+from lod import LOD_RATIOS, export_lods, lod_paths
+from instancing import GPU_INSTANCING, instance_meshes
+from batching import MERGE_DRAW_CALLS, reduce_draw_calls
+from add_anchors import create_anchors
+from extract_anchor_metadata import collect_anchors, write_anchor_json
+
+
+def run_pipeline(input_path, output_path, anchors_json=None, target_triangles=100000, optimize=True):
+    """Import once, run every pipeline step in memory, export once"""
+    anchors_json = anchors_json or output_path.replace('.glb', '_anchors.json')
+
+    # Clear scene
+    bpy.ops.object.select_all(action='SELECT')
+    bpy.ops.object.delete()
+
+    # Import GLB/GLTF
+    print(f"Importing {input_path}...")
+    if not (input_path.endswith('.glb') or input_path.endswith('.gltf')):
+        print(f"Error: Unsupported format. Use .glb or .gltf")
+        sys.exit(1)
+    bpy.ops.import_scene.gltf(filepath=input_path)
+
+    stats_before = scene_stats()
+    print(f"BEFORE: {stats_before['triangles']} triangles, {stats_before['objects']} meshes, {stats_before['materials']} materials")
+
+    # Step 1: Optimize
+    if optimize:
+        instancing = instance_meshes()
+        allocation = decimate_meshes(target_triangles)
+        textures = resize_textures(2048)
+    else:
+        instancing = None
+        allocation = []
+        textures = None
+    draw_call_report = reduce_draw_calls(MERGE_DRAW_CALLS and optimize)
+
+    stats_after = scene_stats()
+    print(f"AFTER: {stats_after['triangles']} triangles, {stats_after['objects']} meshes, {stats_after['materials']} materials")
+
+    # Step 2: Anchors (positioned from the optimized geometry, as before)
+    create_anchors()
+
+    # Step 3: Anchor metadata straight from the scene
+    anchor_data = collect_anchors()
+
+    # Single export
+    export_glb(output_path)
+    # LODs/texture variants are optimizer outputs; an anchor-only pass leaves them alone
+    variants = write_variants(output_path, export_glb) if optimize else None
+    lods = export_lods(output_path, export_glb, 2048) if optimize else None
+    write_anchor_json(anchor_data, anchors_json)
+
+    stats_path = output_path.replace('.glb', '_stats.json')
+    with open(stats_path, 'w') as f:
+        json.dump({
+            'before': stats_before,
+            'after': stats_after,
+            'reduction_percent': round((1 - stats_after['triangles'] / max(1, stats_before['triangles'])) * 100, 1),
+            'target_triangles': target_triangles,
+            'allocation': allocation,
+            'instancing': instancing,
+            'drawCalls': draw_call_report,
+            'textures': textures,
+            'variants': variants,
+            'lods': lods,
+            'anchorCount': anchor_data['anchorCount']
+        }, f, indent=2)
+
+    print(f"✅ Pipeline complete! {output_path}, {anchors_json}, {stats_path}")
+    return anchor_data
+
+
+if __name__ == "__main__":
+    argv = sys.argv
+    argv = argv[argv.index("--") + 1:] if "--" in argv else []
+
+    parser = argparse.ArgumentParser(prog='asset_pipeline.py')
+    parser.add_argument('input')
+    parser.add_argument('output')
+    parser.add_argument('anchors_json', nargs='?')
+    parser.add_argument('--target-triangles', type=int, default=100000)
+    parser.add_argument('--skip-optimize', action='store_true', help='Input is already optimized; only add anchors')
+    if len(argv) < 2:
+        print("Usage: blender --background --python asset_pipeline.py -- input.glb output.glb [anchors.json] [--target-triangles N] [--skip-optimize]")
+        sys.exit(1)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.input):
+        print(f"Error: Input file not found: {args.input}")
+        sys.exit(1)
+
+    from build_cache import run_cached
+    anchors_json = args.anchors_json or args.output.replace('.glb', '_anchors.json')
+    optimize = not args.skip_optimize
+    run_cached(__file__, args.input,
+               [args.output, anchors_json, args.output.replace('.glb', '_stats.json')]
+               + (variant_paths(args.output) + lod_paths(args.output) if optimize else []),
+               {'target_triangles': args.target_triangles, 'optimize': optimize,
+                'variants': VARIANTS, 'lods': LOD_RATIOS, 'gpuInstancing': GPU_INSTANCING,
+                'mergeDrawCalls': MERGE_DRAW_CALLS},
+               lambda: run_pipeline(args.input, args.output, anchors_json, args.target_triangles, optimize))
@@ -0,0 +1,339 @@
+"""
+Batch runner for the Blender asset scripts: many models per Blender process
+Usage:
+  python3 scripts/blender/batch_optimize.py manifest.json [--workers N] [--stats combined_stats.json] [--blender PATH]
+
+Manifest (paths relative to the manifest file):
+{
+  "jobs": [
+    {"script": "optimize_car_model", "input": "raw/m3.glb", "output": "out/m3.glb", "args": [100000]},
+    {"script": "optimize_part", "input": "raw/lip.glb", "output": "out/lip.glb"},
+    {"script": "optimize_for_mobile", "input": "raw/911.glb", "output": "out/911_mobile.glb"},
+    {"script": "add_anchors", "input": "out/m3.glb", "output": "out/m3_anchors.glb"},
+    {"script": "asset_pipeline", "input": "raw/brz.glb", "output": "out/brz.glb", "args": [null, 100000]},
+    {"script": "optimize_to_size", "input": "raw/gr86.glb", "output": "out/gr86.glb", "args": [3.0, 2.5]}
+  ]
+}
+
+Jobs whose input, script source and args match a build cache entry are
+restored without starting Blender (see build_cache.py; --no-cache to skip).
+The rest go to N `blender --background` workers (default: CPU count, capped
+at the job count). They pull jobs from a shared queue directory, reset the
+scene between models, and each write their results. Those are merged into one stats JSON
+that embeds every job's _stats.json/_meta.json sidecar.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+
+try:
+    import bpy
+except ImportError:  # launcher mode (plain python3)
+    bpy = None
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Scripts that also write output_lodN.glb (see lod.py)
+LOD_SCRIPTS = {'optimize_car_model', 'optimize_for_mobile', 'optimize_part', 'asset_pipeline'}
+# Scripts that also write TEXTURE_VARIANTS files (see textures.py)
+VARIANT_SCRIPTS = {'optimize_car_model', 'optimize_for_mobile', 'optimize_part', 'asset_pipeline'}
+
+# script name -> (entry function, sidecar suffix written next to the output)
+SCRIPTS = {
+    'optimize_car_model': ('optimize_model', '_stats.json'),
+    'optimize_for_mobile': ('optimize_model', '_stats.json'),
+    'optimize_part': ('optimize_part', '_meta.json'),
+    'add_anchors': ('add_anchors_to_car', None),
+    'asset_pipeline': ('run_pipeline', '_stats.json'),
+    'optimize_to_size': ('optimize_to_size', '_stats.json'),
+    'render_thumbnails': ('render_previews', None),
+}
+
+
+# ---------------------------
+# Worker (inside Blender)
+# ---------------------------
+def reset_scene():
+    """Empty scene with no leftover meshes/materials/images from the previous model"""
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+
+
+def claim_next(queue_dir):
+    """Atomically move the next queued job into claimed/; None when the queue is empty"""
+    pending_dir = os.path.join(queue_dir, 'pending')
+    claimed_dir = os.path.join(queue_dir, 'claimed')
+    for name in sorted(os.listdir(pending_dir)):
+        dst = os.path.join(claimed_dir, f"{name}.{os.getpid()}")
+        try:
+            os.rename(os.path.join(pending_dir, name), dst)
+        except FileNotFoundError:
+            continue  # another worker got it first
+        return dst
+    return None
+
+
+def run_job(job):
+    func_name, sidecar_suffix = SCRIPTS[job['script']]
+    result = {
+        'index': job['index'],
+        'script': job['script'],
+        'input': job['input'],
+        'output': job['output'],
+        'ok': False,
+    }
+    started = time.time()
+    try:
+        reset_scene()
+        module = importlib.import_module(job['script'])
+        getattr(module, func_name)(job['input'], job['output'], *job.get('args', []))
+        result['ok'] = os.path.exists(job['output'])
+        if not result['ok']:
+            result['error'] = 'No output written'
+    except SystemExit as e:
+        # The single-file scripts sys.exit() on bad input; keep the session alive
+        result['error'] = f"Script exited with code {e.code}"
+    except Exception as e:
+        result['error'] = f"{e}\n{traceback.format_exc()}"
+    result['seconds'] = round(time.time() - started, 2)
+
+    if result['ok']:
+        attach_stats(job, result)
+    return result
+
+
+def job_outputs(job):
+    """Every file a job writes: the GLB first, then its sidecars"""
+    _, sidecar_suffix = SCRIPTS[job['script']]
+    if job['script'] == 'render_thumbnails':
+        from render_thumbnails import preview_paths
+        return preview_paths(job['output'])
+    outputs = [job['output']]
+    if job['script'] == 'asset_pipeline':
+        args = job.get('args', [])
+        outputs.append(args[0] if args and args[0] else job['output'].replace('.glb', '_anchors.json'))
+    if sidecar_suffix:
+        outputs.append(job['output'].replace('.glb', sidecar_suffix))
+    if job['script'] in LOD_SCRIPTS:
+        from lod import lod_paths
+        outputs.extend(lod_paths(job['output']))
+    return outputs
+
+
+def attach_stats(job, result):
+    _, sidecar_suffix = SCRIPTS[job['script']]
+    if sidecar_suffix:
+        sidecar = job['output'].replace('.glb', sidecar_suffix)
+        if os.path.exists(sidecar):
+            with open(sidecar) as f:
+                result['stats'] = json.load(f)
+
+
+def run_worker(queue_dir, results_path):
+    if SCRIPT_DIR not in sys.path:
+        sys.path.insert(0, SCRIPT_DIR)
+
+    results = []
+    while True:
+        job_path = claim_next(queue_dir)
+        if job_path is None:
+            break
+        with open(job_path) as f:
+            job = json.load(f)
+
+        print(f"\n[worker {os.getpid()}] {job['script']}: {job['input']}")
+        result = run_job(job)
+        results.append(result)
+        print(f"[worker {os.getpid()}] {'✅' if result['ok'] else '❌'} {job['output']} ({result['seconds']}s)")
+
+        # Rewrite after every job so a crash keeps what already finished
+        with open(results_path, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+# ---------------------------
+# Launcher (plain python3)
+# ---------------------------
+def load_manifest(manifest_path):
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    jobs = []
+    for i, job in enumerate(manifest.get('jobs', [])):
+        if job.get('script') not in SCRIPTS:
+            raise ValueError(f"Job {i}: unknown script {job.get('script')!r} (expected one of {sorted(SCRIPTS)})")
+        jobs.append({
+            **job,
+            'index': i,
+            'input': os.path.join(base, job['input']),
+            'output': os.path.join(base, job['output']),
+            'args': job.get('args', []),
+        })
+    return jobs
+
+
+def restore_cached(jobs):
+    """
+    Split jobs into (results restored from the build cache, jobs still to run, cache keys).
+    Runs before any Blender process starts, so unchanged assets cost one file hash.
+    """
+    import build_cache
+
+    results, pending, keys = [], [], {}
+    for job in jobs:
+        # Texture variants are extra outputs the job list doesn't know about
+        variants = os.getenv('TEXTURE_VARIANTS') and job['script'] in VARIANT_SCRIPTS
+        if not build_cache.enabled() or variants or not os.path.exists(job['input']):
+            pending.append(job)
+            continue
+        from lod import LOD_RATIOS
+        params = {
+            'args': job.get('args', []), 'lods': LOD_RATIOS, 'gpuInstancing': os.getenv('GPU_INSTANCING', ''),
+            'mergeDrawCalls': os.getenv('MERGE_DRAW_CALLS', ''),
+        }
+        if job['script'] == 'render_thumbnails':
+            params['engine'] = os.getenv('THUMBNAIL_ENGINE', 'workbench').lower()
+        key = build_cache.cache_key(job['script'], job['input'], params)
+        keys[job['index']] = key
+        if build_cache.restore(key, job_outputs(job)):
+            result = {
+                'index': job['index'], 'script': job['script'], 'input': job['input'],
+                'output': job['output'], 'ok': True, 'cached': True, 'seconds': 0,
+            }
+            attach_stats(job, result)
+            results.append(result)
+        else:
+            pending.append(job)
+    return results, pending, keys
+
+
+def launch(jobs, workers, blender, stats_path, use_cache=True):
+    started = time.time()
+    results, keys = [], {}
+    if use_cache:
+        results, jobs, keys = restore_cached(jobs)
+        if results:
+            print(f"♻️  {len(results)} job(s) restored from the build cache")
+
+    workers = max(1, min(workers, len(jobs))) if jobs else 0
+    results.extend(run_workers(jobs, workers, blender))
+
+    if use_cache:
+        import build_cache
+        by_index = {job['index']: job for job in jobs}
+        for r in results:
+            if r['ok'] and not r.get('cached') and r['index'] in keys:
+                build_cache.store(keys[r['index']], job_outputs(by_index[r['index']]))
+    results.sort(key=lambda r: r['index'])
+    attach_glb_stats(results)
+
+    combined = {
+        'summary': {
+            'jobs': len(results),
+            'ok': sum(1 for r in results if r['ok']),
+            'failed': sum(1 for r in results if not r['ok']),
+            'cached': sum(1 for r in results if r.get('cached')),
+            'workers': workers,
+            'seconds': round(time.time() - started, 2),
+        },
+        'jobs': results,
+    }
+    with open(stats_path, 'w') as f:
+        json.dump(combined, f, indent=2)
+
+    s = combined['summary']
+    print(f"\n✅ {s['ok']}/{s['jobs']} succeeded ({s['cached']} cached) in {s['seconds']}s. Stats saved to {stats_path}")
+    return combined
+
+
+def attach_glb_stats(results):
+    """Size/triangles/draw calls of every output GLB, read from its JSON chunk (no Blender)"""
+    import glb_inspect
+
+    for r in results:
+        if not r['ok'] or not r['output'].endswith('.glb'):
+            continue
+        try:
+            report = glb_inspect.inspect(r['output'])
+        except (OSError, ValueError) as e:
+            r['glb'] = {'error': str(e)}
+            continue
+        r['glb'] = {k: report[k] for k in ('bytes', 'triangles', 'drawCalls', 'materials', 'textureMegapixels')}
+
+
+def run_workers(jobs, workers, blender):
+    if not jobs:
+        return []
+
+    queue_dir = tempfile.mkdtemp(prefix='blender_batch_')
+    os.makedirs(os.path.join(queue_dir, 'pending'))
+    os.makedirs(os.path.join(queue_dir, 'claimed'))
+    for job in jobs:
+        os.makedirs(os.path.dirname(job['output']) or '.', exist_ok=True)
+        with open(os.path.join(queue_dir, 'pending', f"{job['index']:06d}.json"), 'w') as f:
+            json.dump(job, f)
+
+    print(f"🚀 {len(jobs)} jobs on {workers} Blender worker(s)")
+
+    procs = []
+    for w in range(workers):
+        results_path = os.path.join(queue_dir, f"results_{w}.json")
+        cmd = [blender, '--background', '--factory-startup', '--python', os.path.abspath(__file__),
+               '--', '--worker', queue_dir, results_path]
+        procs.append((subprocess.Popen(cmd), results_path))
+
+    results = []
+    for proc, results_path in procs:
+        proc.wait()
+        if os.path.exists(results_path):
+            with open(results_path) as f:
+                results.extend(json.load(f))
+
+    # Jobs a crashed worker claimed but never reported
+    done = {r['index'] for r in results}
+    for job in jobs:
+        if job['index'] not in done:
+            results.append({
+                'index': job['index'], 'script': job['script'], 'input': job['input'],
+                'output': job['output'], 'ok': False, 'error': 'Worker exited before finishing this job',
+            })
+    shutil.rmtree(queue_dir, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run Blender asset scripts over a manifest')
+    parser.add_argument('manifest')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--stats', default=None, help='Combined stats JSON (default: <manifest>_stats.json)')
+    parser.add_argument('--blender', default=os.getenv('BLENDER', 'blender'))
+    parser.add_argument('--no-cache', action='store_true', help='Ignore the content-hash build cache')
+    args = parser.parse_args()
+
+    jobs = load_manifest(args.manifest)
+    if not jobs:
+        print("Manifest has no jobs")
+        sys.exit(1)
+    stats_path = args.stats or os.path.splitext(args.manifest)[0] + '_stats.json'
+    combined = launch(jobs, args.workers, args.blender, stats_path, use_cache=not args.no_cache)
+    sys.exit(0 if combined['summary']['failed'] == 0 else 1)
+
+
+if __name__ == "__main__":
+    if bpy is not None:
+        argv = sys.argv
+        argv = argv[argv.index("--") + 1:] if "--" in argv else []
+        if len(argv) < 3 or argv[0] != '--worker':
+            print("Usage: python3 batch_optimize.py manifest.json [--workers N] (the launcher starts Blender itself)")
+            sys.exit(1)
+        run_worker(argv[1], argv[2])
+    else:
+        main()
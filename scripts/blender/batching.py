@@ -0,0 +1,199 @@
+"""
+Draw-call reduction pass for the Blender optimizers
+
+Every (mesh object, material) pair is one glTF primitive, so one draw call
+on the phone. reduce_draw_calls():
+  1. merges near-identical materials: same textures per input and Principled
+     values within MATERIAL_TOLERANCE, a common result of per-mesh material
+     copies in exported car models
+  2. splits multi-material meshes by material and joins all meshes that
+     share a material into one object per material
+
+Meshes that must stay addressable are left alone: objects tagged with a
+'swappable' custom property, objects whose name matches SWAPPABLE_PATTERNS
+(wheels, aero parts, exhausts, ...), instanced/shared meshes, skinned or
+shape-keyed meshes and objects with children.
+
+Opt-in with MERGE_DRAW_CALLS=1. Draw calls are always counted, so the stats
+sidecar shows them before and after either way. Texture atlasing is not
+done here: it needs a UV re-layout and bake per model.
+"""
+
+import bpy
+import os
+import re
+
+import numpy as np
+
+MERGE_DRAW_CALLS = os.getenv('MERGE_DRAW_CALLS', '').lower() in ('1', 'true', 'yes')
+MATERIAL_TOLERANCE = 0.02
+SWAPPABLE_PATTERNS = re.compile(
+    r'wheel|rim|tire|tyre|brake|caliper|spoiler|wing|lip|splitter|skirt|diffuser|exhaust|hood|bumper|mirror',
+    re.IGNORECASE,
+)
+
+
+def used_material_indices(obj):
+    polys = obj.data.polygons
+    if not len(polys):
+        return set()
+    idx = np.empty(len(polys), dtype=np.int32)
+    polys.foreach_get('material_index', idx)
+    return set(np.unique(idx).tolist())
+
+
+def draw_calls(objects=None):
+    """One per material actually used by each mesh object"""
+    objects = objects if objects is not None else [obj for obj in bpy.context.scene.objects if obj.type == 'MESH']
+    return sum(len(used_material_indices(obj)) for obj in objects if obj.type == 'MESH')
+
+
+def _material_signature(mat):
+    """Hashable description: rounded Principled values plus the image feeding each input"""
+    if mat is None or not mat.use_nodes or not mat.node_tree:
+        return ('unique', mat.name if mat else None)
+    bsdf = next((n for n in mat.node_tree.nodes if n.type == 'BSDF_PRINCIPLED'), None)
+    if bsdf is None:
+        return ('unique', mat.name)
+
+    def quantize(v):
+        return round(v / MATERIAL_TOLERANCE)
+
+    parts = [mat.blend_method, mat.use_backface_culling]
+    for socket in bsdf.inputs:
+        if socket.is_linked:
+            images = []
+            stack = [socket.links[0].from_node]
+            while stack:
+                node = stack.pop()
+                if node.type == 'TEX_IMAGE':
+                    images.append(node.image.name if node.image else None)
+                stack.extend(link.from_node for i in node.inputs for link in i.links)
+            parts.append((socket.name, tuple(sorted(str(i) for i in images))))
+        elif hasattr(socket, 'default_value'):
+            value = socket.default_value
+            if isinstance(value, (int, float)):
+                parts.append((socket.name, quantize(value)))
+            elif hasattr(value, '__len__'):
+                parts.append((socket.name, tuple(quantize(v) for v in value)))
+    return tuple(parts)
+
+
+def merge_materials():
+    """Point all slots at one material per signature; returns the number of materials merged away"""
+    canonical = {}
+    replace = {}
+    for mat in bpy.data.materials:
+        if mat.users == 0:
+            continue
+        sig = _material_signature(mat)
+        if sig in canonical:
+            replace[mat.name] = canonical[sig]
+        else:
+            canonical[sig] = mat
+    if not replace:
+        return 0
+
+    for obj in bpy.context.scene.objects:
+        if obj.type != 'MESH':
+            continue
+        for slot in obj.material_slots:
+            if slot.material and slot.material.name in replace:
+                slot.material = replace[slot.material.name]
+        _collapse_duplicate_slots(obj)
+    print(f"Merged {len(replace)} near-identical material(s)")
+    return len(replace)
+
+
+def _collapse_duplicate_slots(obj):
+    """Polygons on two slots with the same material would still export as two primitives"""
+    first = {}
+    remap = []
+    for i, slot in enumerate(obj.material_slots):
+        key = slot.material.name if slot.material else None
+        remap.append(first.setdefault(key, i))
+    if remap == list(range(len(remap))) or not len(obj.data.polygons):
+        return
+    idx = np.empty(len(obj.data.polygons), dtype=np.int32)
+    obj.data.polygons.foreach_get('material_index', idx)
+    idx = np.asarray(remap, dtype=np.int32)[np.clip(idx, 0, len(remap) - 1)]
+    obj.data.polygons.foreach_set('material_index', idx)
+    obj.data.update()
+
+
+def is_swappable(obj):
+    return bool(obj.get('swappable')) or bool(SWAPPABLE_PATTERNS.search(obj.name))
+
+
+def _batchable(obj):
+    return (
+        obj.type == 'MESH'
+        and not is_swappable(obj)
+        and obj.data.users == 1
+        and not obj.children
+        and obj.data.shape_keys is None
+        and not (obj.parent and obj.parent.type == 'ARMATURE')
+        and len(obj.data.polygons) > 0
+    )
+
+
+def _select_only(objs, active):
+    bpy.ops.object.select_all(action='DESELECT')
+    for obj in objs:
+        obj.select_set(True)
+    bpy.context.view_layer.objects.active = active
+
+
+def join_by_material():
+    """One object per material for every batchable mesh; returns (objects joined, objects created)"""
+    candidates = [obj for obj in bpy.context.scene.objects if _batchable(obj)]
+
+    # Split multi-material meshes so each piece has exactly one material
+    pieces = []
+    for obj in candidates:
+        if len(used_material_indices(obj)) > 1:
+            _select_only([obj], obj)
+            bpy.ops.object.mode_set(mode='EDIT')
+            bpy.ops.mesh.select_all(action='SELECT')
+            bpy.ops.mesh.separate(type='MATERIAL')
+            bpy.ops.object.mode_set(mode='OBJECT')
+            pieces.extend(o for o in bpy.context.selected_objects if o.type == 'MESH')
+        else:
+            pieces.append(obj)
+
+    groups = {}
+    for obj in pieces:
+        used = used_material_indices(obj)
+        mat = obj.material_slots[used.pop()].material if used and obj.material_slots else None
+        groups.setdefault(mat.name if mat else None, []).append(obj)
+
+    joined = 0
+    created = 0
+    for mat_name, objs in groups.items():
+        if len(objs) < 2:
+            continue
+        active = objs[0]
+        _select_only(objs, active)
+        bpy.ops.object.join()
+        active.name = f"Batch_{mat_name or 'NoMaterial'}"
+        joined += len(objs)
+        created += 1
+    bpy.ops.object.select_all(action='DESELECT')
+    return joined, created
+
+
+def reduce_draw_calls(enabled=None):
+    """Run the pass (when enabled) and return the draw-call report for the stats JSON"""
+    enabled = MERGE_DRAW_CALLS if enabled is None else enabled
+    before = draw_calls()
+    report = {'enabled': enabled, 'before': before, 'after': before}
+    if not enabled:
+        return report
+
+    report['materialsMerged'] = merge_materials()
+    report['meshesJoined'], report['batches'] = join_by_material()
+    report['kept'] = sorted(obj.name for obj in bpy.context.scene.objects
+                            if obj.type == 'MESH' and not _batchable(obj))
+    report['after'] = draw_calls()
+    print(f"Draw calls: {before} -> {report['after']}")
+    return report
@@ -0,0 +1,136 @@
+"""
+Content-hash build cache for the Blender asset scripts (plain Python, no bpy needed)
+
+Key = sha256(script name + script source + input file bytes + parameters), so a
+GLB is only reprocessed when the input, the script code (which holds the
+Draco/texture settings) or the arguments change. An entry stores the output GLB
+and its sidecars (_stats.json, _meta.json, _anchors.json, ...). On a hit they
+are copied back to the requested output paths.
+
+Cache location: $ASSET_BUILD_CACHE (default ~/.cache/carguy/asset-build)
+Disable: ASSET_BUILD_CACHE=off
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.expanduser(os.getenv('ASSET_BUILD_CACHE', '~/.cache/carguy/asset-build'))
+
+# Local modules each script imports; their source is part of the key
+_OPTIMIZER_DEPS = ['triangle_budget', 'mesh_stats', 'textures', 'lod', 'instancing', 'batching']
+SCRIPT_DEPS = {
+    'asset_pipeline': ['optimize_car_model', 'add_anchors', 'extract_anchor_metadata'] + _OPTIMIZER_DEPS,
+    'optimize_car_model': _OPTIMIZER_DEPS,
+    'optimize_for_mobile': _OPTIMIZER_DEPS,
+    'optimize_part': ['optimize_car_model'] + _OPTIMIZER_DEPS,
+    'optimize_to_size': ['triangle_budget', 'mesh_stats', 'textures'],
+    'optimize_models': ['textures', 'mesh_stats'],  # base-models-test/optimize_models.py
+    'add_anchors': ['mesh_stats'],
+    'render_thumbnails': ['mesh_stats'],
+}
+
+
+def enabled():
+    return CACHE_DIR.lower() not in ('off', '0', 'false', '')
+
+
+def file_hash(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def script_version(script):
+    """
+    Hash of the script's source plus the local modules it imports.
+    script is a name in this directory ('optimize_part') or a path to a .py file.
+    """
+    name = os.path.splitext(os.path.basename(script))[0]
+    paths = [script if script.endswith('.py') else os.path.join(SCRIPT_DIR, f"{name}.py")]
+    paths += [os.path.join(SCRIPT_DIR, f"{dep}.py") for dep in SCRIPT_DEPS.get(name, [])]
+
+    h = hashlib.sha256()
+    for path in paths:
+        h.update(os.path.basename(path).encode())
+        h.update(file_hash(path).encode())
+    return h.hexdigest()
+
+
+def cache_key(script, input_path, params, version=None):
+    payload = {
+        'script': os.path.splitext(os.path.basename(script))[0],
+        'version': version or script_version(script),
+        'input': file_hash(input_path),
+        'params': params,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _entry_dir(key):
+    return os.path.join(CACHE_DIR, key[:2], key)
+
+
+def restore(key, outputs):
+    """Copy a cached entry to outputs (same order as stored). False on miss."""
+    entry = _entry_dir(key)
+    manifest_path = os.path.join(entry, 'manifest.json')
+    if not os.path.exists(manifest_path):
+        return False
+    with open(manifest_path) as f:
+        stored = json.load(f)['files']
+    if len(stored) != len(outputs) or not all(os.path.exists(os.path.join(entry, n)) for n in stored):
+        return False
+
+    for name, dst in zip(stored, outputs):
+        os.makedirs(os.path.dirname(os.path.abspath(dst)), exist_ok=True)
+        shutil.copy2(os.path.join(entry, name), dst)
+    return True
+
+
+def store(key, outputs):
+    """Save outputs under key; files that were not produced are skipped (entry not written)"""
+    if not all(os.path.exists(p) for p in outputs):
+        return False
+    entry = _entry_dir(key)
+    tmp = f"{entry}.tmp{os.getpid()}"
+    os.makedirs(tmp, exist_ok=True)
+    names = []
+    for i, src in enumerate(outputs):
+        name = f"{i}_{os.path.basename(src)}"
+        shutil.copy2(src, os.path.join(tmp, name))
+        names.append(name)
+    with open(os.path.join(tmp, 'manifest.json'), 'w') as f:
+        json.dump({'files': names}, f, indent=2)
+
+    # Publish atomically so a concurrent reader never sees a partial entry
+    shutil.rmtree(entry, ignore_errors=True)
+    try:
+        os.replace(tmp, entry)
+    except OSError:
+        # Another process published the same key first
+        shutil.rmtree(tmp, ignore_errors=True)
+    return True
+
+
+def run_cached(script, input_path, outputs, params, fn):
+    """
+    Restore outputs from the cache or call fn() and store what it produced.
+    Returns True on a cache hit.
+    """
+    if not enabled():
+        fn()
+        return False
+
+    key = cache_key(script, input_path, params)
+    if restore(key, outputs):
+        print(f"♻️  Cache hit for {os.path.basename(input_path)} ({key[:12]}), outputs restored")
+        return True
+
+    fn()
+    store(key, outputs)
+    return False
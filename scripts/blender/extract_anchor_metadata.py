@@ -8,16 +8,8 @@ import sys
 import json
 import os
 
-def extract_anchors_from_glb(input_path, output_json):
-    """Extract all ANCHOR_* empties from GLB and save as JSON"""
-    
-    # Clear scene
-    bpy.ops.object.select_all(action='SELECT')
-    bpy.ops.object.delete()
-    
-    # Import GLB
-    print(f"Importing {input_path}...")
-    bpy.ops.import_scene.gltf(filepath=input_path)
+def collect_anchors():
+    """Anchor metadata for every ANCHOR_* empty in the current scene"""
     
     # Find all empties with ANCHOR_ prefix
     anchors = {}
@@ -49,13 +41,32 @@ def extract_anchors_from_glb(input_path, output_json):
             'anchorsVersion': 'v1',
             'anchorCount': anchor_count
         }
-    
-    # Write JSON
+    return output_data
+
+
+def write_anchor_json(output_data, output_json):
     with open(output_json, 'w') as f:
         json.dump(output_data, f, indent=2)
     
-    print(f"\n✅ Extracted {anchor_count} anchors to {output_json}")
-    return anchor_count
+    print(f"\n✅ Extracted {output_data['anchorCount']} anchors to {output_json}")
+
+
+def extract_anchors_from_glb(input_path, output_json):
+    """Extract all ANCHOR_* empties from GLB and save as JSON"""
+    
+    # Clear scene
+    bpy.ops.object.select_all(action='SELECT')
+    bpy.ops.object.delete()
+    
+    # Import GLB
+    print(f"Importing {input_path}...")
+    bpy.ops.import_scene.gltf(filepath=input_path)
+    
+    output_data = collect_anchors()
+    
+    # Write JSON
+    write_anchor_json(output_data, output_json)
+    return output_data['anchorCount']
 
 if __name__ == "__main__":
     argv = sys.argv
@@ -19,15 +19,19 @@ def create_wheel(output_dir):
     rim = bpy.context.active_object
     rim.name = "Rim"
     
-    # Spokes (simple cubes)
+    # Spokes (simple cubes): one mesh, linked copies so the GLB stores it once
+    bpy.context.view_layer.update()
+    spoke_mesh = None
     for i in range(5):
         angle = (2 * math.pi * i) / 5
-        bpy.ops.mesh.primitive_cube_add(size=0.05, location=(0, 0, 0))
-        spoke = bpy.context.active_object
-        spoke.scale = (1, 4, 1)
-        spoke.rotation_euler = (angle, 0, 0) # Rotate around X since wheel faces X
-        # Fix rotation - local rotation around X axis of the wheel?
-        # Wheel axis is X. Spokes should radiate in YZ plane.
+        if spoke_mesh is None:
+            bpy.ops.mesh.primitive_cube_add(size=0.05, location=(0, 0, 0))
+            spoke = bpy.context.active_object
+            spoke_mesh = spoke.data
+        else:
+            spoke = bpy.data.objects.new(f"Spoke.{i:03d}", spoke_mesh)
+            bpy.context.collection.objects.link(spoke)
+        # Wheel axis is X. Spokes radiate in the YZ plane.
         spoke.rotation_euler = (angle, 0, 0)
         
         # Position spoke
@@ -35,11 +39,11 @@ def create_wheel(output_dir):
         z = 0.12 * math.sin(angle)
         spoke.location = (0, y, z)
         spoke.scale = (0.5, 0.22, 0.1)
+        
+        # Parent instead of join (join would copy the geometry 5 times)
+        spoke.parent = rim
+        spoke.matrix_parent_inverse = rim.matrix_world.inverted()
 
-    # Join
-    bpy.ops.object.select_all(action='SELECT')
-    bpy.ops.object.join()
-    
     # Export
     out_path = os.path.join(output_dir, "wheel_aftermarket_01.glb")
     bpy.ops.export_scene.gltf(filepath=out_path)
@@ -82,15 +86,22 @@ def create_diffuser(output_dir):
     base = bpy.context.active_object
     base.scale = (0.3, 0.8, 0.05)
     
-    # Fins
+    # Fins: one mesh, linked copies parented to the base
+    bpy.context.view_layer.update()
+    fin_mesh = None
     for i in range(4):
         y_pos = -0.3 + (i * 0.2)
-        bpy.ops.mesh.primitive_cube_add(size=1, location=(0, y_pos, -0.05))
-        fin = bpy.context.active_object
+        if fin_mesh is None:
+            bpy.ops.mesh.primitive_cube_add(size=1, location=(0, y_pos, -0.05))
+            fin = bpy.context.active_object
+            fin_mesh = fin.data
+        else:
+            fin = bpy.data.objects.new(f"Fin.{i:03d}", fin_mesh)
+            bpy.context.collection.objects.link(fin)
+            fin.location = (0, y_pos, -0.05)
         fin.scale = (0.2, 0.02, 0.1)
-    
-    bpy.ops.object.select_all(action='SELECT')
-    bpy.ops.object.join()
+        fin.parent = base
+        fin.matrix_parent_inverse = base.matrix_world.inverted()
     
     # Export
     out_path = os.path.join(output_dir, "rear_diffuser_01.glb")
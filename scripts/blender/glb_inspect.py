@@ -0,0 +1,367 @@
+"""
+Headless GLB inspector (plain Python, no Blender, no geometry decode)
+Usage:
+  python3 scripts/blender/glb_inspect.py model.glb [--anchors anchors.json]
+  python3 scripts/blender/glb_inspect.py --catalog assets/optimized-models [--out catalog.json]
+      [--max-triangles N] [--max-mb N] [--require-anchors]
+
+Reads only the GLB JSON chunk and the first bytes of each embedded image,
+through mmap. Triangle counts come from accessor counts (valid for Draco
+primitives too, since the spec requires the accessor metadata). No vertex
+data is touched, so a whole catalog takes seconds.
+
+Reports nodes, meshes, primitives, triangles and draw calls (both counted
+per node instance), materials, texture dimensions, extensions and ANCHOR_*
+transforms. --anchors writes the same JSON as extract_anchor_metadata.py.
+Positions are converted from glTF Y-up to Blender Z-up: (x, -z, y).
+
+With limits set, exits 1 when any model breaks them (for CI).
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+GLB_MAGIC = b'glTF'
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+# Primitive mode -> triangles from an index/vertex count
+_TRIANGLES = {
+    4: lambda n: n // 3,            # TRIANGLES
+    5: lambda n: max(0, n - 2),     # TRIANGLE_STRIP
+    6: lambda n: max(0, n - 2),     # TRIANGLE_FAN
+}
+
+
+# ---------------------------
+# Container
+# ---------------------------
+class GLB:
+    """Parsed JSON chunk plus a memoryview of the BIN chunk (mapped, not read)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.size = os.path.getsize(path)
+        self._file = open(path, 'rb')
+        self._map = None
+        self._view = None
+        self.bin = None
+        try:
+            if path.endswith('.gltf'):
+                self.json = json.load(self._file)
+                return
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            view = self._view = memoryview(self._map)
+            magic, version, length = struct.unpack_from('<4sII', view, 0)
+            if magic != GLB_MAGIC or version != 2:
+                raise ValueError(f"{path}: not a glTF 2.0 binary")
+            json_len, json_type = struct.unpack_from('<II', view, 12)
+            if json_type != CHUNK_JSON:
+                raise ValueError(f"{path}: first chunk is not JSON")
+            self.json = json.loads(bytes(view[20:20 + json_len]))
+            offset = 20 + json_len
+            if offset + 8 <= min(length, self.size):
+                bin_len, bin_type = struct.unpack_from('<II', view, offset)
+                if bin_type == CHUNK_BIN:
+                    self.bin = view[offset + 8:offset + 8 + bin_len]
+        except Exception:
+            self.close()
+            raise
+
+    def buffer_view_bytes(self, index, limit=None):
+        """Bytes of a bufferView in the BIN chunk (only the first `limit` bytes)"""
+        bv = self.json['bufferViews'][index]
+        if self.bin is None or bv.get('buffer', 0) != 0:
+            return None
+        start = bv.get('byteOffset', 0)
+        end = start + bv['byteLength']
+        if limit is not None:
+            end = min(end, start + limit)
+        return bytes(self.bin[start:end])
+
+    def close(self):
+        if self.bin is not None:
+            self.bin.release()
+            self.bin = None
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ---------------------------
+# Image headers
+# ---------------------------
+def image_size(header):
+    """(width, height, format) from the first bytes of a PNG/JPEG/WebP/KTX2 file"""
+    if header is None:
+        return None
+    if header[:8] == b'\x89PNG\r\n\x1a\n' and len(header) >= 24:
+        w, h = struct.unpack('>II', header[16:24])
+        return w, h, 'png'
+    if header[:12] == b'\xabKTX 20\xbb\r\n\x1a\n' and len(header) >= 28:
+        w, h = struct.unpack_from('<II', header, 20)
+        return w, h, 'ktx2'
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP' and len(header) >= 30:
+        kind = header[12:16]
+        if kind == b'VP8 ':
+            w, h = struct.unpack_from('<HH', header, 26)
+            return w & 0x3FFF, h & 0x3FFF, 'webp'
+        if kind == b'VP8L':
+            b = header[21:25]
+            w = 1 + (((b[1] & 0x3F) << 8) | b[0])
+            h = 1 + (((b[3] & 0xF) << 10) | (b[2] << 2) | ((b[1] & 0xC0) >> 6))
+            return w, h, 'webp'
+        if kind == b'VP8X':
+            w = 1 + int.from_bytes(header[24:27], 'little')
+            h = 1 + int.from_bytes(header[27:30], 'little')
+            return w, h, 'webp'
+    if header[:2] == b'\xff\xd8':
+        i = 2
+        while i + 9 < len(header):
+            if header[i] != 0xFF:
+                i += 1
+                continue
+            marker = header[i + 1]
+            if marker in (0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF):
+                h, w = struct.unpack('>HH', header[i + 5:i + 9])
+                return w, h, 'jpeg'
+            if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+                i += 2
+                continue
+            i += 2 + struct.unpack('>H', header[i + 2:i + 4])[0]
+    return None
+
+
+def _image_header(glb, image, limit):
+    if 'bufferView' in image:
+        return glb.buffer_view_bytes(image['bufferView'], limit)
+    uri = image.get('uri', '')
+    if uri.startswith('data:'):
+        return None
+    path = os.path.join(os.path.dirname(glb.path), uri)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return f.read(limit)
+
+
+# ---------------------------
+# Transforms (column-major 4x4 as in glTF)
+# ---------------------------
+def _matmul(a, b):
+    return [sum(a[k * 4 + r] * b[c * 4 + k] for k in range(4)) for c in range(4) for r in range(4)]
+
+
+def node_matrix(node):
+    if 'matrix' in node:
+        return list(node['matrix'])
+    tx, ty, tz = node.get('translation', [0, 0, 0])
+    qx, qy, qz, qw = node.get('rotation', [0, 0, 0, 1])
+    sx, sy, sz = node.get('scale', [1, 1, 1])
+    return [
+        (1 - 2 * (qy * qy + qz * qz)) * sx, (2 * (qx * qy + qz * qw)) * sx, (2 * (qx * qz - qy * qw)) * sx, 0,
+        (2 * (qx * qy - qz * qw)) * sy, (1 - 2 * (qx * qx + qz * qz)) * sy, (2 * (qy * qz + qx * qw)) * sy, 0,
+        (2 * (qx * qz + qy * qw)) * sz, (2 * (qy * qz - qx * qw)) * sz, (1 - 2 * (qx * qx + qy * qy)) * sz, 0,
+        tx, ty, tz, 1,
+    ]
+
+
+def world_matrices(gltf):
+    """{node index: world matrix} for every node reachable from the scenes"""
+    nodes = gltf.get('nodes', [])
+    world = {}
+    scenes = gltf.get('scenes') or [{'nodes': [i for i in range(len(nodes))]}]
+    children = {c for n in nodes for c in n.get('children', [])}
+    roots = [i for s in scenes for i in s.get('nodes', []) if i not in children]
+    stack = [(i, [1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1]) for i in roots]
+    while stack:
+        i, parent = stack.pop()
+        if i in world:
+            continue
+        world[i] = _matmul(parent, node_matrix(nodes[i]))
+        stack.extend((c, world[i]) for c in nodes[i].get('children', []))
+    return world
+
+
+def to_blender(x, y, z):
+    """glTF Y-up -> Blender Z-up"""
+    return x, -z, y
+
+
+# ---------------------------
+# Report
+# ---------------------------
+def primitive_triangles(gltf, prim):
+    mode = prim.get('mode', 4)
+    if mode not in _TRIANGLES:
+        return 0
+    accessors = gltf.get('accessors', [])
+    if 'indices' in prim:
+        count = accessors[prim['indices']]['count']
+    elif 'POSITION' in prim.get('attributes', {}):
+        count = accessors[prim['attributes']['POSITION']]['count']
+    else:
+        return 0
+    return _TRIANGLES[mode](count)
+
+
+def collect_anchors(gltf, world=None):
+    """Same structure as extract_anchor_metadata.collect_anchors (local position, Blender axes)"""
+    world = world if world is not None else world_matrices(gltf)
+    anchors = {}
+    anchors_world = {}
+    for i, node in enumerate(gltf.get('nodes', [])):
+        name = node.get('name', '')
+        if not name.startswith('ANCHOR_'):
+            continue
+        local = node_matrix(node)
+        x, y, z = to_blender(*local[12:15])
+        anchors[name] = {'x': round(x, 4), 'y': round(y, 4), 'z': round(z, 4)}
+        if i in world:
+            wx, wy, wz = to_blender(*world[i][12:15])
+            anchors_world[name] = {'x': round(wx, 4), 'y': round(wy, 4), 'z': round(wz, 4)}
+    return {
+        'anchorPoints': anchors,
+        'anchorsVersion': 'v1',
+        'anchorCount': len(anchors),
+    }, anchors_world
+
+
+def inspect(path, header_bytes=64 * 1024):
+    """Stats dict for one .glb/.gltf"""
+    with GLB(path) as glb:
+        gltf = glb.json
+        meshes = gltf.get('meshes', [])
+        nodes = gltf.get('nodes', [])
+        world = world_matrices(gltf)
+
+        mesh_tris = [sum(primitive_triangles(gltf, p) for p in m.get('primitives', [])) for m in meshes]
+        instances = [0] * len(meshes)
+        for i, node in enumerate(nodes):
+            if 'mesh' in node and i in world:
+                gpu = node.get('extensions', {}).get('EXT_mesh_gpu_instancing')
+                count = 1
+                if gpu and gpu.get('attributes'):
+                    count = gltf['accessors'][next(iter(gpu['attributes'].values()))]['count']
+                instances[node['mesh']] += count
+
+        textures = []
+        for i, image in enumerate(gltf.get('images', [])):
+            size = image_size(_image_header(glb, image, header_bytes))
+            entry = {'name': image.get('name', f'image_{i}'), 'mimeType': image.get('mimeType')}
+            if 'bufferView' in image:
+                entry['bytes'] = gltf['bufferViews'][image['bufferView']]['byteLength']
+            if size:
+                entry['width'], entry['height'], entry['format'] = size
+            textures.append(entry)
+
+        anchors, anchors_world = collect_anchors(gltf, world)
+        used = gltf.get('extensionsUsed', [])
+        return {
+            'file': os.path.basename(path),
+            'bytes': glb.size,
+            'nodes': len(nodes),
+            'meshes': len(meshes),
+            'primitives': sum(len(m.get('primitives', [])) for m in meshes),
+            'triangles': sum(t * n for t, n in zip(mesh_tris, instances)),
+            'uniqueTriangles': sum(mesh_tris),
+            'drawCalls': sum(len(m.get('primitives', [])) * n for m, n in zip(meshes, instances)),
+            'materials': len(gltf.get('materials', [])),
+            'textures': textures,
+            'textureMegapixels': round(sum(t.get('width', 0) * t.get('height', 0) for t in textures) / 1e6, 2),
+            'draco': 'KHR_draco_mesh_compression' in used,
+            'extensionsUsed': used,
+            'anchors': anchors,
+            'anchorsWorld': anchors_world,
+        }
+
+
+def check(report, max_triangles=None, max_mb=None, require_anchors=False):
+    """List of problems with one report against the given limits"""
+    problems = []
+    if max_triangles and report['triangles'] > max_triangles:
+        problems.append(f"{report['triangles']} triangles > {max_triangles}")
+    if max_mb and report['bytes'] > max_mb * 1024 * 1024:
+        problems.append(f"{report['bytes'] / (1024 * 1024):.2f} MB > {max_mb} MB")
+    if require_anchors and report['anchors']['anchorCount'] == 0:
+        problems.append("no ANCHOR_* nodes")
+    return problems
+
+
+def inspect_catalog(root, workers=8):
+    paths = sorted(
+        os.path.join(d, f) for d, _, files in os.walk(root) for f in files if f.endswith(('.glb', '.gltf'))
+    )
+
+    def one(path):
+        try:
+            report = inspect(path)
+        except Exception as e:
+            report = {'file': os.path.basename(path), 'error': str(e)}
+        report['path'] = os.path.relpath(path, root)
+        return report
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(one, paths))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect GLB files without Blender')
+    parser.add_argument('input', nargs='?', help='.glb/.gltf file')
+    parser.add_argument('--catalog', help='Directory to scan recursively')
+    parser.add_argument('--anchors', help='Write anchor JSON (extract_anchor_metadata.py format)')
+    parser.add_argument('--out', help='Write the report JSON here instead of stdout')
+    parser.add_argument('--max-triangles', type=int)
+    parser.add_argument('--max-mb', type=float)
+    parser.add_argument('--require-anchors', action='store_true')
+    args = parser.parse_args()
+
+    if not args.input and not args.catalog:
+        parser.print_usage()
+        sys.exit(1)
+
+    reports = inspect_catalog(args.catalog) if args.catalog else [inspect(args.input)]
+    if args.anchors and args.input:
+        with open(args.anchors, 'w') as f:
+            json.dump(reports[0]['anchors'], f, indent=2)
+        print(f"✅ Extracted {reports[0]['anchors']['anchorCount']} anchors to {args.anchors}", file=sys.stderr)
+
+    failed = 0
+    for report in reports:
+        problems = ['unreadable: ' + report['error']] if 'error' in report else check(
+            report, args.max_triangles, args.max_mb, args.require_anchors)
+        if problems:
+            report['problems'] = problems
+            failed += 1
+            print(f"❌ {report.get('path', report['file'])}: {'; '.join(problems)}", file=sys.stderr)
+
+    output = reports if args.catalog else reports[0]
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(output, f, indent=2)
+    else:
+        print(json.dumps(output, indent=2))
+
+    if args.catalog:
+        total_tris = sum(r.get('triangles', 0) for r in reports)
+        print(f"{len(reports)} models, {total_tris} triangles, {failed} with problems", file=sys.stderr)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
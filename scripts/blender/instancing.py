@@ -0,0 +1,131 @@
+"""
+Geometry deduplication / instancing pass for the Blender optimizers
+
+Car models often ship repeated geometry (four wheels, lug nuts, badges) as
+separate mesh copies, each baked in place. instance_meshes() finds meshes
+that are identical up to translation and uniform scale. It points their
+objects at one shared mesh data-block and moves the offset into each
+object's transform. The exporter then writes the geometry once, and
+decimation (triangle_budget.py) runs once per unique mesh.
+
+Matching: same topology (loop vertex indices), materials and UVs, and
+vertex positions equal after removing centroid and RMS scale (within
+TOLERANCE of the mesh size). Rotated and mirrored copies are left alone.
+Objects with children, shape keys, modifiers or an armature parent are
+skipped so their deformation/hierarchy can't change.
+
+GPU_INSTANCING=1 additionally exports with EXT_mesh_gpu_instancing
+(export_gpu_instances). The exporter only collapses instances that are
+children of the same Empty, and the collapsed nodes lose their individual
+names. It stays opt-in because the app addresses some parts by node name.
+"""
+
+import bpy
+import hashlib
+import os
+
+import numpy as np
+from mathutils import Matrix, Vector
+
+TOLERANCE = 1e-4
+GPU_INSTANCING = os.getenv('GPU_INSTANCING', '').lower() in ('1', 'true', 'yes')
+
+
+def _eligible(obj):
+    return (
+        obj.type == 'MESH'
+        and not obj.children
+        and not obj.modifiers
+        and obj.data.shape_keys is None
+        and not (obj.parent and obj.parent.type == 'ARMATURE')
+        and len(obj.data.vertices) > 0
+    )
+
+
+def _geometry(mesh):
+    """(centroid, rms scale, normalized coords, signature) for a mesh data-block"""
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float64)
+    mesh.vertices.foreach_get('co', co)
+    co = co.reshape(-1, 3)
+    centroid = co.mean(axis=0)
+    offsets = co - centroid
+    scale = float(np.sqrt((offsets ** 2).sum(axis=1).mean())) or 1.0
+    normalized = offsets / scale
+
+    loops = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get('vertex_index', loops)
+
+    h = hashlib.sha256()
+    h.update(f"{len(mesh.vertices)}/{len(mesh.polygons)}/{len(mesh.loops)}".encode())
+    h.update(loops.tobytes())
+    h.update('|'.join(m.name if m else '' for m in mesh.materials).encode())
+    for layer in mesh.uv_layers:
+        uv = np.empty(len(mesh.loops) * 2, dtype=np.float32)
+        layer.data.foreach_get('uv', uv)
+        h.update(np.round(uv, 5).tobytes())
+    h.update(np.round(normalized / TOLERANCE / 10).astype(np.int64).tobytes())
+    return centroid, scale, normalized, h.hexdigest()
+
+
+def instance_meshes(objects=None):
+    """
+    Share mesh data between equivalent objects. Returns the report for the
+    stats JSON: groups of object names now sharing one mesh, and how many
+    mesh data-blocks/vertices were removed.
+    """
+    objects = objects if objects is not None else [obj for obj in bpy.context.scene.objects if obj.type == 'MESH']
+
+    # One entry per distinct data-block; objects already sharing data stay together
+    by_data = {}
+    for obj in objects:
+        if _eligible(obj):
+            by_data.setdefault(obj.data.name, []).append(obj)
+
+    buckets = {}
+    geometry = {}
+    for name, objs in by_data.items():
+        geometry[name] = _geometry(objs[0].data)
+        buckets.setdefault(geometry[name][3], []).append(name)
+
+    groups = []
+    removed = 0
+    vertices_saved = 0
+    for names in buckets.values():
+        if len(names) < 2:
+            continue
+        # Keep the most-used data-block
+        names.sort(key=lambda n: len(by_data[n]), reverse=True)
+        keep = names[0]
+        c_a, s_a, n_a, _ = geometry[keep]
+        mesh = by_data[keep][0].data
+        members = [obj.name for obj in by_data[keep]]
+
+        for name in names[1:]:
+            c_b, s_b, n_b, _ = geometry[name]
+            if not np.allclose(n_a, n_b, atol=TOLERANCE):
+                continue  # hash collision after rounding
+            old = by_data[name][0].data
+            for obj in by_data[name]:
+                # world(v_b) == world'(v_a) with v_b = c_b + s_b / s_a * (v_a - c_a)
+                obj.matrix_world = (
+                    obj.matrix_world
+                    @ Matrix.Translation(Vector(c_b))
+                    @ Matrix.Scale(s_b / s_a, 4)
+                    @ Matrix.Translation(-Vector(c_a))
+                )
+                obj.data = mesh
+                members.append(obj.name)
+            vertices_saved += len(old.vertices)
+            if old.users == 0:
+                bpy.data.meshes.remove(old)
+                removed += 1
+
+        if len(members) > len(by_data[keep]):
+            groups.append({'mesh': mesh.name, 'objects': members})
+            print(f"Instanced {len(members)} objects on mesh {mesh.name}")
+
+    return {
+        'groups': groups,
+        'meshesRemoved': removed,
+        'verticesSaved': vertices_saved,
+    }
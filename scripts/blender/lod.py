@@ -0,0 +1,62 @@
+"""
+LOD chain export for the Blender optimizers
+
+After an optimizer has exported its main GLB (LOD0), export_lods() decimates
+the same in-memory scene further and writes output_lod1.glb, output_lod2.glb, ...
+No re-import is needed. Each level's triangle budget is a fraction of LOD0,
+split across meshes by screen-space importance (triangle_budget.py). Each
+level also halves the texture caps, so a low LOD really is a small first
+download for thumbnails and far views. The app streams the lowest LOD and
+upgrades.
+
+Ratios: LOD_RATIOS=1.0,0.4,0.1 (default; LOD0 first). LOD_RATIOS=1.0 disables.
+Blender's glTF exporter has no MSFT_lod support, so levels are separate files.
+"""
+
+import os
+
+LOD_RATIOS = [float(r) for r in os.getenv('LOD_RATIOS', '1.0,0.4,0.1').split(',') if r.strip()]
+LOD_MIN_TRIANGLES = 12  # keep small meshes (badges, bolts) from collapsing to nothing
+
+
+def lod_paths(output_path, ratios=None):
+    """Paths of the extra LOD files (LOD0 is output_path itself); importable without bpy"""
+    ratios = LOD_RATIOS if ratios is None else ratios
+    return [output_path.replace('.glb', f'_lod{i}.glb') for i in range(1, len(ratios))]
+
+
+def export_lods(output_path, export, texture_size=2048, ratios=None):
+    """
+    Write LOD1..N from the current scene (already exported as LOD0).
+    export(path) writes the scene with the caller's usual settings.
+    Leaves the scene at the lowest LOD, so call it last.
+    Returns the per-level report for the sidecar JSON.
+    """
+    import bpy
+    from triangle_budget import decimate_to_budget, mesh_triangles
+    from textures import optimize_textures
+
+    ratios = LOD_RATIOS if ratios is None else ratios
+    meshes = [obj for obj in bpy.context.scene.objects if obj.type == 'MESH']
+    base_tris = sum(mesh_triangles(obj) for obj in meshes)
+
+    lods = [{
+        'level': 0,
+        'ratio': 1.0,
+        'path': os.path.basename(output_path),
+        'triangles': base_tris,
+        'bytes': os.path.getsize(output_path),
+    }]
+    for level, (ratio, path) in enumerate(zip(ratios[1:], lod_paths(output_path, ratios)), start=1):
+        decimate_to_budget(meshes, int(base_tris * ratio), min_triangles=LOD_MIN_TRIANGLES)
+        optimize_textures(max(256, texture_size >> level))
+        export(path)
+        lods.append({
+            'level': level,
+            'ratio': ratio,
+            'path': os.path.basename(path),
+            'triangles': sum(mesh_triangles(obj) for obj in meshes),
+            'bytes': os.path.getsize(path),
+        })
+        print(f"LOD{level}: {lods[-1]['triangles']} tris, {lods[-1]['bytes'] / (1024 * 1024):.2f} MB -> {path}")
+    return lods
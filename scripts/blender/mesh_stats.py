@@ -0,0 +1,68 @@
+"""
+Vectorized mesh statistics for the Blender scripts
+
+Vertex and polygon data are read with foreach_get into numpy and
+transformed by matrix_world in one step, so bounds are exact world-space
+AABBs (rotation and scale included). The old obj.bound_box + obj.location
+ignored both. Triangle counts are real triangles: an n-gon counts as n - 2,
+not as one polygon.
+"""
+
+import numpy as np
+
+
+def mesh_triangles(obj):
+    """Triangles after triangulation (sum of loop_total - 2 over polygons)"""
+    polys = obj.data.polygons
+    if not len(polys):
+        return 0
+    loop_total = np.empty(len(polys), dtype=np.int32)
+    polys.foreach_get('loop_total', loop_total)
+    return int(loop_total.sum()) - 2 * len(polys)
+
+
+def world_coords(obj):
+    """(n, 3) float64 vertex positions in world space"""
+    verts = obj.data.vertices
+    co = np.empty(len(verts) * 3, dtype=np.float64)
+    verts.foreach_get('co', co)
+    m = np.array(obj.matrix_world, dtype=np.float64)
+    return co.reshape(-1, 3) @ m[:3, :3].T + m[:3, 3]
+
+
+def world_bounds(objects):
+    """
+    Exact world AABB over all vertices of objects:
+    {'min', 'max', 'size', 'center'} as [x, y, z] lists, or None without vertices
+    """
+    lo = np.full(3, np.inf)
+    hi = np.full(3, -np.inf)
+    for obj in objects:
+        if obj.type != 'MESH' or not len(obj.data.vertices):
+            continue
+        co = world_coords(obj)
+        lo = np.minimum(lo, co.min(axis=0))
+        hi = np.maximum(hi, co.max(axis=0))
+    if not np.isfinite(lo).all():
+        return None
+    return {
+        'min': lo.tolist(),
+        'max': hi.tolist(),
+        'size': (hi - lo).tolist(),
+        'center': ((lo + hi) / 2).tolist(),
+    }
+
+
+def mesh_stats(obj):
+    """Per-object numbers for the stats JSON"""
+    return {
+        'name': obj.name,
+        'vertices': len(obj.data.vertices),
+        'polygons': len(obj.data.polygons),
+        'triangles': mesh_triangles(obj),
+        'bounds': world_bounds([obj]),
+    }
+
+
+def scene_triangles(objects):
+    return sum(mesh_triangles(obj) for obj in objects if obj.type == 'MESH')
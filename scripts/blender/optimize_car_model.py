@@ -8,6 +8,53 @@ import sys
 import os
 import json
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from triangle_budget import decimate_to_budget
+from textures import VARIANTS, optimize_textures, variant_paths, write_variants
+from lod import LOD_RATIOS, export_lods, lod_paths
+from instancing import GPU_INSTANCING, instance_meshes
+from batching import MERGE_DRAW_CALLS, reduce_draw_calls
+from mesh_stats import scene_triangles
+
+def scene_stats():
+    """Triangle/mesh/material counts for the current scene"""
+    mesh_objects = [obj for obj in bpy.context.scene.objects if obj.type == 'MESH']
+    return {
+        'triangles': scene_triangles(mesh_objects),
+        'objects': len(mesh_objects),
+        'materials': len(bpy.data.materials)
+    }
+
+
+def decimate_meshes(target_triangles):
+    """Decimate the scene to target_triangles; returns the per-mesh allocation"""
+    mesh_objects = [obj for obj in bpy.context.scene.objects if obj.type == 'MESH']
+    return decimate_to_budget(mesh_objects, target_triangles)
+
+
+def resize_textures(max_size=2048):
+    """Dedupe and downsize textures by role (aspect-preserving, power of two); returns the report"""
+    return optimize_textures(max_size)
+
+
+def export_glb(output_path, image_format='AUTO'):
+    """Export GLB with Draco compression"""
+    print(f"Exporting to {output_path}...")
+    bpy.ops.export_scene.gltf(
+        filepath=output_path,
+        export_format='GLB',
+        export_draco_mesh_compression_enable=True,
+        export_draco_mesh_compression_level=6,
+        export_image_format=image_format,
+        export_texcoords=True,
+        export_normals=True,
+        export_materials='EXPORT',
+        export_colors=True,
+        export_gpu_instances=GPU_INSTANCING
+    )
+
+
 def optimize_model(input_path, output_path, target_triangles=100000):
     """Optimize 3D car model for mobile performance"""
     
@@ -24,13 +71,7 @@ def optimize_model(input_path, output_path, target_triangles=100000):
         sys.exit(1)
     
     # Get stats BEFORE optimization
-    total_tris_before = sum(len(obj.data.polygons) for obj in bpy.context.scene.objects if obj.type == 'MESH')
-    
-    stats_before = {
-        'triangles': total_tris_before,
-        'objects': len([obj for obj in bpy.context.scene.objects if obj.type == 'MESH']),
-        'materials': len(bpy.data.materials)
-    }
+    stats_before = scene_stats()
     
     print(f"BEFORE: {stats_before['triangles']} triangles, {stats_before['objects']} meshes, {stats_before['materials']} materials")
     
@@ -44,51 +85,29 @@ def optimize_model(input_path, output_path, target_triangles=100000):
         # Note: Commenting out join to preserve separate parts for anchors later
         # bpy.ops.object.join()
     
-    # Decimate each mesh
-    for obj in bpy.context.scene.objects:
-        if obj.type == 'MESH':
-            bpy.context.view_layer.objects.active = obj
-            obj.select_set(True)
-            
-            # Add decimate modifier
-            current_tris = len(obj.data.polygons)
-            if current_tris > 10000:  # Only decimate if >10k tris
-                decimate_ratio = min(1.0, target_triangles / (total_tris_before * 1.5))
-                modifier = obj.modifiers.new(name="Decimate", type='DECIMATE')
-                modifier.ratio = decimate_ratio
-                bpy.ops.object.modifier_apply(modifier="Decimate")
-                print(f"Decimated {obj.name}: {current_tris} -> {len(obj.data.polygons)} tris")
+    # Share mesh data between repeated geometry (wheels, lug nuts, badges)
+    instancing = instance_meshes()
+    
+    # Decimate each mesh (budget split by screen-space importance)
+    allocation = decimate_meshes(target_triangles)
     
     # Optimize textures
-    for img in bpy.data.images:
-        if img.size[0] > 2048 or img.size[1] > 2048:
-            print(f"Resizing texture {img.name}: {img.size[0]}x{img.size[1]} -> 2048x2048")
-            img.scale(2048, 2048)
+    textures = resize_textures(2048)
     
-    # Get stats AFTER optimization
-    total_tris_after = sum(len(obj.data.polygons) for obj in bpy.context.scene.objects if obj.type == 'MESH')
+    # Optional: merge meshes/materials to cut draw calls (swappable parts kept)
+    draw_call_report = reduce_draw_calls()
     
-    stats_after = {
-        'triangles': total_tris_after,
-        'objects': len([obj for obj in bpy.context.scene.objects if obj.type == 'MESH']),
-        'materials': len(bpy.data.materials)
-    }
+    # Get stats AFTER optimization
+    stats_after = scene_stats()
     
     print(f"AFTER: {stats_after['triangles']} triangles, {stats_after['objects']} meshes, {stats_after['materials']} materials")
     
     # Export GLB with Draco compression
-    print(f"Exporting to {output_path}...")
-    bpy.ops.export_scene.gltf(
-        filepath=output_path,
-        export_format='GLB',
-        export_draco_mesh_compression_enable=True,
-        export_draco_mesh_compression_level=6,
-        export_image_format='AUTO',
-        export_texcoords=True,
-        export_normals=True,
-        export_materials='EXPORT',
-        export_colors=True
-    )
+    export_glb(output_path)
+    variants = write_variants(output_path, export_glb)
+    
+    # Lower LODs from the same scene (last: leaves the scene decimated)
+    lods = export_lods(output_path, export_glb, 2048)
     
     # Write stats to JSON
     stats_path = output_path.replace('.glb', '_stats.json')
@@ -96,7 +115,14 @@ def optimize_model(input_path, output_path, target_triangles=100000):
         json.dump({
             'before': stats_before,
             'after': stats_after,
-            'reduction_percent': round((1 - stats_after['triangles'] / stats_before['triangles']) * 100, 1)
+            'reduction_percent': round((1 - stats_after['triangles'] / stats_before['triangles']) * 100, 1),
+            'target_triangles': target_triangles,
+            'allocation': allocation,
+            'instancing': instancing,
+            'drawCalls': draw_call_report,
+            'textures': textures,
+            'variants': variants,
+            'lods': lods
         }, f, indent=2)
     
     print(f"✅ Optimization complete! Stats saved to {stats_path}")
@@ -116,4 +142,9 @@ if __name__ == "__main__":
     output_path = argv[1]
     target_triangles = int(argv[2]) if len(argv) > 2 else 100000
     
-    optimize_model(input_path, output_path, target_triangles)
+    from build_cache import run_cached
+    run_cached(__file__, input_path,
+               [output_path, output_path.replace('.glb', '_stats.json')] + variant_paths(output_path) + lod_paths(output_path),
+               {'target_triangles': target_triangles, 'variants': VARIANTS, 'lods': LOD_RATIOS,
+                'gpuInstancing': GPU_INSTANCING, 'mergeDrawCalls': MERGE_DRAW_CALLS},
+               lambda: optimize_model(input_path, output_path, target_triangles))
@@ -8,6 +8,35 @@ import sys
 import os
 import json
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from triangle_budget import decimate_to_budget
+from textures import VARIANTS, optimize_textures, variant_paths, write_variants
+from lod import LOD_RATIOS, export_lods, lod_paths
+from instancing import GPU_INSTANCING, instance_meshes
+from batching import MERGE_DRAW_CALLS, reduce_draw_calls
+from mesh_stats import scene_triangles
+
+
+def export_mobile_glb(output_path, image_format='JPEG'):
+    """Export GLB with maximum Draco compression"""
+    bpy.ops.export_scene.gltf(
+        filepath=output_path,
+        export_format='GLB',
+        export_draco_mesh_compression_enable=True,
+        export_draco_mesh_compression_level=10,  # Maximum compression
+        export_draco_position_quantization=14,
+        export_draco_normal_quantization=10,
+        export_draco_texcoord_quantization=12,
+        export_image_format=image_format,  # JPEG for smaller size
+        export_texture_dir='',
+        export_texcoords=True,
+        export_normals=True,
+        export_materials='EXPORT',
+        export_gpu_instances=GPU_INSTANCING
+    )
+
+
 def optimize_model(input_path, output_path):
     """Optimize 3D car model for mobile performance - aggressive mode"""
     
@@ -20,7 +49,7 @@ def optimize_model(input_path, output_path):
     bpy.ops.import_scene.gltf(filepath=input_path)
     
     # Get stats BEFORE optimization
-    total_tris_before = sum(len(obj.data.polygons) for obj in bpy.context.scene.objects if obj.type == 'MESH')
+    total_tris_before = scene_triangles(bpy.context.scene.objects)
     
     print(f"BEFORE: {total_tris_before} triangles")
     
@@ -28,48 +57,24 @@ def optimize_model(input_path, output_path):
     mesh_objects = [obj for obj in bpy.context.scene.objects if obj.type == 'MESH']
     target_tris = 50000
     
-    for obj in mesh_objects:
-        bpy.context.view_layer.objects.active = obj
-        obj.select_set(True)
-        
-        current_tris = len(obj.data.polygons)
-        if current_tris > 1000:
-            # Calculate ratio to achieve target
-            decimate_ratio = min(0.9, (target_tris / len(mesh_objects)) / current_tris)
-            decimate_ratio = max(0.1, decimate_ratio)  # Don't go below 10%
-            
-            modifier = obj.modifiers.new(name="Decimate", type='DECIMATE')
-            modifier.ratio = decimate_ratio
-            bpy.ops.object.modifier_apply(modifier="Decimate")
-            print(f"Decimated {obj.name}: {current_tris} -> {len(obj.data.polygons)} tris (ratio: {decimate_ratio:.2f})")
+    # Budget split by screen-space importance; tiny meshes keep at least 100 tris
+    instancing = instance_meshes(mesh_objects)
+    allocation = decimate_to_budget(mesh_objects, target_tris, min_triangles=100)
     
-    # Resize textures aggressively (max 1024x1024)
-    for img in bpy.data.images:
-        if img.size[0] > 1024 or img.size[1] > 1024:
-            print(f"Resizing texture {img.name}: {img.size[0]}x{img.size[1]} -> 1024x1024")
-            img.scale(1024, 1024)
+    # Resize textures aggressively (base color max 1024, other maps 512)
+    textures = optimize_textures(1024)
+    draw_call_report = reduce_draw_calls()
     
     # Get stats AFTER optimization
-    total_tris_after = sum(len(obj.data.polygons) for obj in bpy.context.scene.objects if obj.type == 'MESH')
+    total_tris_after = scene_triangles(bpy.context.scene.objects)
     
     print(f"AFTER: {total_tris_after} triangles")
     
     # Export GLB with maximum Draco compression
     print(f"Exporting to {output_path} with Draco compression...")
-    bpy.ops.export_scene.gltf(
-        filepath=output_path,
-        export_format='GLB',
-        export_draco_mesh_compression_enable=True,
-        export_draco_mesh_compression_level=10,  # Maximum compression
-        export_draco_position_quantization=14,
-        export_draco_normal_quantization=10,
-        export_draco_texcoord_quantization=12,
-        export_image_format='JPEG',  # Use JPEG for smaller size
-        export_texture_dir='',
-        export_texcoords=True,
-        export_normals=True,
-        export_materials='EXPORT'
-    )
+    export_mobile_glb(output_path)
+    variants = write_variants(output_path, export_mobile_glb)
+    lods = export_lods(output_path, export_mobile_glb, 1024)
     
     # Write stats to JSON
     stats_path = output_path.replace('.glb', '_stats.json')
@@ -77,7 +82,14 @@ def optimize_model(input_path, output_path):
         json.dump({
             'before': {'triangles': total_tris_before},
             'after': {'triangles': total_tris_after},
-            'reduction_percent': round((1 - total_tris_after / total_tris_before) * 100, 1)
+            'reduction_percent': round((1 - total_tris_after / total_tris_before) * 100, 1),
+            'target_triangles': target_tris,
+            'allocation': allocation,
+            'instancing': instancing,
+            'drawCalls': draw_call_report,
+            'textures': textures,
+            'variants': variants,
+            'lods': lods
         }, f, indent=2)
     
     print(f"✅ Optimization complete!")
@@ -95,4 +107,9 @@ if __name__ == "__main__":
     input_path = argv[0]
     output_path = argv[1]
     
-    optimize_model(input_path, output_path)
+    from build_cache import run_cached
+    run_cached(__file__, input_path,
+               [output_path, output_path.replace('.glb', '_stats.json')] + variant_paths(output_path) + lod_paths(output_path),
+               {'variants': VARIANTS, 'lods': LOD_RATIOS, 'gpuInstancing': GPU_INSTANCING,
+                'mergeDrawCalls': MERGE_DRAW_CALLS},
+               lambda: optimize_model(input_path, output_path))
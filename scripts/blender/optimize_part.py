@@ -8,6 +8,16 @@ import sys
 import os
 import json
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from triangle_budget import decimate_to_budget
+from textures import VARIANTS, optimize_textures, variant_paths, write_variants
+from optimize_car_model import export_glb
+from lod import LOD_RATIOS, export_lods, lod_paths
+from instancing import GPU_INSTANCING, instance_meshes
+from batching import MERGE_DRAW_CALLS, reduce_draw_calls
+from mesh_stats import scene_triangles, world_bounds
+
 def optimize_part(input_path, output_path, target_triangles=15000):
     """Optimize 3D part model for mobile performance"""
     
@@ -24,7 +34,7 @@ def optimize_part(input_path, output_path, target_triangles=15000):
         sys.exit(1)
     
     # Get stats BEFORE optimization
-    total_tris_before = sum(len(obj.data.polygons) for obj in bpy.context.scene.objects if obj.type == 'MESH')
+    total_tris_before = scene_triangles(bpy.context.scene.objects)
     
     stats_before = {
         'triangles': total_tris_before,
@@ -34,49 +44,28 @@ def optimize_part(input_path, output_path, target_triangles=15000):
     
     print(f"BEFORE: {stats_before['triangles']} triangles, {stats_before['objects']} meshes")
     
-    # Calculate bounding box
+    # Calculate bounding box (exact world-space AABB)
     all_objs = [obj for obj in bpy.context.scene.objects if obj.type == 'MESH']
-    if all_objs:
-        min_x = min(obj.bound_box[0][0] + obj.location.x for obj in all_objs)
-        max_x = max(obj.bound_box[6][0] + obj.location.x for obj in all_objs)
-        min_y = min(obj.bound_box[0][1] + obj.location.y for obj in all_objs)
-        max_y = max(obj.bound_box[6][1] + obj.location.y for obj in all_objs)
-        min_z = min(obj.bound_box[0][2] + obj.location.z for obj in all_objs)
-        max_z = max(obj.bound_box[6][2] + obj.location.z for obj in all_objs)
-        
+    bounds = world_bounds(all_objs)
+    if bounds:
         dimensions = {
-            'x': (max_x - min_x) * 1000, # Convert to mm
-            'y': (max_y - min_y) * 1000,
-            'z': (max_z - min_z) * 1000
+            'x': bounds['size'][0] * 1000, # Convert to mm
+            'y': bounds['size'][1] * 1000,
+            'z': bounds['size'][2] * 1000
         }
     else:
         dimensions = {'x': 0, 'y': 0, 'z': 0}
 
-    # Decimate
-    for obj in bpy.context.scene.objects:
-        if obj.type == 'MESH':
-            bpy.context.view_layer.objects.active = obj
-            obj.select_set(True)
-            
-            current_tris = len(obj.data.polygons)
-            # Only decimate if significantly over target (split budget roughly by object count or just per object cap)
-            # Simple strategy: If single object > target, reduce it.
-            if current_tris > 5000: 
-                decimate_ratio = min(1.0, target_triangles / (total_tris_before * 1.2)) # Conservative
-                if decimate_ratio < 1.0:
-                    modifier = obj.modifiers.new(name="Decimate", type='DECIMATE')
-                    modifier.ratio = decimate_ratio
-                    bpy.ops.object.modifier_apply(modifier="Decimate")
-                    print(f"Decimated {obj.name}: {current_tris} -> {len(obj.data.polygons)} tris")
-    
-    # Optimize textures (smaller than cars, parts usually fine with 1024 or 512)
-    for img in bpy.data.images:
-        if img.size[0] > 1024 or img.size[1] > 1024:
-            print(f"Resizing texture {img.name}: {img.size[0]}x{img.size[1]} -> 1024x1024")
-            img.scale(1024, 1024)
+    # Share repeated geometry, then decimate (budget split by screen-space importance)
+    instancing = instance_meshes(all_objs)
+    allocation = decimate_to_budget(all_objs, target_triangles)
+    
+    # Optimize textures (smaller than cars: base color max 1024, other maps 512)
+    textures = optimize_textures(1024)
+    draw_call_report = reduce_draw_calls()
     
     # Get stats AFTER optimization
-    total_tris_after = sum(len(obj.data.polygons) for obj in bpy.context.scene.objects if obj.type == 'MESH')
+    total_tris_after = scene_triangles(bpy.context.scene.objects)
     
     stats_after = {
         'triangles': total_tris_after,
@@ -86,18 +75,9 @@ def optimize_part(input_path, output_path, target_triangles=15000):
     print(f"AFTER: {stats_after['triangles']} triangles")
     
     # Export GLB
-    print(f"Exporting to {output_path}...")
-    bpy.ops.export_scene.gltf(
-        filepath=output_path,
-        export_format='GLB',
-        export_draco_mesh_compression_enable=True,
-        export_draco_mesh_compression_level=6,
-        export_image_format='AUTO',
-        export_texcoords=True,
-        export_normals=True,
-        export_materials='EXPORT',
-        export_colors=True
-    )
+    export_glb(output_path)
+    variants = write_variants(output_path, export_glb)
+    lods = export_lods(output_path, export_glb, 1024)
     
     # Write metadata sidecar
     stats_path = output_path.replace('.glb', '_meta.json')
@@ -106,7 +86,14 @@ def optimize_part(input_path, output_path, target_triangles=15000):
             'stats': {
                 'before': stats_before,
                 'after': stats_after,
-                'reduction': round((1 - stats_after['triangles'] / max(1, stats_before['triangles'])) * 100, 1)
+                'reduction': round((1 - stats_after['triangles'] / max(1, stats_before['triangles'])) * 100, 1),
+                'targetTriangles': target_triangles,
+                'allocation': allocation,
+                'instancing': instancing,
+                'drawCalls': draw_call_report,
+                'textures': textures,
+                'variants': variants,
+                'lods': lods
             },
             'dimensionsMm': dimensions,
             'defaultScale': 1.0
@@ -126,4 +113,9 @@ if __name__ == "__main__":
     output_path = argv[1]
     target_triangles = int(argv[2]) if len(argv) > 2 else 15000
     
-    optimize_part(input_path, output_path, target_triangles)
+    from build_cache import run_cached
+    run_cached(__file__, input_path,
+               [output_path, output_path.replace('.glb', '_meta.json')] + variant_paths(output_path) + lod_paths(output_path),
+               {'target_triangles': target_triangles, 'variants': VARIANTS, 'lods': LOD_RATIOS,
+                'gpuInstancing': GPU_INSTANCING, 'mergeDrawCalls': MERGE_DRAW_CALLS},
+               lambda: optimize_part(input_path, output_path, target_triangles))
@@ -0,0 +1,247 @@
+"""
+Blender script that optimizes a model to a download budget instead of a triangle count
+Usage: blender --background --python optimize_to_size.py -- input.glb output.glb [max_mb] [max_load_s] [bandwidth_mbps]
+  max_mb          max GLB size in MB (default 3)
+  max_load_s      max estimated mobile load time in seconds: download + Draco decode (default: no limit)
+  bandwidth_mbps  link speed used for the load time estimate (default 12, a typical 4G connection)
+
+Searches decimation ratio, texture resolution/format and Draco quantization
+bits for the highest-quality configuration whose estimated size fits the
+budget. Sizes are estimated from one geometry-only probe export plus each
+image's encoded bytes per pixel, so most candidates cost no export. The chosen
+configuration is exported and measured. If it is still over budget, the
+estimate is corrected by the measured error and the next configuration down
+is tried.
+"""
+
+import bpy
+import sys
+import os
+import json
+import math
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from triangle_budget import allocate, mesh_triangles, mesh_weight
+from textures import dedupe_images, pot_size
+
+MIB = 1024 * 1024
+TEXTURE_SIZES = [2048, 1024, 512, 256]
+IMAGE_FORMATS = ['AUTO', 'WEBP', 'JPEG']
+# (position, normal, texcoord) quantization bits, best first
+DRACO_PROFILES = [(14, 10, 12), (12, 8, 10), (11, 7, 9)]
+# Encoded bytes per pixel for re-encoded images (AUTO keeps each image's own rate)
+BYTES_PER_PIXEL = {'JPEG': 0.18, 'WEBP': 0.12}
+DRACO_DECODE_TRIS_PER_S = 2000000  # mid-range phone, rough
+MIN_RATIO = 0.05
+MAX_ATTEMPTS = 4
+
+
+def image_entries():
+    """Images with pixels, plus their encoded bytes per pixel as imported"""
+    entries = []
+    for img in bpy.data.images:
+        w, h = img.size
+        if w == 0 or h == 0:
+            continue
+        if img.packed_file:
+            encoded = img.packed_file.size
+        elif img.filepath and os.path.exists(bpy.path.abspath(img.filepath)):
+            encoded = os.path.getsize(bpy.path.abspath(img.filepath))
+        else:
+            encoded = w * h * 3
+        entries.append({'image': img, 'w': w, 'h': h, 'bpp': encoded / float(w * h)})
+    return entries
+
+
+def estimate_texture_bytes(entries, max_size, image_format):
+    total = 0
+    for e in entries:
+        w, h = pot_size(e['w'], e['h'], max_size)
+        bpp = BYTES_PER_PIXEL.get(image_format, e['bpp'])
+        total += w * h * bpp
+    return total
+
+
+def set_decimation(meshes, counts, weights, ratio):
+    """Non-destructive: Decimate modifiers sized from the triangle budget, applied on export"""
+    alloc = allocate(counts, weights, int(sum(counts) * ratio))
+    for obj, count, a in zip(meshes, counts, alloc):
+        mod = obj.modifiers.get("SizeDecimate") or obj.modifiers.new(name="SizeDecimate", type='DECIMATE')
+        mod.ratio = 1.0 if count == 0 else min(1.0, a / count)
+    return sum(alloc)
+
+
+def exported_triangles(meshes):
+    """Triangles as export_apply writes them (Decimate modifiers evaluated)"""
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    return sum(mesh_triangles(obj.evaluated_get(depsgraph)) for obj in meshes)
+
+
+def export(path, draco, image_format):
+    pos_bits, normal_bits, uv_bits = draco
+    bpy.ops.export_scene.gltf(
+        filepath=path,
+        export_format='GLB',
+        export_apply=True,
+        export_draco_mesh_compression_enable=True,
+        export_draco_mesh_compression_level=10,
+        export_draco_position_quantization=pos_bits,
+        export_draco_normal_quantization=normal_bits,
+        export_draco_texcoord_quantization=uv_bits,
+        export_image_format=image_format,
+        export_texcoords=True,
+        export_normals=True,
+        export_materials='EXPORT'
+    )
+    return os.path.getsize(path)
+
+
+def quality(ratio, tex_size, image_format, draco_index, entries):
+    """Higher is better. Geometry detail first, then texture resolution, then lossless formats/bits."""
+    tex = 1.0
+    if entries:
+        tex = math.log2(tex_size) / math.log2(TEXTURE_SIZES[0])
+    return (
+        0.55 * ratio
+        + 0.35 * tex
+        - 0.05 * (image_format != 'AUTO')
+        - 0.05 * draco_index / max(1, len(DRACO_PROFILES) - 1)
+    )
+
+
+def optimize_to_size(input_path, output_path, max_mb=3.0, max_load_s=None, bandwidth_mbps=12.0):
+    """Optimize to fit max_mb (and max_load_s when given)"""
+    max_mb = float(max_mb)
+    bandwidth = float(bandwidth_mbps) * 1000 * 1000 / 8  # bytes/s
+    budget = max_mb * MIB
+
+    # Clear scene
+    bpy.ops.object.select_all(action='SELECT')
+    bpy.ops.object.delete()
+
+    print(f"Importing {input_path}...")
+    bpy.ops.import_scene.gltf(filepath=input_path)
+
+    meshes = [obj for obj in bpy.context.scene.objects if obj.type == 'MESH']
+    for obj in meshes:
+        if obj.data.users > 1:
+            obj.data = obj.data.copy()
+    counts = [mesh_triangles(obj) for obj in meshes]
+    weights = [mesh_weight(obj) for obj in meshes]
+    total_tris = sum(counts)
+    dedupe_images()
+    entries = image_entries()
+    print(f"BEFORE: {total_tris} triangles, {len(entries)} textures, {os.path.getsize(input_path) / MIB:.2f} MB")
+
+    # Calibrate geometry bytes/triangle once (full detail, best quantization, no images)
+    probe_path = os.path.join(tempfile.mkdtemp(prefix='size_probe_'), 'probe.glb')
+    set_decimation(meshes, counts, weights, 1.0)
+    probe_bytes = export(probe_path, DRACO_PROFILES[0], 'NONE')
+    os.remove(probe_path)
+    bytes_per_tri = probe_bytes / max(1, total_tris)
+    best_bits = sum(DRACO_PROFILES[0])
+    print(f"Probe: {probe_bytes / MIB:.2f} MB geometry, {bytes_per_tri:.1f} bytes/tri")
+
+    correction = 1.0
+    tex_limit = TEXTURE_SIZES[0]
+    attempts = []
+    chosen = None
+
+    for attempt in range(MAX_ATTEMPTS):
+        candidates = []
+        for tex_size in [s for s in TEXTURE_SIZES if s <= tex_limit]:
+            for image_format in IMAGE_FORMATS:
+                tex_bytes = estimate_texture_bytes(entries, tex_size, image_format)
+                for di, draco in enumerate(DRACO_PROFILES):
+                    bpt = bytes_per_tri * sum(draco) / best_bits
+                    # Largest ratio that fits the size budget ...
+                    ratio = (budget / correction - tex_bytes) / max(1.0, total_tris * bpt)
+                    # ... and the load time budget (download + decode)
+                    if max_load_s:
+                        per_ratio_s = total_tris * (bpt * correction / bandwidth + 1.0 / DRACO_DECODE_TRIS_PER_S)
+                        ratio = min(ratio, (float(max_load_s) - tex_bytes * correction / bandwidth) / max(1e-9, per_ratio_s))
+                    ratio = min(1.0, ratio)
+                    if ratio < MIN_RATIO:
+                        continue
+                    est = (tex_bytes + ratio * total_tris * bpt) * correction
+                    candidates.append({
+                        'ratio': round(ratio, 4),
+                        'textureSize': tex_size,
+                        'imageFormat': image_format,
+                        'draco': list(draco),
+                        'estimatedBytes': int(est),
+                        'quality': round(quality(ratio, tex_size, image_format, di, entries), 4),
+                    })
+        if not candidates:
+            print("⚠️  No configuration fits the budget; exporting the smallest one")
+            candidates = [{
+                'ratio': MIN_RATIO, 'textureSize': TEXTURE_SIZES[-1], 'imageFormat': 'WEBP',
+                'draco': list(DRACO_PROFILES[-1]), 'estimatedBytes': None, 'quality': 0,
+            }]
+
+        cfg = max(candidates, key=lambda c: c['quality'])
+        print(f"Attempt {attempt + 1}: ratio {cfg['ratio']}, textures {cfg['textureSize']} {cfg['imageFormat']}, "
+              f"draco {cfg['draco']} (est. {(cfg['estimatedBytes'] or 0) / MIB:.2f} MB)")
+
+        set_decimation(meshes, counts, weights, cfg['ratio'])
+        # Same pot_size the estimate assumed, so oversized (e.g. 4K) sources shrink on the first attempt too
+        for e in entries:
+            w, h = pot_size(e['w'], e['h'], cfg['textureSize'])
+            if (w, h) != tuple(e['image'].size):
+                e['image'].scale(w, h)
+        tex_limit = cfg['textureSize']
+
+        actual = export(output_path, tuple(cfg['draco']), cfg['imageFormat'])
+        cfg['triangles'] = exported_triangles(meshes)
+        cfg['actualBytes'] = actual
+        cfg['estimatedLoadSeconds'] = round(actual / bandwidth + cfg['triangles'] / DRACO_DECODE_TRIS_PER_S, 2)
+        attempts.append(cfg)
+        chosen = cfg
+
+        within_load = not max_load_s or cfg['estimatedLoadSeconds'] <= float(max_load_s)
+        if actual <= budget and within_load:
+            break
+        if actual <= budget:
+            # Only the load time is over: the size correction stays ~1 and would pick the same config
+            print(f"   Over the load time budget ({cfg['estimatedLoadSeconds']}s), not retrying")
+            break
+        if cfg['estimatedBytes']:
+            correction *= actual / float(cfg['estimatedBytes'])
+        print(f"   Over budget ({actual / MIB:.2f} MB), correcting estimate x{correction:.2f}")
+
+    stats_path = output_path.replace('.glb', '_stats.json')
+    with open(stats_path, 'w') as f:
+        json.dump({
+            'before': {'triangles': total_tris, 'bytes': os.path.getsize(input_path)},
+            'after': {'triangles': chosen['triangles'], 'bytes': chosen['actualBytes']},
+            'budget': {'maxBytes': int(budget), 'maxLoadSeconds': max_load_s, 'bandwidthMbps': bandwidth_mbps},
+            'chosen': chosen,
+            'attempts': attempts,
+            'withinBudget': chosen['actualBytes'] <= budget,
+        }, f, indent=2)
+
+    status = "✅ Within budget" if chosen['actualBytes'] <= budget else "⚠️  Over budget"
+    print(f"{status}: {chosen['actualBytes'] / MIB:.2f} MB / {max_mb:.2f} MB, "
+          f"{chosen['triangles']} tris, ~{chosen['estimatedLoadSeconds']}s load. Stats saved to {stats_path}")
+
+
+if __name__ == "__main__":
+    argv = sys.argv
+    argv = argv[argv.index("--") + 1:] if "--" in argv else []
+
+    if len(argv) < 2:
+        print("Usage: blender --background --python optimize_to_size.py -- input.glb output.glb [max_mb] [max_load_s] [bandwidth_mbps]")
+        sys.exit(1)
+
+    input_path = argv[0]
+    output_path = argv[1]
+    max_mb = float(argv[2]) if len(argv) > 2 else 3.0
+    max_load_s = float(argv[3]) if len(argv) > 3 else None
+    bandwidth_mbps = float(argv[4]) if len(argv) > 4 else 12.0
+
+    from build_cache import run_cached
+    run_cached(__file__, input_path, [output_path, output_path.replace('.glb', '_stats.json')],
+               {'max_mb': max_mb, 'max_load_s': max_load_s, 'bandwidth_mbps': bandwidth_mbps},
+               lambda: optimize_to_size(input_path, output_path, max_mb, max_load_s, bandwidth_mbps))
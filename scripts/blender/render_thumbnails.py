@@ -0,0 +1,247 @@
+"""
+Headless preview renderer for car and part GLBs: a thumbnail plus an N-angle turntable sprite
+Usage:
+  python3 scripts/blender/render_thumbnails.py assets_dir previews_dir [--size 512] [--angles 12] [--workers N] [--blender PATH] [--no-cache]
+  blender --background --python render_thumbnails.py -- input.glb output.png [size] [angles]
+
+For each model.glb under assets_dir, writes (mirroring the directory layout):
+  previews_dir/model.png              size x size thumbnail (3/4 front view)
+  previews_dir/model_turntable.png    angles frames of size/2, in a grid of up to 8 columns
+  previews_dir/model_preview.json     frame size, grid layout and angles for the app
+
+The directory mode runs on batch_optimize.py: jobs go through a shared
+queue to several background Blender workers. Models whose GLB (and this
+script) hash is unchanged are restored from the build cache without
+starting Blender.
+
+Engine: THUMBNAIL_ENGINE=workbench (default, fastest, no GPU needed) or eevee.
+Backgrounds are transparent.
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import tempfile
+
+try:
+    import bpy
+except ImportError:  # launcher mode (plain python3)
+    bpy = None
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPT_DIR)
+
+ENGINE = os.getenv('THUMBNAIL_ENGINE', 'workbench').lower()
+ELEVATION_DEG = 20
+THUMBNAIL_ANGLE_DEG = 35  # 3/4 front view
+FOV_DEG = 35
+MAX_COLUMNS = 8
+SKIP_SUFFIXES = re.compile(r'_(lod\d+|webp|ktx2)\.glb$')
+
+
+def preview_paths(output_path):
+    """(thumbnail, turntable sprite, preview json) for an output .png"""
+    base = os.path.splitext(output_path)[0]
+    return [output_path, f"{base}_turntable.png", f"{base}_preview.json"]
+
+
+# ---------------------------
+# Render (inside Blender)
+# ---------------------------
+def setup_render(size):
+    scene = bpy.context.scene
+    render = scene.render
+    render.resolution_x = size
+    render.resolution_y = size
+    render.resolution_percentage = 100
+    render.film_transparent = True
+    render.image_settings.file_format = 'PNG'
+    render.image_settings.color_mode = 'RGBA'
+
+    if ENGINE == 'eevee':
+        engines = bpy.types.RenderSettings.bl_rna.properties['engine'].enum_items.keys()
+        render.engine = 'BLENDER_EEVEE_NEXT' if 'BLENDER_EEVEE_NEXT' in engines else 'BLENDER_EEVEE'
+        scene.eevee.taa_render_samples = 16
+        if scene.world is None:
+            scene.world = bpy.data.worlds.new("PreviewWorld")
+        scene.world.color = (0.6, 0.6, 0.6)
+        bpy.ops.object.light_add(type='SUN', rotation=(math.radians(50), 0, math.radians(30)))
+        bpy.context.active_object.data.energy = 3.0
+    else:
+        render.engine = 'BLENDER_WORKBENCH'
+        shading = scene.display.shading
+        shading.light = 'STUDIO'
+        shading.color_type = 'TEXTURE'
+        scene.display.render_aa = '8'
+
+
+def setup_camera(bounds):
+    """Camera on an orbit pivot at the model center, far enough to frame its bounding sphere"""
+    center = bounds['center']
+    radius = max(1e-3, 0.5 * math.sqrt(sum(s * s for s in bounds['size'])))
+    distance = radius / math.sin(math.radians(FOV_DEG) / 2) * 1.05
+
+    pivot = bpy.data.objects.new("PreviewPivot", None)
+    bpy.context.collection.objects.link(pivot)
+    pivot.location = center
+
+    cam_data = bpy.data.cameras.new("PreviewCamera")
+    cam_data.angle = math.radians(FOV_DEG)
+    cam_data.clip_end = distance * 4
+    cam = bpy.data.objects.new("PreviewCamera", cam_data)
+    bpy.context.collection.objects.link(cam)
+    cam.parent = pivot
+    elev = math.radians(ELEVATION_DEG)
+    # Blender cars face +Y: start in front of the model
+    cam.location = (0, distance * math.cos(elev), distance * math.sin(elev))
+    track = cam.constraints.new(type='TRACK_TO')
+    track.target = pivot
+    track.track_axis = 'TRACK_NEGATIVE_Z'
+    track.up_axis = 'UP_Y'
+    bpy.context.scene.camera = cam
+    return pivot
+
+
+def render_view(pivot, angle_deg, path):
+    pivot.rotation_euler = (0, 0, math.radians(angle_deg))
+    bpy.context.scene.render.filepath = path
+    bpy.ops.render.render(write_still=True)
+
+
+def load_pixels(path):
+    import numpy as np
+    img = bpy.data.images.load(path)
+    w, h = img.size
+    px = np.empty(w * h * 4, dtype=np.float32)
+    img.pixels.foreach_get(px)
+    bpy.data.images.remove(img)
+    return px.reshape(h, w, 4)
+
+
+def save_pixels(pixels, path):
+    h, w, _ = pixels.shape
+    img = bpy.data.images.new(os.path.basename(path), w, h, alpha=True)
+    img.pixels.foreach_set(pixels.ravel())
+    img.filepath_raw = path
+    img.file_format = 'PNG'
+    img.save()
+    bpy.data.images.remove(img)
+
+
+def render_previews(input_path, output_path, size=512, angles=12):
+    """Thumbnail + turntable sprite + preview json for one GLB"""
+    import numpy as np
+    from mesh_stats import world_bounds
+
+    size = int(size)
+    angles = int(angles)
+    thumb_path, sprite_path, meta_path = preview_paths(output_path)
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+
+    bpy.ops.object.select_all(action='SELECT')
+    bpy.ops.object.delete()
+    print(f"Importing {input_path}...")
+    bpy.ops.import_scene.gltf(filepath=input_path)
+
+    bounds = world_bounds([obj for obj in bpy.context.scene.objects if obj.type == 'MESH'])
+    if bounds is None:
+        print("Error: No mesh geometry to render")
+        sys.exit(1)
+
+    setup_render(size)
+    pivot = setup_camera(bounds)
+    render_view(pivot, THUMBNAIL_ANGLE_DEG, thumb_path)
+
+    # Turntable frames at half resolution, assembled into one sprite sheet
+    frame = max(64, size // 2)
+    bpy.context.scene.render.resolution_x = frame
+    bpy.context.scene.render.resolution_y = frame
+    columns = min(angles, MAX_COLUMNS)
+    rows = int(math.ceil(angles / float(columns)))
+    sheet = np.zeros((rows * frame, columns * frame, 4), dtype=np.float32)
+    tmp_dir = tempfile.mkdtemp(prefix='turntable_')
+    for i in range(angles):
+        path = os.path.join(tmp_dir, f"{i:03d}.png")
+        render_view(pivot, 360.0 * i / angles, path)
+        row, col = divmod(i, columns)
+        y = (rows - 1 - row) * frame  # Blender pixel rows run bottom-up
+        sheet[y:y + frame, col * frame:(col + 1) * frame] = load_pixels(path)
+        os.remove(path)
+    os.rmdir(tmp_dir)
+    save_pixels(sheet, sprite_path)
+
+    with open(meta_path, 'w') as f:
+        json.dump({
+            'thumbnail': os.path.basename(thumb_path),
+            'thumbnailSize': size,
+            'turntable': os.path.basename(sprite_path),
+            'frameSize': frame,
+            'frames': angles,
+            'columns': columns,
+            'rows': rows,
+            'degreesPerFrame': 360.0 / angles,
+            'elevationDeg': ELEVATION_DEG,
+            'engine': bpy.context.scene.render.engine,
+        }, f, indent=2)
+
+    print(f"✅ Previews written: {thumb_path}, {sprite_path}")
+
+
+# ---------------------------
+# Launcher (plain python3)
+# ---------------------------
+def main():
+    parser = argparse.ArgumentParser(description='Render thumbnails/turntables for every GLB in a directory')
+    parser.add_argument('assets_dir')
+    parser.add_argument('previews_dir')
+    parser.add_argument('--size', type=int, default=512)
+    parser.add_argument('--angles', type=int, default=12)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--stats', default=None, help='Combined stats JSON (default: previews_dir/previews_stats.json)')
+    parser.add_argument('--blender', default=os.getenv('BLENDER', 'blender'))
+    parser.add_argument('--no-cache', action='store_true', help='Re-render unchanged assets')
+    args = parser.parse_args()
+
+    import batch_optimize
+
+    jobs = []
+    for root, _, files in os.walk(args.assets_dir):
+        for name in sorted(files):
+            if not name.endswith('.glb') or SKIP_SUFFIXES.search(name):
+                continue  # LODs/texture variants of a model share its preview
+            rel = os.path.relpath(os.path.join(root, name), args.assets_dir)
+            jobs.append({
+                'script': 'render_thumbnails',
+                'index': len(jobs),
+                'input': os.path.abspath(os.path.join(root, name)),
+                'output': os.path.abspath(os.path.join(args.previews_dir, os.path.splitext(rel)[0] + '.png')),
+                'args': [args.size, args.angles],
+            })
+    if not jobs:
+        print(f"No .glb files under {args.assets_dir}")
+        sys.exit(1)
+
+    os.makedirs(args.previews_dir, exist_ok=True)
+    stats_path = args.stats or os.path.join(args.previews_dir, 'previews_stats.json')
+    combined = batch_optimize.launch(jobs, args.workers, args.blender, stats_path, use_cache=not args.no_cache)
+    sys.exit(0 if combined['summary']['failed'] == 0 else 1)
+
+
+if __name__ == "__main__":
+    if bpy is not None:
+        argv = sys.argv
+        argv = argv[argv.index("--") + 1:] if "--" in argv else []
+        if len(argv) < 2:
+            print("Usage: blender --background --python render_thumbnails.py -- input.glb output.png [size] [angles]")
+            sys.exit(1)
+        size = int(argv[2]) if len(argv) > 2 else 512
+        angles = int(argv[3]) if len(argv) > 3 else 12
+
+        from build_cache import run_cached
+        run_cached(__file__, argv[0], preview_paths(argv[1]), {'size': size, 'angles': angles, 'engine': ENGINE},
+                   lambda: render_previews(argv[0], argv[1], size, angles))
+    else:
+        main()
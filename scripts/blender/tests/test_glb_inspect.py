@@ -0,0 +1,83 @@
+"""glb_inspect: image header sizes and a minimal GLB report (no Blender needed)."""
+import io
+import json
+import os
+import struct
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import glb_inspect  # noqa: E402
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def encoded(fmt, size=(37, 21), **params):
+    buf = io.BytesIO()
+    Image.new("RGB", size, (200, 10, 10)).save(buf, fmt, **params)
+    return buf.getvalue()
+
+
+@pytest.mark.parametrize("fmt,params", [
+    ("PNG", {}),
+    ("JPEG", {}),
+    ("JPEG", {"progressive": True}),
+    ("WEBP", {"lossless": False}),
+    ("WEBP", {"lossless": True}),
+])
+def test_image_size_reads_headers(fmt, params):
+    kind = {"PNG": "png", "JPEG": "jpeg", "WEBP": "webp"}[fmt]
+    assert glb_inspect.image_size(encoded(fmt, **params)[:4096]) == (37, 21, kind)
+
+
+def test_image_size_reads_ktx2_header():
+    header = b'\xabKTX 20\xbb\r\n\x1a\n' + struct.pack('<IIII', 0, 1, 512, 256)
+    assert glb_inspect.image_size(header) == (512, 256, 'ktx2')
+
+
+def test_image_size_unknown_or_truncated():
+    assert glb_inspect.image_size(None) is None
+    assert glb_inspect.image_size(b"GIF89a") is None
+    assert glb_inspect.image_size(encoded("PNG")[:16]) is None
+
+
+def write_glb(path, gltf, bin_chunk):
+    js = json.dumps(gltf).encode()
+    js += b' ' * (-len(js) % 4)
+    bin_chunk += b'\0' * (-len(bin_chunk) % 4)
+    body = struct.pack('<II', len(js), glb_inspect.CHUNK_JSON) + js
+    body += struct.pack('<II', len(bin_chunk), glb_inspect.CHUNK_BIN) + bin_chunk
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<4sII', glb_inspect.GLB_MAGIC, 2, 12 + len(body)) + body)
+
+
+def test_inspect_counts_instances_and_textures(tmp_path):
+    png = encoded("PNG", size=(64, 32))
+    gltf = {
+        "asset": {"version": "2.0"},
+        "accessors": [{"count": 300}],
+        "bufferViews": [{"buffer": 0, "byteOffset": 0, "byteLength": len(png)}],
+        "buffers": [{"byteLength": len(png)}],
+        "images": [{"name": "paint", "mimeType": "image/png", "bufferView": 0}],
+        "meshes": [{"primitives": [{"attributes": {"POSITION": 0}, "indices": 0}]}],
+        "nodes": [
+            {"name": "body", "mesh": 0},
+            {"name": "wheel", "mesh": 0, "translation": [1, 0, 0]},
+            {"name": "ANCHOR_spoiler", "translation": [0, 1, -2]},
+        ],
+        "scenes": [{"nodes": [0, 1, 2]}],
+        "scene": 0,
+    }
+    path = str(tmp_path / "car.glb")
+    write_glb(path, gltf, png)
+
+    report = glb_inspect.inspect(path)
+    assert report["uniqueTriangles"] == 100
+    assert report["triangles"] == 200
+    assert report["drawCalls"] == 2
+    assert report["textures"] == [{"name": "paint", "mimeType": "image/png", "bytes": len(png),
+                                   "width": 64, "height": 32, "format": "png"}]
+    assert report["anchors"]["anchorPoints"] == {"ANCHOR_spoiler": {"x": 0, "y": 2, "z": 1}}
+    assert glb_inspect.check(report, max_triangles=150) == ["200 triangles > 150"]
@@ -0,0 +1,28 @@
+"""triangle_budget.allocate (the module imports bpy, so this runs under Blender's Python)."""
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("bpy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from triangle_budget import allocate  # noqa: E402
+
+
+def test_allocation_is_proportional_and_exact():
+    assert allocate([1000, 1000], [3, 1], 800) == [600, 200]
+    assert sum(allocate([999, 555, 123], [1, 1, 1], 1000)) == 1000
+
+
+def test_capped_meshes_pass_their_surplus_on():
+    # the first mesh would get 900 but only has 100
+    assert allocate([100, 1000], [9, 1], 1000) == [100, 900]
+
+
+def test_target_above_total_keeps_everything():
+    assert allocate([10, 20], [1, 1], 1000) == [10, 20]
+
+
+def test_zero_weights_split_evenly_and_empty_meshes_get_nothing():
+    assert allocate([0, 100, 100], [0, 0, 0], 100) == [0, 50, 50]
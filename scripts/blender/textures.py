@@ -0,0 +1,226 @@
+"""
+Texture stage for the Blender optimizers
+
+- Detects each image's role from the material graph (base color, normal,
+  ORM = occlusion/roughness/metallic, emissive) and downsizes per role,
+  keeping aspect ratio and snapping to power-of-two sizes. This replaces the
+  old img.scale(N, N), which squashed non-square maps.
+- Dedupes byte-identical images that were imported once per material.
+- Optionally writes GPU-compressed/WebP variants next to the output GLB:
+    output_webp.glb   WebP images (Blender exporter)
+    output_ktx2.glb   KTX2/Basis: ETC1S for color maps, UASTC for normal maps
+                      (needs the gltf-transform CLI and toktx on PATH)
+  Choose variants with TEXTURE_VARIANTS=webp,ktx2 (default: none).
+"""
+
+import bpy
+import hashlib
+import math
+import os
+import shutil
+import subprocess
+
+# Long-side cap per role at max_size=2048; scaled down with max_size
+ROLE_MAX_SIZE = {
+    'baseColor': 2048,
+    'emissive': 1024,
+    'normal': 1024,
+    'orm': 1024,
+    'other': 1024,
+}
+ROLE_PRIORITY = ['baseColor', 'normal', 'emissive', 'orm', 'other']
+
+VARIANTS = [v.strip() for v in os.getenv('TEXTURE_VARIANTS', '').split(',') if v.strip()]
+VARIANT_SUFFIXES = {'webp': '_webp.glb', 'ktx2': '_ktx2.glb'}
+GLTF_TRANSFORM = os.getenv('GLTF_TRANSFORM', 'gltf-transform')
+
+# Principled BSDF inputs / node types -> role
+_SOCKET_ROLES = {
+    'Base Color': 'baseColor',
+    'Alpha': 'baseColor',
+    'Roughness': 'orm',
+    'Metallic': 'orm',
+    'Occlusion': 'orm',  # glTF Material Output / glTF Settings group
+    'Emission': 'emissive',
+    'Emission Color': 'emissive',
+    'Normal': 'normal',
+}
+
+
+def _role_from(node, socket_name, depth=0):
+    """Follow links downstream until a socket that tells us what the texture feeds"""
+    if node.type == 'NORMAL_MAP':
+        return 'normal'
+    if node.type in ('BSDF_PRINCIPLED', 'GROUP') and socket_name in _SOCKET_ROLES:
+        return _SOCKET_ROLES[socket_name]
+    if depth > 4:
+        return None
+    for output in node.outputs:
+        for link in output.links:
+            role = _role_from(link.to_node, link.to_socket.name, depth + 1)
+            if role:
+                return role
+    return None
+
+
+def image_roles():
+    """{image name: role}; an image used in several roles keeps the most demanding one"""
+    roles = {}
+    for mat in bpy.data.materials:
+        if not mat.use_nodes or not mat.node_tree:
+            continue
+        for node in mat.node_tree.nodes:
+            if node.type != 'TEX_IMAGE' or node.image is None:
+                continue
+            role = _role_from(node, None) or 'other'
+            current = roles.get(node.image.name)
+            if current is None or ROLE_PRIORITY.index(role) < ROLE_PRIORITY.index(current):
+                roles[node.image.name] = role
+    return roles
+
+
+def pot_size(w, h, max_size):
+    """Fit (w, h) within max_size on the long side, keep aspect, snap each side to a power of two"""
+    scale = min(1.0, max_size / float(max(w, h)))
+
+    def snap(v):
+        p = 2 ** round(math.log2(max(1.0, v * scale)))
+        if p > v:
+            p //= 2  # never upscale past the source
+        return int(min(p, 2 ** int(math.log2(max_size))))
+
+    return snap(w), snap(h)
+
+
+def _image_hash(img):
+    h = hashlib.sha256()
+    h.update(f"{img.size[0]}x{img.size[1]}".encode())
+    if img.packed_file:
+        h.update(img.packed_file.data)
+    else:
+        import numpy as np
+        pixels = np.empty(img.size[0] * img.size[1] * img.channels, dtype=np.float32)
+        img.pixels.foreach_get(pixels)
+        h.update(pixels.tobytes())
+    return h.hexdigest()
+
+
+def dedupe_images():
+    """Point every texture node at one copy of identical images; returns the number removed"""
+    images = [img for img in bpy.data.images if img.size[0] and img.size[1]]
+    canonical = {}
+    replace = {}
+    for img in images:
+        key = _image_hash(img)
+        if key in canonical:
+            replace[img.name] = canonical[key]
+        else:
+            canonical[key] = img
+
+    if not replace:
+        return 0
+    for mat in bpy.data.materials:
+        if not mat.use_nodes or not mat.node_tree:
+            continue
+        for node in mat.node_tree.nodes:
+            if node.type == 'TEX_IMAGE' and node.image is not None and node.image.name in replace:
+                node.image = replace[node.image.name]
+    for name in replace:
+        img = bpy.data.images.get(name)
+        if img is not None and img.users == 0:
+            bpy.data.images.remove(img)
+    print(f"Deduplicated {len(replace)} identical texture(s)")
+    return len(replace)
+
+
+def gpu_bytes(w, h, compressed=False):
+    """Approximate GPU memory with a full mip chain: RGBA8, or ~1 byte/px once transcoded from KTX2"""
+    return int(w * h * (1 if compressed else 4) * 4 / 3)
+
+
+def optimize_textures(max_size=2048):
+    """
+    Dedupe, then downsize every image by role. Role caps scale with max_size
+    (max_size=1024 halves them all). Returns the stats report.
+    """
+    removed = dedupe_images()
+    roles = image_roles()
+    factor = max_size / 2048.0
+
+    report = []
+    for img in bpy.data.images:
+        w, h = img.size
+        if not w or not h:
+            continue
+        role = roles.get(img.name, 'other')
+        cap = max(64, int(ROLE_MAX_SIZE[role] * factor))
+        new_w, new_h = pot_size(w, h, cap)
+        if (new_w, new_h) != (w, h):
+            print(f"Resizing {role} texture {img.name}: {w}x{h} -> {new_w}x{new_h}")
+            img.scale(new_w, new_h)
+        report.append({
+            'name': img.name,
+            'role': role,
+            'before': [w, h],
+            'after': [new_w, new_h],
+            'gpuBytes': gpu_bytes(new_w, new_h),
+        })
+    return {
+        'deduplicated': removed,
+        'images': report,
+        'gpuBytes': sum(r['gpuBytes'] for r in report),
+    }
+
+
+def variant_paths(output_path, variants=None):
+    variants = VARIANTS if variants is None else variants
+    return [output_path.replace('.glb', VARIANT_SUFFIXES[v]) for v in variants if v in VARIANT_SUFFIXES]
+
+
+def _ktx2(src, dst, roles):
+    """ETC1S for color/ORM maps (small), UASTC for normal maps (keeps tangent-space detail)"""
+    tool = shutil.which(GLTF_TRANSFORM)
+    if tool is None:
+        print(f"⚠️  {GLTF_TRANSFORM} not found; skipping KTX2 variant")
+        return False
+    tmp = dst + '.tmp.glb'
+    steps = [
+        [tool, 'uastc', src, tmp, '--slots', 'normalTexture', '--level', '2', '--zstd', '18'],
+        [tool, 'etc1s', tmp, dst, '--slots', '!normalTexture', '--quality', '192'],
+    ]
+    if 'normal' not in roles.values():
+        steps = [[tool, 'etc1s', src, dst, '--quality', '192']]
+    try:
+        for cmd in steps:
+            subprocess.run(cmd, check=True)
+    except (subprocess.CalledProcessError, OSError) as e:
+        print(f"⚠️  KTX2 variant failed: {e}")
+        return False
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return True
+
+
+def write_variants(output_path, export, variants=None):
+    """
+    Write the requested texture variants of an already exported output_path.
+    export(path, image_format) re-exports the current scene.
+    Returns {variant: {'path', 'bytes'}} for the sidecar JSON.
+    """
+    variants = VARIANTS if variants is None else variants
+    written = {}
+    for variant in variants:
+        if variant not in VARIANT_SUFFIXES:
+            print(f"⚠️  Unknown texture variant {variant!r} (expected one of {sorted(VARIANT_SUFFIXES)})")
+            continue
+        path = output_path.replace('.glb', VARIANT_SUFFIXES[variant])
+        if variant == 'webp':
+            export(path, 'WEBP')
+            ok = True
+        else:
+            ok = _ktx2(output_path, path, image_roles())
+        if ok and os.path.exists(path):
+            written[variant] = {'path': os.path.basename(path), 'bytes': os.path.getsize(path)}
+            print(f"Wrote {variant} variant: {path} ({written[variant]['bytes'] / (1024 * 1024):.2f} MB)")
+    return written
@@ -0,0 +1,133 @@
+"""
+Triangle budget allocator for the Blender optimizers
+
+Splits a global triangle target across meshes by importance and decimates them
+in one pass, so the scene lands on the target instead of over/undershooting
+with a fixed ratio fudge factor.
+
+Importance modes:
+  screen - area of the mesh's world-space bounding box (proxy for how much of
+           the screen it covers from an orbit camera; default)
+  area   - world-space surface area of the mesh
+  count  - current triangle count (uniform ratio, the old behaviour)
+"""
+
+import bpy
+import numpy as np
+from mathutils import Vector
+
+from mesh_stats import mesh_triangles
+
+
+def allocate(counts, weights, target):
+    """
+    Integer triangle allocation proportional to weights, never above a mesh's
+    current count, summing exactly to min(target, sum(counts)).
+    Surplus from capped meshes is redistributed over the rest (water filling).
+    """
+    n = len(counts)
+    target = max(0, min(int(target), sum(counts)))
+    alloc = [0.0] * n
+    open_idx = [i for i in range(n) if counts[i] > 0]
+    remaining = float(target)
+
+    while open_idx and remaining > 1e-9:
+        total_w = sum(max(weights[i], 0.0) for i in open_idx)
+        if total_w <= 0:
+            share = {i: remaining / len(open_idx) for i in open_idx}
+        else:
+            share = {i: remaining * max(weights[i], 0.0) / total_w for i in open_idx}
+
+        capped = [i for i in open_idx if alloc[i] + share[i] >= counts[i]]
+        if not capped:
+            for i in open_idx:
+                alloc[i] += share[i]
+            remaining = 0.0
+            break
+        for i in capped:
+            remaining -= counts[i] - alloc[i]
+            alloc[i] = float(counts[i])
+        open_idx = [i for i in open_idx if i not in capped]
+
+    # Largest-remainder rounding keeps the exact total
+    floors = [int(a) for a in alloc]
+    short = target - sum(floors)
+    by_remainder = sorted(range(n), key=lambda i: alloc[i] - floors[i], reverse=True)
+    for i in by_remainder:
+        if short <= 0:
+            break
+        if floors[i] < counts[i]:
+            floors[i] += 1
+            short -= 1
+    return floors
+
+
+def mesh_weight(obj, importance='screen'):
+    if importance == 'count':
+        return float(mesh_triangles(obj))
+    if importance == 'area':
+        sx, sy, sz = obj.matrix_world.to_scale()
+        scale2 = abs(sx * sy + sy * sz + sz * sx) / 3.0
+        areas = np.empty(len(obj.data.polygons), dtype=np.float64)
+        obj.data.polygons.foreach_get('area', areas)
+        return float(areas.sum()) * scale2
+
+    corners = [obj.matrix_world @ Vector(c) for c in obj.bound_box]
+    xs, ys, zs = [c.x for c in corners], [c.y for c in corners], [c.z for c in corners]
+    dx, dy, dz = max(xs) - min(xs), max(ys) - min(ys), max(zs) - min(zs)
+    return 2.0 * (dx * dy + dy * dz + dz * dx)
+
+
+def decimate_to_budget(mesh_objects, target_triangles, importance='screen', min_triangles=0):
+    """
+    Decimate mesh_objects so their combined triangle count lands on
+    target_triangles. Objects sharing mesh data (instances) are budgeted as
+    one unit and decimated once, so they stay shared. Units are processed
+    largest first; after each one the remaining budget is re-allocated from
+    the actual result, so decimation rounding is absorbed by the units still
+    to go. Returns the per-mesh allocation report for the stats JSON.
+    """
+    by_data = {}
+    for obj in mesh_objects:
+        by_data.setdefault(obj.data.name, []).append(obj)
+    units = sorted(by_data.values(), key=lambda objs: mesh_triangles(objs[0]) * len(objs), reverse=True)
+    counts = [mesh_triangles(objs[0]) * len(objs) for objs in units]
+    weights = [sum(mesh_weight(obj, importance) for obj in objs) for objs in units]
+    planned = allocate(counts, weights, target_triangles)
+
+    report = []
+    remaining = max(0, min(int(target_triangles), sum(counts)))
+    for i, objs in enumerate(units):
+        obj = objs[0]
+        alloc = allocate(counts[i:], weights[i:], remaining)[0]
+        alloc = max(alloc, min(min_triangles * len(objs), counts[i]))
+        before = counts[i]
+
+        if alloc < before:
+            old = obj.data
+            if old.users > 1:
+                obj.data = old.copy()  # modifiers can't be applied to shared data
+            bpy.context.view_layer.objects.active = obj
+            obj.select_set(True)
+            modifier = obj.modifiers.new(name="Decimate", type='DECIMATE')
+            modifier.ratio = alloc / before
+            bpy.ops.object.modifier_apply(modifier="Decimate")
+            for other in objs[1:]:
+                other.data = obj.data
+            if old is not obj.data and old.users == 0:
+                bpy.data.meshes.remove(old)
+        after = mesh_triangles(obj) * len(objs)
+        remaining = max(0, remaining - after)
+
+        report.append({
+            'name': obj.name,
+            'instances': len(objs),
+            'before': before,
+            'planned': planned[i],
+            'allocated': alloc,
+            'after': after,
+            'weight': round(weights[i], 6),
+        })
+        if after != before:
+            print(f"Decimated {obj.name}{f' (x{len(objs)})' if len(objs) > 1 else ''}: {before} -> {after} tris (budget {alloc})")
+    return report
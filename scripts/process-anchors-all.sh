@@ -33,21 +33,17 @@ for model_spec in "${MODELS[@]}"; do
     continue
   fi
   
-  # Step 1: Add anchors to GLB
+  # Steps 1+2: Add anchors and extract anchor metadata (single import/export)
   OUTPUT_GLB="tmp/anchors/${MODEL_ID}_with_anchors.glb"
-  echo "  Step 1: Adding anchors..."
-  blender --background --python scripts/blender/add_anchors.py -- "$INPUT_GLB" "$OUTPUT_GLB" 2>&1 | grep -E "(Car dimensions|Created anchor|Added.*anchor|Export complete)"
+  ANCHORS_JSON="tmp/anchors/${MODEL_ID}_anchors.json"
+  echo "  Steps 1+2: Adding anchors + extracting metadata..."
+  blender --background --python scripts/blender/asset_pipeline.py -- "$INPUT_GLB" "$OUTPUT_GLB" "$ANCHORS_JSON" --skip-optimize 2>&1 | grep -E "(Car dimensions|Created anchor|Added.*anchor|Found:|Extracted|Pipeline complete)"
   
   if [ ! -f "$OUTPUT_GLB" ]; then
     echo "  ❌ Failed to create GLB with anchors"
     continue
   fi
   
-  # Step 2: Extract anchor metadata
-  ANCHORS_JSON="tmp/anchors/${MODEL_ID}_anchors.json"
-  echo "  Step 2: Extracting anchor metadata..."
-  blender --background --python scripts/blender/extract_anchor_metadata.py -- "$OUTPUT_GLB" "$ANCHORS_JSON" 2>&1 | grep -E "(Found:|Extracted)"
-  
   if [ ! -f "$ANCHORS_JSON" ]; then
     echo "  ❌ Failed to extract anchors"
     continue